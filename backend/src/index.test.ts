@@ -67,3 +67,84 @@ describe('Error Handling', () => {
     expect(data).toHaveProperty('error', 'Not Found');
   });
 });
+
+describe('GeoJSON Tiles', () => {
+  const manifest = {
+    type: 'TileManifest',
+    bounds: [139.0, 35.333333, 141.0, 36.0],
+    bytes: 300,
+    vertices: 30,
+    tiles: [
+      { id: '5339', path: '5339.json', bounds: [139.0, 35.333333, 140.0, 36.0], bytes: 100, vertices: 10, features: 1 },
+      { id: '5340', path: '5340.json', bounds: [140.0, 35.333333, 141.0, 36.0], bytes: 200, vertices: 20, features: 2 },
+    ],
+  };
+  const tile = { type: 'FeatureCollection', features: [] };
+
+  // R2バケットの最小限のモック
+  const objects: Record<string, unknown> = {
+    'gsi-landcover/manifest.json': manifest,
+    'gsi-landcover/5339.json': tile,
+  };
+  const env = {
+    GEOJSON_BUCKET: {
+      get: async (key: string) => {
+        if (!(key in objects)) {
+          return null;
+        }
+        const text = JSON.stringify(objects[key]);
+        return {
+          json: async () => JSON.parse(text),
+          body: new Response(text).body,
+          httpEtag: '"etag"',
+        };
+      },
+    },
+  };
+
+  it('should return all tiles without bbox', async () => {
+    const res = await app.request('/api/geojson/gsi-landcover/tiles', {}, env);
+    const data = await res.json() as any;
+
+    expect(res.status).toBe(200);
+    expect(data.tiles).toHaveLength(2);
+    expect(data.bytes).toBe(300);
+  });
+
+  it('should return only tiles in bbox', async () => {
+    const res = await app.request('/api/geojson/gsi-landcover/tiles?bbox=139.2,35.5,139.8,35.9', {}, env);
+    const data = await res.json() as any;
+
+    expect(res.status).toBe(200);
+    expect(data.tiles.map((t: any) => t.id)).toEqual(['5339']);
+    expect(data.bytes).toBe(100);
+    expect(data.vertices).toBe(10);
+  });
+
+  it('should reject invalid bbox', async () => {
+    const res = await app.request('/api/geojson/gsi-landcover/tiles?bbox=139,35,abc', {}, env);
+
+    expect(res.status).toBe(400);
+  });
+
+  it('should return a tile', async () => {
+    const res = await app.request('/api/geojson/gsi-landcover/tiles/5339', {}, env);
+    const data = await res.json() as any;
+
+    expect(res.status).toBe(200);
+    expect(res.headers.get('Content-Type')).toBe('application/geo+json');
+    expect(data).toHaveProperty('type', 'FeatureCollection');
+  });
+
+  it('should return 404 for unknown tile', async () => {
+    const res = await app.request('/api/geojson/gsi-landcover/tiles/0000', {}, env);
+
+    expect(res.status).toBe(404);
+  });
+
+  it('should return 503 without R2 bucket', async () => {
+    const res = await app.request('/api/geojson/gsi-landcover/tiles');
+
+    expect(res.status).toBe(503);
+  });
+});
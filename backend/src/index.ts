@@ -285,6 +285,160 @@ api.get('/geojson/:filename', async (c) => {
   }
 });
 
+// 経緯度の範囲 [minLon, minLat, maxLon, maxLat]
+type Bbox = [number, number, number, number];
+
+// タイル分割したGeoJSONのマニフェスト（data/processing/geojson_tiles.py が出力）
+type TileEntry = {
+  id: string;
+  path: string;
+  bounds: Bbox;
+  bytes: number;
+  vertices: number;
+  features: number;
+};
+
+type TileManifest = {
+  type: 'TileManifest';
+  bounds: Bbox | null;
+  bytes: number;
+  vertices: number;
+  tiles: TileEntry[];
+};
+
+// R2のキーに使えるデータセット名・タイルID（パスの区切りや相対パスを含まない）
+const isValidTileKey = (key: string) => /^[^/\\]+$/.test(key) && !key.startsWith('.');
+
+// bbox クエリを解析（未指定なら undefined、不正なら null）
+const parseBbox = (value: string | undefined): Bbox | null | undefined => {
+  if (value === undefined) {
+    return undefined;
+  }
+  const bbox = value.split(',').map(Number);
+  if (bbox.length !== 4 || bbox.some((v) => !Number.isFinite(v)) || bbox[0] > bbox[2] || bbox[1] > bbox[3]) {
+    return null;
+  }
+  return bbox as Bbox;
+};
+
+const intersectsBbox = (a: Bbox, b: Bbox) =>
+  a[0] <= b[2] && b[0] <= a[2] && a[1] <= b[3] && b[1] <= a[3];
+
+// タイル分割したGeoJSONのマニフェスト取得（bbox=minLon,minLat,maxLon,maxLat で表示範囲内のタイルのみ）
+api.get('/geojson/:dataset/tiles', async (c) => {
+  const dataset = c.req.param('dataset');
+  const bbox = parseBbox(c.req.query('bbox'));
+
+  if (bbox === null || !isValidTileKey(dataset)) {
+    return c.json(
+      {
+        error: 'Bad Request',
+        message: 'Invalid dataset or bbox (expected "minLon,minLat,maxLon,maxLat")',
+      },
+      400
+    );
+  }
+
+  if (!c.env?.GEOJSON_BUCKET) {
+    return c.json(
+      {
+        error: 'R2 bucket not configured',
+        message: 'GeoJSON data storage is not available in this environment',
+      },
+      503
+    );
+  }
+
+  try {
+    const object = await c.env.GEOJSON_BUCKET.get(`${dataset}/manifest.json`);
+
+    if (!object) {
+      return c.json(
+        {
+          error: 'Not Found',
+          message: `Tile manifest for '${dataset}' not found`,
+        },
+        404
+      );
+    }
+
+    const manifest = await object.json<TileManifest>();
+    const tiles = bbox ? manifest.tiles.filter((tile) => intersectsBbox(tile.bounds, bbox)) : manifest.tiles;
+
+    return c.json({
+      ...manifest,
+      tiles,
+      bytes: tiles.reduce((sum, tile) => sum + tile.bytes, 0),
+      vertices: tiles.reduce((sum, tile) => sum + tile.vertices, 0),
+    });
+  } catch (error) {
+    console.error(`Error fetching tile manifest: ${error}`);
+    return c.json(
+      {
+        error: 'Internal Server Error',
+        message: 'Failed to fetch tile manifest',
+      },
+      500
+    );
+  }
+});
+
+// タイル分割したGeoJSONのタイル取得（タイルIDはマニフェストの id）
+api.get('/geojson/:dataset/tiles/:tile', async (c) => {
+  const dataset = c.req.param('dataset');
+  const tile = c.req.param('tile');
+
+  if (!isValidTileKey(dataset) || !isValidTileKey(tile)) {
+    return c.json(
+      {
+        error: 'Bad Request',
+        message: 'Invalid dataset or tile id',
+      },
+      400
+    );
+  }
+
+  if (!c.env?.GEOJSON_BUCKET) {
+    return c.json(
+      {
+        error: 'R2 bucket not configured',
+        message: 'GeoJSON data storage is not available in this environment',
+      },
+      503
+    );
+  }
+
+  try {
+    const object = await c.env.GEOJSON_BUCKET.get(`${dataset}/${tile}.json`);
+
+    if (!object) {
+      return c.json(
+        {
+          error: 'Not Found',
+          message: `Tile '${tile}' of '${dataset}' not found`,
+        },
+        404
+      );
+    }
+
+    // タイルは変換し直すまで変わらないため、ブラウザにキャッシュさせる
+    return c.body(object.body, 200, {
+      'Content-Type': 'application/geo+json',
+      'Cache-Control': 'public, max-age=86400',
+      ETag: object.httpEtag,
+    });
+  } catch (error) {
+    console.error(`Error fetching GeoJSON tile: ${error}`);
+    return c.json(
+      {
+        error: 'Internal Server Error',
+        message: 'Failed to fetch GeoJSON tile',
+      },
+      500
+    );
+  }
+});
+
 // 利用可能なGeoJSONファイル一覧取得
 api.get('/geojson', async (c) => {
   // R2バケットが利用可能かチェック
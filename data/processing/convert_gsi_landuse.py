@@ -4,100 +4,363 @@
 """
 
 import geopandas as gpd
+import numpy as np
+import pandas as pd
 import json
 from pathlib import Path
 from shapely.geometry import mapping
+import shapely
+from pyproj import CRS
 import argparse
+import glob
+import os
+import math
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from cost_estimate import (sample_evenly, format_bytes, format_duration, print_plan,
+                           GEOS_BYTES_PER_VERTEX, PYTHON_BYTES_PER_VERTEX, COVERAGE_BYTES_PER_VERTEX)
+from landuse_mesh import (mesh_code_to_indices, point_to_indices, cells_to_polygons, union_touching,
+                         FIRST_MESH_CELLS)
+from landuse_classes import (CLASSIFICATION_SCHEMES, DEFAULT_SCHEME, normalize_code, classify, category_names,
+                             scheme_categories)
+from coverage_simplify import build_coverage, simplify_coverage
+from size_budget import (BudgetError, parse_budgets, measure_output, search_tolerance, report_budget, format_budget,
+                         geojson_bytes)
+from geojson_tiles import mesh_tiles, load_region_tiles, iter_tile_collections, write_tiles, tile_output_dir
+
+# 土地利用コードのカラム名の候補
+CODE_COLUMNS = ['L05_006', 'L03_006', 'L03b_002', 'code', 'landuse']
+
+# 100mメッシュコードのカラム名の候補（土地利用細分メッシュ）
+MESH_COLUMNS = ['L03b_001', 'mesh_code', 'meshcode']
+
+# 一度に読み込む行数（メモリ使用量はデータ全体ではなくこの行数に比例する）
+DEFAULT_CHUNK_ROWS = 200000
+
+# ドライランで1行あたりの読み込み時間を計る行数
+READ_CALIBRATION_ROWS = 20000
+# ドライランで短い処理の時間を計る回数（最小値を使う）
+ESTIMATE_REPEATS = 3
+
+# チャンク内で統合する格子の大きさ（度、1次メッシュ = 緯度40分 × 経度1度）
+GRID_LAT = 2 / 3
+GRID_LON = 1.0
 
 def simplify_landuse_category(code):
     """
     土地利用コードを簡略化されたカテゴリに変換
-    国土数値情報の土地利用分類コードに基づく
+    国土数値情報の土地利用分類コードに基づく（分類表は landuse_classes の landcover）
     """
-    # 土地利用分類コード（国土数値情報）
-    # 01: 田, 02: 畑, 03: 果樹園, 05: 森林, 06: 荒地
-    # 07: 建物用地, 09: 幹線交通用地, 11: その他の用地
-    # 14: 河川地及び湖沼, 15: 海浜, 16: 海水域
+    code_str = normalize_code(code)
+    for name, codes in CLASSIFICATION_SCHEMES[DEFAULT_SCHEME].items():
+        if code_str in codes:
+            return name
+    return None  # 建物用地や道路は除外
 
-    code_str = str(code).zfill(2)
-
-    if code_str in ['05']:  # 森林
-        return 'forest'
-    elif code_str in ['01', '02', '03', '06']:  # 田畑、荒地
-        return 'grassland'
-    elif code_str in ['14', '15', '16']:  # 水域
-        return 'water'
-    else:
-        return None  # 建物用地や道路は除外
-
-def process_landuse_data(input_path, output_path, simplify_tolerance=0.001):
+def process_landuse_data(input_path, output_path, simplify_tolerance=0.001, chunk_rows=DEFAULT_CHUNK_ROWS,
+                         workers=1):
     """
-    土地利用データを処理してGeoJSONに変換
+    土地利用データを処理してGeoJSONに変換（標準の分類のみ）
 
     Args:
-        input_path: 入力Shapefileのパス
+        input_path: 入力Shapefileのパス（ワイルドカードで複数ファイルも指定可）
         output_path: 出力GeoJSONのパス
         simplify_tolerance: ジオメトリ簡略化の許容度（度単位）
+        chunk_rows: 一度に読み込む行数
+        workers: チャンクの処理と境界の結合に使うプロセス数（1以下なら現在のプロセスで処理）
     """
+    outputs = {DEFAULT_SCHEME: {simplify_tolerance: output_path}}
+    return convert_landuse(input_path, outputs, chunk_rows, workers)[DEFAULT_SCHEME][simplify_tolerance]
+
+def convert_landuse(input_path, outputs, chunk_rows=DEFAULT_CHUNK_ROWS, workers=1, tiling=None):
+    """
+    土地利用データを1回だけ読み込み、複数の分類（スキーム）・簡略化の許容度のGeoJSONに変換
+
+    全体を一度に読み込まず、chunk_rows 行ずつ座標変換・分類し、スキーム・タイプと
+    1次メッシュの格子ごとに統合する。最後にチャンクや格子の境界で接する部分だけを結合してから、
+    タイプ間の共有境界を保ったまま許容度ごとに簡略化する（save_landuse_lods）。
+    読み込み・座標変換・統合はスキームや許容度の数によらず1回だけ行う
+
+    Args:
+        input_path: 入力Shapefileのパス（ワイルドカードで複数ファイルも指定可）
+        outputs: {スキーム名: {簡略化の許容度（度単位）: 出力GeoJSONのパス}}
+        chunk_rows: 一度に読み込む行数
+        workers: チャンクの処理と境界の結合に使うプロセス数（1以下なら現在のプロセスで処理）
+        tiling: 指定するとタイルに分割して保存する（save_landuse_lods を参照）
+
+    Returns:
+        {スキーム名: {許容度: 保存したGeoJSONの辞書（タイル分割時はマニフェスト）}}
+    """
+    schemes = list(outputs)
+    count, fields, crs = read_layer_info(input_path)
     print(f"データ読み込み中: {input_path}")
-    gdf = gpd.read_file(input_path)
+    print(f"元のデータ件数: {count}")
+    print(f"元のCRS: {crs}")
+
+    code_column = find_code_column(fields)
+    print(f"土地利用コードカラム: {code_column}")
+    print(f"分類: {', '.join(schemes)}")
+    print(f"{chunk_rows} 行ずつ変換・統合します（{max(workers, 1)} プロセス）")
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        partials = []
+        done = 0
+        kept = 0
+        windows = iter_windows(input_path, chunk_rows)
+        for rows, matched, partial in dissolve_windows(windows, code_column, schemes, executor, workers):
+            done += rows
+            kept += matched
+            if len(partial):
+                partials.append(partial.assign(chunk=len(partials)))
+            print(f"進行状況: {done} / {count} 件")
+
+        print(f"フィルタ後のデータ件数: {kept}")
+
+        # スキーム・タイプごとにチャンク・格子の統合結果を結合（他のチャンク・格子と接する部分だけを結合し直す）
+        print("タイプごとにポリゴンを統合中...")
+        merged = {scheme: {} for scheme in schemes}
+        if partials:
+            combined = pd.concat(partials, ignore_index=True)
+            groups = combined.groupby(['chunk', 'cell']).ngroup().to_numpy()
+            for (scheme, name), group in combined.groupby(['scheme', 'type'], sort=True):
+                parts, index = shapely.get_parts(group.geometry.values, return_index=True)
+                merged[scheme][name] = union_touching(parts, groups[group.index.to_numpy()][index], executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    results = {}
+    for scheme in schemes:
+        print(f"統合後のフィーチャー数（{scheme}）: {len(merged[scheme])}")
+        results[scheme] = save_landuse_lods(merged[scheme], "EPSG:4326", outputs[scheme], tiling)
+    return results
+
+def save_landuse_lods(merged, crs, outputs, tiling=None):
+    """
+    タイプごとに統合したジオメトリを、許容度ごとに簡略化してGeoJSONとして保存
+
+    ポリゴンを1つずつ簡略化するとタイプ間の共有境界がずれてすき間や重なりができるため、
+    共有境界をノード化したカバレッジを1回だけ作り、許容度ごとにそこから簡略化する。
+    許容度の代わりに予算を指定すると、同じカバレッジから簡略化を繰り返して予算に収まる最小の許容度を探す
+    （search_landuse_budget）。最大の許容度でも収まらない場合は、その出力を保存せずに BudgetError を送出する
+
+    Args:
+        merged: {タイプ: MultiPolygon}
+        crs: merged の座標系
+        outputs: {簡略化の許容度（度単位）または予算（('bytes' / 'vertices', 上限)）: 出力GeoJSONのパス}
+        tiling: 範囲を受け取って (タイルID, ジオメトリ) のリストを返す関数（mesh_tiles など）。
+                指定すると1つのGeoJSONの代わりに、出力パスの拡張子を除いたディレクトリにタイルとマニフェストを保存する
+
+    Returns:
+        {許容度または予算: 保存したGeoJSONの辞書（タイル分割時はマニフェスト）}
+    """
+    dissolved = gpd.GeoDataFrame({'type': list(merged)}, geometry=list(merged.values()), crs=crs)
+    if dissolved.crs != "EPSG:4326":
+        print("WGS84 (EPSG:4326) に変換中...")
+        dissolved = dissolved.to_crs("EPSG:4326")
+
+    print("タイプ間の共有境界をノード化中...")
+    faces, keys = build_coverage(dict(zip(dissolved['type'], dissolved.geometry)))
+
+    results = {}
+    for level, output_path in outputs.items():
+        if isinstance(level, tuple):
+            print(f"予算に収まる許容度を探索中{'（最も大きいタイルで計測）' if tiling is not None else ''}...")
+            tolerance, simplified, value = search_landuse_budget(faces, keys, level, level[1], tiling)
+            report_budget(level, tolerance, value)
+        else:
+            print(f"ジオメトリを簡略化中（許容度: {level}）...")
+            simplified = simplify_coverage(faces, keys, level)
+        lod = landuse_lod_frame(simplified)
+        if tiling is None:
+            results[level] = save_landuse_geojson(lod, output_path)
+        else:
+            results[level] = save_landuse_tiles(lod, output_path, tiling)
+    return results
+
+def landuse_lod_frame(simplified):
+    """簡略化の結果（{タイプ: MultiPolygon}）を保存するGeoDataFrame（type, geometry）に変換"""
+    return gpd.GeoDataFrame({'type': list(simplified)}, geometry=list(simplified.values()), crs="EPSG:4326")
+
+def search_landuse_budget(faces, keys, budget, limit, tiling=None):
+    """
+    共有境界を保った簡略化で、出力が limit 以下になる最小の許容度を探す
 
-    print(f"元のデータ件数: {len(gdf)}")
-    print(f"元のCRS: {gdf.crs}")
+    coverage_simplify は面を消さないため、許容度を大きくするほど小さい面（許容度の2乗未満の面積）も除いて、
+    面の数で決まる大きさより小さい予算にも収まるようにする。タイル分割時は最も大きいタイルを limit と比べる
+
+    Args:
+        faces, keys: build_coverage の戻り値
+        budget: ('bytes' / 'vertices', 上限)
+        limit: 比べる上限（ドライランではサンプルの比で縮めた値）
+        tiling: save_landuse_lods を参照
+
+    Returns:
+        search_tolerance の戻り値
+    """
+    kind = budget[0]
+
+    def measure(simplified):
+        if tiling is None:
+            return measure_output(kind, list(simplified.values()),
+                                  lambda: landuse_feature_collection(simplified.items()))
+        if not simplified:
+            return 0
+        lod = landuse_lod_frame(simplified)
+        return max((measure_output(kind, polygons, lambda: collection)
+                    for _, polygons, collection in iter_tile_collections(lod, tiling(lod.total_bounds))), default=0)
+
+    return search_tolerance(lambda tolerance: simplify_coverage(faces, keys, tolerance, min_area=tolerance ** 2),
+                            measure, limit)
+
+def save_landuse_tiles(dissolved, output_path, tiling):
+    """
+    タイプごとに統合したGeoDataFrame（type, geometry）をタイルに分割して保存
+
+    Returns:
+        マニフェストの辞書
+    """
+    output_dir = tile_output_dir(output_path)
+    print(f"タイルに分割して保存中: {output_dir}")
+    manifest = write_tiles(dissolved, tiling(dissolved.total_bounds), output_dir)
+    print(f"完了！タイル数: {len(manifest['tiles'])}、合計サイズ: {manifest['bytes'] / 1024 / 1024:.2f} MB")
+    return manifest
+
+def dissolve_chunk(gdf, code_column, schemes=(DEFAULT_SCHEME,)):
+    """
+    チャンクを座標変換・分類し、スキーム・タイプと格子（1次メッシュ）ごとに統合
+
+    簡略化は統合後にまとめて行う（save_landuse_lods）
+
+    Returns:
+        (読み込んだ件数, 対象の件数, 統合結果のGeoDataFrame（scheme, type, cell, geometry）)
+    """
+    rows = len(gdf)
 
     # WGS84に変換
     if gdf.crs != "EPSG:4326":
-        print("WGS84 (EPSG:4326) に変換中...")
         gdf = gdf.to_crs("EPSG:4326")
 
-    # 土地利用コードのカラム名を探す
-    code_column = None
-    for col in ['L05_006', 'L03_006', 'code', 'landuse']:
-        if col in gdf.columns:
-            code_column = col
-            break
+    # 全スキームのカテゴリ番号を一度に求め、どのスキームでも対象外の行を除外
+    ids = classify(gdf[code_column], schemes)
+    wanted = np.logical_or.reduce([values > 0 for values in ids.values()])
+    gdf = gdf[wanted]
+    ids = {scheme: values[wanted] for scheme, values in ids.items()}
 
-    if not code_column:
-        print(f"警告: 土地利用コードのカラムが見つかりません。利用可能なカラム: {list(gdf.columns)}")
-        code_column = gdf.columns[0]
+    # 外接矩形の中心が含まれる格子に振り分ける
+    geometry = gdf.geometry.values
+    bounds = shapely.bounds(geometry)
+    cell = (np.floor((bounds[:, 1] + bounds[:, 3]) / 2 / GRID_LAT).astype(np.int64) * 1000
+            + np.floor((bounds[:, 0] + bounds[:, 2]) / 2 / GRID_LON).astype(np.int64))
 
-    print(f"土地利用コードカラム: {code_column}")
+    # スキームごとに対象の行を並べて、スキーム・タイプ・格子ごとに統合
+    frames = []
+    for scheme, values in ids.items():
+        selected = values > 0
+        frames.append(gpd.GeoDataFrame({
+            'scheme': scheme,
+            'type': category_names(values[selected], scheme),
+            'cell': cell[selected],
+        }, geometry=geometry[selected], crs="EPSG:4326"))
+    stacked = gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), crs="EPSG:4326")
+    dissolved = stacked.dissolve(by=['scheme', 'type', 'cell'], as_index=False)
+    return rows, len(gdf), dissolved
 
-    # カテゴリ変換
-    print("土地利用カテゴリを変換中...")
-    gdf['type'] = gdf[code_column].apply(simplify_landuse_category)
+def _dissolve_window_task(task):
+    """プロセスプールで実行するチャンクの処理（読み込みから統合まで。親プロセスには統合結果だけを返す）"""
+    path, start, stop, code_column, schemes = task
+    return dissolve_chunk(gpd.read_file(path, rows=slice(start, stop)), code_column, schemes)
 
-    # 不要なカテゴリを除外
-    gdf = gdf[gdf['type'].notna()]
-    print(f"フィルタ後のデータ件数: {len(gdf)}")
+def dissolve_windows(windows, code_column, schemes=(DEFAULT_SCHEME,), executor=None, workers=1):
+    """
+    読み込み範囲ごとに dissolve_chunk の結果を順に返すジェネレータ
+
+    executor を指定すると、各プロセスが自分の範囲を読み込んで統合するため、
+    親プロセスとの間でやり取りするのは統合結果だけになる
+
+    Args:
+        windows: (ファイル, 開始行, 終了行) のイテラブル（iter_windowsの戻り値）
+        schemes: 分類するスキーム名のリスト
+        executor: ProcessPoolExecutor（省略時は現在のプロセスで処理）
+        workers: executor のプロセス数（同時に処理待ちにする範囲は2倍まで）
+    """
+    if executor is None:
+        for path, start, stop in windows:
+            yield _dissolve_window_task((path, start, stop, code_column, schemes))
+        return
 
-    # ジオメトリを簡略化
-    print(f"ジオメトリを簡略化中（許容度: {simplify_tolerance}）...")
-    gdf['geometry'] = gdf['geometry'].simplify(simplify_tolerance, preserve_topology=True)
+    pending = deque()
+    for path, start, stop in windows:
+        pending.append(executor.submit(
+            _dissolve_window_task, (path, start, stop, code_column, schemes)
+        ))
+        while len(pending) >= workers * 2:
+            yield pending.popleft().result()
 
-    # タイプごとにグループ化して統合
-    print("タイプごとにポリゴンを統合中...")
-    dissolved = gdf.dissolve(by='type', as_index=False)
-    print(f"統合後のフィーチャー数: {len(dissolved)}")
+    while pending:
+        yield pending.popleft().result()
+
+def find_code_column(fields):
+    """土地利用コードのカラム名を探す（見つからなければ先頭のカラム）"""
+    for col in CODE_COLUMNS:
+        if col in fields:
+            return col
+
+    print(f"警告: 土地利用コードのカラムが見つかりません。利用可能なカラム: {list(fields)}")
+    return fields[0]
+
+def landuse_output_path(output_path, scheme, level, multiple_schemes, multiple_levels):
+    """
+    スキーム・簡略化の許容度（または予算）ごとの出力パスを決める
 
-    # GeoJSON用のフィーチャーリスト作成
+    output_pathに {scheme} / {tolerance} があれば置き換え、なければ複数ある場合だけファイル名の末尾に付ける
+
+    Args:
+        level: 許容度、または予算のラベル（"2MB" など）
+    """
+    label = f"{level:g}" if isinstance(level, float) else level
+    suffix = ''
+    if multiple_schemes and '{scheme}' not in output_path:
+        suffix += f"-{scheme}"
+    if multiple_levels and '{tolerance}' not in output_path:
+        suffix += f"-{label}"
+    output_path = output_path.format(scheme=scheme, tolerance=label)
+    if not suffix:
+        return output_path
+    path = Path(output_path)
+    return str(path.with_name(f"{path.stem}{suffix}{path.suffix}"))
+
+def landuse_feature_collection(items):
+    """(タイプ, ジオメトリ) のイテラブルから保存するGeoJSONの辞書を作る"""
     features = []
-    for idx, row in dissolved.iterrows():
+    for name, geometry in items:
         feature = {
             "type": "Feature",
             "properties": {
-                "type": row['type']
+                "type": name
             },
-            "geometry": mapping(row['geometry'])
+            "geometry": mapping(geometry)
         }
         features.append(feature)
 
-    # GeoJSON作成
-    geojson = {
+    return {
         "type": "FeatureCollection",
         "features": features
     }
 
+def save_landuse_geojson(dissolved, output_path):
+    """
+    タイプごとに統合したGeoDataFrame（type, geometry）をGeoJSONとして保存
+
+    Returns:
+        保存したGeoJSONの辞書
+    """
+    geojson = landuse_feature_collection(zip(dissolved['type'], dissolved.geometry))
+
     # ファイル保存
     print(f"GeoJSONを保存中: {output_path}")
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -109,16 +372,468 @@ def process_landuse_data(input_path, output_path, simplify_tolerance=0.001):
 
     return geojson
 
+def list_input_files(input_path):
+    """
+    入力パスをファイルのリストに展開
+
+    土地利用細分メッシュは1次メッシュごとのファイルで配布されるため、
+    "L03-b-21_GML/*.shp" のようなワイルドカードでまとめて指定できる
+    """
+    if glob.has_magic(str(input_path)):
+        files = sorted(glob.glob(str(input_path)))
+        if not files:
+            raise FileNotFoundError(f"入力ファイルが見つかりません: {input_path}")
+        return files
+    return [input_path]
+
+def _read_file_info(path):
+    try:
+        import pyogrio
+        info = pyogrio.read_info(path)
+        return info['features'], list(info['fields']), info['crs']
+    except ImportError:
+        import fiona
+        with fiona.open(path) as src:
+            return len(src), list(src.schema['properties']), src.crs
+
+def read_layer_info(input_path):
+    """
+    Shapefileのフィーチャー数・カラム名・CRSをジオメトリを読まずに取得
+
+    複数ファイルの場合、フィーチャー数は合計、カラム名とCRSは最初のファイルのもの
+
+    Returns:
+        (フィーチャー数, カラム名のリスト, CRS)
+    """
+    files = list_input_files(input_path)
+    count, fields, crs = _read_file_info(files[0])
+    for path in files[1:]:
+        count += _read_file_info(path)[0]
+    return count, fields, crs
+
+def count_features(input_path):
+    """Shapefileのフィーチャー数をジオメトリを読まずに取得"""
+    return read_layer_info(input_path)[0]
+
+def iter_windows(input_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """入力を (ファイル, 開始行, 終了行) の範囲に分ける（ファイルごと、ファイル内は chunk_rows 行ずつ）"""
+    for path in list_input_files(input_path):
+        count = _read_file_info(path)[0]
+        for start in range(0, count, chunk_rows):
+            yield path, start, min(start + chunk_rows, count)
+
+def iter_chunks(input_path, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None, ignore_geometry=False):
+    """入力を chunk_rows 行以下のGeoDataFrame（ignore_geometryならDataFrame）ずつ読み込むジェネレータ"""
+    for path, start, stop in iter_windows(input_path, chunk_rows):
+        yield gpd.read_file(path, rows=slice(start, stop), columns=columns, ignore_geometry=ignore_geometry)
+
+def process_landuse_raster(input_path, output_path, simplify_tolerance=0.001, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    土地利用細分メッシュをラスターとして処理してGeoJSONに変換（標準の分類のみ）
+
+    Args:
+        input_path: 入力Shapefileのパス（100mメッシュ、ワイルドカードで複数ファイルも指定可）
+        output_path: 出力GeoJSONのパス
+        simplify_tolerance: 結合後のジオメトリ簡略化の許容度（度単位）
+        chunk_rows: 一度に読み込む行数
+    """
+    outputs = {DEFAULT_SCHEME: {simplify_tolerance: output_path}}
+    return convert_landuse_raster(input_path, outputs, chunk_rows)[DEFAULT_SCHEME][simplify_tolerance]
+
+def convert_landuse_raster(input_path, outputs, chunk_rows=DEFAULT_CHUNK_ROWS, tiling=None):
+    """
+    土地利用細分メッシュをラスターとして1回だけ読み込み、複数の分類（スキーム）・簡略化の許容度のGeoJSONに変換
+
+    メッシュコードのカラムがあれば属性だけを読み込み、なければ各メッシュの中心点から
+    格子上の位置を求める。chunk_rows 行ずつ読み込んでセル番号とスキームごとのカテゴリ番号の配列
+    （1セルあたり 8 + スキーム数 バイト）にしてから、1次メッシュごとの配列の境界をたどって結合するため、
+    ポリゴンの dissolve より高速で、メモリも少ない
+
+    Args:
+        input_path: 入力Shapefileのパス（100mメッシュ、ワイルドカードで複数ファイルも指定可）
+        outputs: {スキーム名: {結合後のジオメトリ簡略化の許容度（度単位）: 出力GeoJSONのパス}}
+        chunk_rows: 一度に読み込む行数
+        tiling: 指定するとタイルに分割して保存する（save_landuse_lods を参照）
+
+    Returns:
+        {スキーム名: {許容度: 保存したGeoJSONの辞書（タイル分割時はマニフェスト）}}
+    """
+    schemes = list(outputs)
+    count, fields, crs = read_layer_info(input_path)
+    print(f"データ読み込み中: {input_path}")
+    print(f"元のデータ件数: {count}")
+    print(f"元のCRS: {crs}")
+
+    code_column = find_code_column(fields)
+    mesh_column = next((col for col in MESH_COLUMNS if col in fields), None)
+    print(f"土地利用コードカラム: {code_column}")
+    print(f"分類: {', '.join(schemes)}")
+    if mesh_column:
+        # メッシュコードから位置がわかるため、ジオメトリは読まない
+        print(f"メッシュコードカラム: {mesh_column}")
+        mesh_crs = crs if crs and CRS.from_user_input(crs).is_geographic else "EPSG:6668"
+        chunks = iter_chunks(input_path, chunk_rows, columns=[mesh_column, code_column], ignore_geometry=True)
+    else:
+        print("メッシュコードのカラムがないため、メッシュの中心点から位置を求めます")
+        mesh_crs = None
+        chunks = iter_chunks(input_path, chunk_rows, columns=[code_column])
+
+    rows, cols = [], []
+    values = {scheme: [] for scheme in schemes}
+    done = 0
+    for df in chunks:
+        done += len(df)
+        if mesh_column:
+            cell_rows, cell_cols = mesh_code_to_indices(df[mesh_column])
+        else:
+            if df.crs is None or not df.crs.is_geographic:
+                df = df.to_crs("EPSG:6668")
+            mesh_crs = mesh_crs or df.crs
+            centroids = shapely.centroid(np.asarray(df.geometry.array))
+            cell_rows, cell_cols = point_to_indices(shapely.get_x(centroids), shapely.get_y(centroids))
+
+        # どのスキームでも対象外のセルはここで捨てる（セル番号は全スキームで共有）
+        chunk_values = classify(df[code_column], schemes)
+        keep = np.logical_or.reduce([ids > 0 for ids in chunk_values.values()])
+        rows.append(cell_rows[keep].astype(np.int32))
+        cols.append(cell_cols[keep].astype(np.int32))
+        for scheme, ids in chunk_values.items():
+            values[scheme].append(ids[keep])
+        print(f"進行状況: {done} / {count} 件")
+
+    rows, cols = (np.concatenate(a) if a else np.empty(0, dtype=np.int32) for a in (rows, cols))
+    values = {scheme: np.concatenate(a) if a else np.empty(0, dtype=np.uint8) for scheme, a in values.items()}
+    print(f"フィルタ後のデータ件数: {len(rows)}")
+
+    results = {}
+    for scheme in schemes:
+        # 1次メッシュごとの配列からカテゴリごとのポリゴンを作り、1次メッシュの境界で結合
+        print(f"メッシュをカテゴリごとに結合中（{scheme}）...")
+        names = scheme_categories(scheme)
+        ids = values.pop(scheme)
+        selected = ids > 0
+        polygons = cells_to_polygons(rows[selected], cols[selected], ids[selected], range(1, len(names) + 1))
+        merged = {name: polygons[i] for i, name in enumerate(names, 1) if i in polygons}
+        print(f"統合後のフィーチャー数: {len(merged)}")
+        results[scheme] = save_landuse_lods(merged, mesh_crs or "EPSG:6668", outputs[scheme], tiling)
+    return results
+
+def estimate_conversion(input_path, levels=(0.001,), sample_rows=2000, chunks=4,
+                        chunk_rows=DEFAULT_CHUNK_ROWS, schemes=(DEFAULT_SCHEME,), method='polygon', workers=1,
+                        tiling=None):
+    """
+    変換を実行せずに、一部の行だけを処理して全体の規模を見積もる（ドライラン）
+
+    入力全体の等間隔の位置から連続した行を読み込み（隣接メッシュの統合を見積もりに含めるため）、
+    実際の変換と同じ方式（method）で統合・簡略化して、行数に比例させて所要時間・ピークメモリ・出力サイズを表示する。
+    予算を指定した場合は、サンプルの出力が予算を行数の比で縮めた大きさに収まる許容度を探す。
+
+    Args:
+        input_path: 入力Shapefileのパス（ワイルドカードで複数ファイルも指定可）
+        levels: ジオメトリ簡略化の許容度（度単位）または予算（('bytes' / 'vertices', 上限)）のリスト
+        sample_rows: 読み込む行数の合計
+        chunks: 読み込む位置の数
+        chunk_rows: 変換時に一度に読み込む行数
+        schemes: 出力するスキーム名のリスト
+        method: 'polygon'（convert_landuse）または 'raster'（convert_landuse_raster）
+        workers: polygon方式で並列に処理するプロセス数
+        tiling: 指定するとサンプルの出力をタイルに分割する時間も含める（save_landuse_lods を参照）
+
+    Returns:
+        見積もり結果の辞書
+    """
+    total, fields, layer_crs = read_layer_info(input_path)
+    if total == 0:
+        print("フィーチャーがありません")
+        return None
+
+    code_column = find_code_column(fields)
+    mesh_column = next((col for col in MESH_COLUMNS if col in fields), None) if method == 'raster' else None
+    window_rows = max(sample_rows // chunks, 1)
+    windows = sample_evenly(iter_windows(input_path, window_rows), chunks)
+    timings = {'read': 0.0, 'crs': 0.0, 'classify': 0.0, 'simplify': 0.0, 'dissolve': 0.0, 'tiles': 0.0,
+               'write': 0.0}
+
+    def read_window(path, start, stop):
+        if mesh_column:
+            # raster方式はメッシュコードから位置がわかるため、ジオメトリは読まない
+            return gpd.read_file(path, rows=slice(start, stop), columns=[mesh_column, code_column],
+                                 ignore_geometry=True)
+        return gpd.read_file(path, rows=slice(start, stop))
+
+    # ファイルを開くなど読み込み1回ごとにかかる時間と、1行あたりの時間を、1行と多めの行の読み込みで計る
+    # （サンプルの範囲は小さく、読み込み時間のほとんどが1回ごとの時間になるため）
+    path, start, _ = windows[0]
+    calibration_rows = min(READ_CALIBRATION_ROWS, _read_file_info(path)[0] - start)
+    started = time.perf_counter()
+    read_window(path, start, start + 1)
+    open_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    read_window(path, start, start + calibration_rows)
+    row_seconds = max(time.perf_counter() - started - open_seconds, 0) / max(calibration_rows - 1, 1)
+
+    frames = []
+    for path, start, stop in windows:
+        started = time.perf_counter()
+        frames.append(read_window(path, start, stop))
+        timings['read'] += time.perf_counter() - started
+    gdf = pd.concat(frames, ignore_index=True)
+    if not mesh_column:
+        gdf = gpd.GeoDataFrame(gdf, crs=frames[0].crs)
+    rows = len(gdf)
+    scale = total / rows
+
+    vertices = 0 if mesh_column else int(shapely.get_num_coordinates(gdf.geometry.values).sum())
+    memory_bytes = gdf.memory_usage(deep=True).sum() + vertices * GEOS_BYTES_PER_VERTEX
+
+    if method == 'raster':
+        started = time.perf_counter()
+        mesh_crs = layer_crs if layer_crs and CRS.from_user_input(layer_crs).is_geographic else "EPSG:6668"
+        if mesh_column:
+            cell_rows, cell_cols = mesh_code_to_indices(gdf[mesh_column])
+        else:
+            if gdf.crs is None or not gdf.crs.is_geographic:
+                gdf = gdf.to_crs("EPSG:6668")
+            mesh_crs = gdf.crs
+            centroids = shapely.centroid(np.asarray(gdf.geometry.array))
+            cell_rows, cell_cols = point_to_indices(shapely.get_x(centroids), shapely.get_y(centroids))
+        timings['crs'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        ids = classify(gdf[code_column], schemes)
+        kept = int(np.logical_or.reduce([values > 0 for values in ids.values()]).sum())
+        timings['classify'] = time.perf_counter() - started
+
+        def rasterize(first_only=False):
+            merged = {}
+            for scheme, values in ids.items():
+                names = scheme_categories(scheme)
+                selected = np.flatnonzero(values > 0)
+                if first_only:
+                    _, first = np.unique(np.stack([cell_rows[selected] // FIRST_MESH_CELLS,
+                                                   cell_cols[selected] // FIRST_MESH_CELLS, values[selected]]),
+                                         axis=1, return_index=True)
+                    selected = selected[first]
+                polygons = cells_to_polygons(cell_rows[selected], cell_cols[selected], values[selected],
+                                             range(1, len(names) + 1))
+                merged[scheme] = {name: polygons[i] for i, name in enumerate(names, 1) if i in polygons}
+            return merged
+
+        # 1次メッシュ・カテゴリごとの配列の処理時間は行数ではなく1次メッシュの数に比例するため、
+        # 1次メッシュ・カテゴリごとに1セルだけを結合した時間と分けて計る（短い処理のため3回の最小値）
+        dissolve_seconds, block_seconds = [], []
+        for _ in range(ESTIMATE_REPEATS):
+            started = time.perf_counter()
+            merged = rasterize()
+            dissolve_seconds.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            rasterize(first_only=True)
+            block_seconds.append(time.perf_counter() - started)
+        timings['dissolve'] = min(dissolve_seconds)
+        block_seconds = min(min(block_seconds), timings['dissolve'])
+    else:
+        started = time.perf_counter()
+        mesh_crs = "EPSG:4326"
+        if gdf.crs != "EPSG:4326":
+            gdf = gdf.to_crs("EPSG:4326")
+        timings['crs'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        ids = classify(gdf[code_column], schemes)
+        wanted = np.logical_or.reduce([values > 0 for values in ids.values()])
+        gdf = gdf[wanted]
+        ids = {scheme: values[wanted] for scheme, values in ids.items()}
+        timings['classify'] = time.perf_counter() - started
+        kept = len(gdf)
+
+        started = time.perf_counter()
+        frames = []
+        for scheme, values in ids.items():
+            selected = values > 0
+            frames.append(gpd.GeoDataFrame({'scheme': scheme, 'type': category_names(values[selected], scheme)},
+                                           geometry=gdf.geometry.values[selected], crs=gdf.crs))
+        dissolved = gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), crs=gdf.crs).dissolve(
+            by=['scheme', 'type'], as_index=False)
+        merged = {scheme: dict(zip(group['type'], group.geometry)) for scheme, group in dissolved.groupby('scheme')}
+        timings['dissolve'] = time.perf_counter() - started
+
+    output_bytes = 0
+    output_vertices = 0
+    merged_vertices = max((int(shapely.get_num_coordinates(list(geometries.values())).sum())
+                           for geometries in merged.values()), default=0)
+    sample_tiles = 0
+    chosen = {}
+    for scheme, geometries in merged.items():
+        started = time.perf_counter()
+        lonlat = gpd.GeoSeries(list(geometries.values()), crs=mesh_crs).to_crs("EPSG:4326")
+        faces, keys = build_coverage(dict(zip(geometries, lonlat)))
+        lods = []
+        for level in levels:
+            if isinstance(level, tuple):
+                # サンプルの出力は全体の 1/scale 程度になるため、予算も同じ比で縮めて探索する
+                tolerance, simplified, value = search_landuse_budget(faces, keys, level, level[1] / scale, tiling)
+                if value * scale > level[1]:
+                    print(f"警告: サンプルから見積もると、許容度 {tolerance:g} でも約 {format_budget((level[0], value * scale))}"
+                          f" で予算 {format_budget(level)} に収まりません（変換はエラーで終了する可能性があります）")
+                chosen.setdefault(format_budget(level), []).append(tolerance)
+                lods.append(simplified)
+            else:
+                lods.append(simplify_coverage(faces, keys, level))
+        timings['simplify'] += time.perf_counter() - started
+
+        for simplified in lods:
+            started = time.perf_counter()
+            output_bytes += geojson_bytes(landuse_feature_collection(simplified.items()))
+            timings['write'] += time.perf_counter() - started
+            output_vertices += int(shapely.get_num_coordinates(list(simplified.values())).sum())
+            if tiling is not None and simplified:
+                started = time.perf_counter()
+                lod = landuse_lod_frame(simplified)
+                with tempfile.TemporaryDirectory() as tile_dir:
+                    sample_tiles += len(write_tiles(lod, tiling(lod.total_bounds), tile_dir)['tiles'])
+                timings['tiles'] += time.perf_counter() - started
+
+    # polygon方式は読み込みから格子ごとの統合までをチャンク単位で並列に処理する
+    parallel = 1 if method == 'raster' else max(1, min(workers, math.ceil(total / chunk_rows)))
+    projected_output = output_bytes * scale
+    chunk_bytes = memory_bytes / rows * min(chunk_rows, total)
+    # 共有境界のノード化はスキームごとに行うため、最も大きいスキームの分だけを加える
+    peak_bytes = (chunk_bytes * parallel + merged_vertices * scale * COVERAGE_BYTES_PER_VERTEX
+                  + output_vertices * scale * (GEOS_BYTES_PER_VERTEX + PYTHON_BYTES_PER_VERTEX)
+                  + projected_output)
+    projected = {name: seconds * scale for name, seconds in timings.items()}
+    if tiling is not None:
+        # タイル分割の時間にタイルの書き出しを含む
+        projected['write'] = 0.0
+    reads = sum(1 for _ in iter_windows(input_path, chunk_rows))
+    projected['read'] = open_seconds * reads + row_seconds * total
+    if method == 'raster':
+        # 対象のセルごとにセル番号とスキームごとのカテゴリ番号を保持する
+        peak_bytes += kept * scale * (8 + len(schemes))
+        # 1次メッシュの数は、サンプルを読んだファイルあたりの数から入力ファイル数に比例させる
+        sampled_files = len({path for path, _, _ in windows})
+        block_scale = max(len(list_input_files(input_path)) / sampled_files, 1)
+        projected['dissolve'] = block_seconds * block_scale + (timings['dissolve'] - block_seconds) * scale
+    else:
+        # 統合（unary_union）は件数に対して n log n 程度で増える
+        dissolve_scale = scale * math.log(max(kept * scale, 2)) / math.log(max(kept, 2))
+        projected['dissolve'] = timings['dissolve'] * dissolve_scale
+        for name in ('read', 'crs', 'classify', 'dissolve'):
+            projected[name] /= parallel
+    total_seconds = sum(projected.values())
+
+    tolerance_labels = [f"{level:g}" for level in levels if not isinstance(level, tuple)]
+    tolerance_labels += [f"{label} → {max(tolerances):.3g}" for label, tolerances in chosen.items()]
+    method_label = f"{method}（{parallel} プロセス）"
+    if method == 'raster' and workers > 1:
+        method_label += "、--workers は polygon方式のみ"
+    files = list_input_files(input_path)
+    input_bytes = sum(Path(path).stat().st_size for path in files)
+    outputs = len(merged) * len(levels)
+    plan = [
+        ('入力', f"{input_path}（{len(files)} ファイル、{format_bytes(input_bytes)}）"),
+        ('方式', method_label),
+        ('フィーチャー数', f"{total:,}（変換対象 約 {kept * scale:,.0f}）"),
+        ('読み込み', f"約 {format_duration(projected['read'])}（{chunk_rows:,} 行ずつ）"),
+        ('座標変換・分類', f"約 {format_duration(projected['crs'] + projected['classify'])}"),
+        ('統合', f"約 {format_duration(projected['dissolve'])}"),
+        ('簡略化', f"約 {format_duration(projected['simplify'])}（許容度: {', '.join(tolerance_labels)}）"),
+    ]
+    if tiling is not None:
+        plan.append(('タイル分割', f"約 {format_duration(projected['tiles'])}（サンプルで {sample_tiles} タイル）"))
+    else:
+        plan.append(('書き出し', f"約 {format_duration(projected['write'])}"))
+    plan += [
+        ('出力', f"{outputs} {'ディレクトリ' if tiling is not None else 'ファイル'}、"
+                 f"頂点 約 {output_vertices * scale:,.0f}、約 {format_bytes(projected_output)}"),
+        ('ピークメモリ', f"約 {format_bytes(peak_bytes)}"),
+        ('所要時間', f"約 {format_duration(total_seconds)}"),
+    ]
+    print_plan(f"実行計画（ドライラン: {rows:,} / {total:,} 行を計測）", plan)
+    print("※ 出力の頂点数・サイズは、サンプル間の統合による削減を含まない上限の目安です")
+    if chosen:
+        print("※ 予算の許容度はサンプルから求めた目安で、実際の変換では全体の出力で探索し直します")
+
+    return {
+        'features': total,
+        'seconds': total_seconds,
+        'peak_bytes': peak_bytes,
+        'output_bytes': projected_output,
+    }
+
 def main():
     parser = argparse.ArgumentParser(description='国土地理院土地利用データをGeoJSONに変換')
-    parser.add_argument('input', help='入力Shapefileのパス')
-    parser.add_argument('output', help='出力GeoJSONのパス')
-    parser.add_argument('--simplify', type=float, default=0.001,
-                        help='ジオメトリ簡略化の許容度（デフォルト: 0.001）')
+    parser.add_argument('input', help='入力Shapefileのパス（"L03-b-21_GML/*.shp" のようにワイルドカードで複数ファイルも指定可）')
+    parser.add_argument('output', help='出力GeoJSONのパス（複数のスキーム・許容度の場合は {scheme}・{tolerance} で'
+                                       '出力先を指定可、省略時はファイル名の末尾にスキーム名・許容度を付ける）')
+    parser.add_argument('--simplify', type=float, nargs='+', default=[0.001],
+                        help='ジオメトリ簡略化の許容度（デフォルト: 0.001）。複数指定すると1回の読み込み・統合から'
+                             '許容度ごとの詳細度（LOD）のファイルを出力する')
+    parser.add_argument('--max-size', nargs='+', metavar='SIZE',
+                        help='許容度の代わりに出力サイズの上限（"2MB"・"500KB" など）を指定し、収まる最小の許容度を探す。'
+                             '複数指定すると上限ごとのファイルを出力する')
+    parser.add_argument('--max-vertices', nargs='+', type=int, metavar='COUNT',
+                        help='許容度の代わりに出力の頂点数の上限を指定し、収まる最小の許容度を探す')
+    parser.add_argument('--tiles', metavar='mesh|PATH',
+                        help='全国を1ファイルにする代わりに、1次メッシュ（mesh）または区域のポリゴンのファイル'
+                             '（都道府県界など）の区域ごとに切り取り、出力パスの拡張子を除いたディレクトリに'
+                             'タイルと manifest.json を保存する')
+    parser.add_argument('--tile-key', default='N03_001',
+                        help='--tiles に区域のファイルを指定したときの区域IDのカラム名（デフォルト: N03_001）')
+    parser.add_argument('--method', choices=['polygon', 'raster'], default='polygon',
+                        help='polygon: ポリゴンをdissolve、raster: 100mメッシュを配列に並べて結合'
+                             '（土地利用細分メッシュ向け、高速・省メモリ）')
+    parser.add_argument('--schemes', nargs='+', choices=list(CLASSIFICATION_SCHEMES), default=[DEFAULT_SCHEME],
+                        help=f'出力する分類（複数指定すると1回の読み込みでまとめて出力、デフォルト: {DEFAULT_SCHEME}）')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='変換せずに、一部の行だけを処理して所要時間・メモリ・出力サイズを見積もる')
+    parser.add_argument('--sample-rows', type=int, default=2000,
+                        help='ドライランで読み込む行数（デフォルト: 2000）')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f'一度に読み込む行数（デフォルト: {DEFAULT_CHUNK_ROWS}、小さくするとメモリ使用量が減る）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='polygon方式で並列に処理するプロセス数（デフォルト: CPUコア数、1でメインプロセスのみ）')
 
     args = parser.parse_args()
 
-    process_landuse_data(args.input, args.output, args.simplify)
+    schemes = list(dict.fromkeys(args.schemes))
+    tolerances = list(dict.fromkeys(args.simplify))
+    try:
+        budgets = parse_budgets(args.max_size, args.max_vertices)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # 予算を指定した場合は許容度の代わりに予算ごとに出力（ファイル名には予算のラベルを使う）
+    levels = budgets or {tolerance: tolerance for tolerance in tolerances}
+    outputs = {
+        scheme: {
+            level: landuse_output_path(args.output, scheme, label, len(schemes) > 1, len(levels) > 1)
+            for label, level in levels.items()
+        }
+        for scheme in schemes
+    }
+    tiling = None
+    if args.tiles == 'mesh':
+        tiling = mesh_tiles
+    elif args.tiles:
+        regions = load_region_tiles(args.tiles, args.tile_key)
+
+        def tiling(bounds):
+            # 区域は範囲によらずすべてタイルにする（重なる部分がない区域は write_tiles が除く）
+            return regions
+
+    if args.dry_run:
+        estimate_conversion(args.input, list(levels.values()), args.sample_rows, chunk_rows=args.chunk_rows,
+                            schemes=schemes, method=args.method, workers=args.workers, tiling=tiling)
+        return
+
+    try:
+        if args.method == 'raster':
+            convert_landuse_raster(args.input, outputs, args.chunk_rows, tiling)
+        else:
+            convert_landuse(args.input, outputs, args.chunk_rows, args.workers, tiling)
+    except BudgetError as e:
+        sys.exit(f"エラー: {e}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,62 @@
+"""
+ドライラン用の見積もりの共通処理
+
+全体の一部（タイルやShapefileの行）だけを実際に処理して計測し、
+全体に比例させてダウンロード量・処理時間・メモリ・出力サイズを見積もります。
+"""
+
+import unicodedata
+
+import numpy as np
+
+# メモリ見積もりの目安（1頂点あたりのバイト数）
+# GEOS（shapely）のジオメトリは座標2つの倍精度、GeoJSON用のPythonのリスト・タプルは
+# 座標ごとのオブジェクトを含めて約8倍になる
+GEOS_BYTES_PER_VERTEX = 16
+PYTHON_BYTES_PER_VERTEX = 128
+# 共有境界を保った簡略化（coverage_simplify）でノード化した境界線・面・索引を保持する分（統合後の1頂点あたり）
+COVERAGE_BYTES_PER_VERTEX = 448
+
+
+def sample_evenly(items, count):
+    """範囲全体から偏りなく count 件を選ぶ（並び順に等間隔）"""
+    items = list(items)
+    if len(items) <= count:
+        return items
+    indices = np.linspace(0, len(items) - 1, count).round().astype(int)
+    return [items[i] for i in indices]
+
+
+def format_bytes(size):
+    """バイト数を読みやすい単位に変換"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+
+
+def format_duration(seconds):
+    """秒数を「1時間2分」「3分4秒」の形式に変換"""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}時間{seconds % 3600 // 60}分"
+    if seconds >= 60:
+        return f"{seconds // 60}分{seconds % 60}秒"
+    return f"{seconds}秒"
+
+
+def display_width(text):
+    """端末での表示幅（全角文字は2）"""
+    return sum(2 if unicodedata.east_asian_width(c) in ('F', 'W') else 1 for c in text)
+
+
+def print_plan(title, rows):
+    """見積もり結果を表示（rowsは (項目, 内容) のリスト）"""
+    width = max(display_width(label) for label, _ in rows)
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
+    for label, value in rows:
+        print(f"{label}{' ' * (width - display_width(label))}: {value}")
+    print("=" * 60)
+    print("※ サンプルからの比例計算による目安です")
@@ -0,0 +1,104 @@
+"""
+カテゴリ間で境界を共有したままのジオメトリ簡略化
+
+カテゴリごとに統合したポリゴンを別々に簡略化すると、隣り合うカテゴリの共有境界が
+それぞれ違う形になり、すき間や重なり（スライバー）ができます。全カテゴリの境界線を
+一度ノード化してカバレッジ（重なりのない面の集まり）にしてから、共有境界を1回だけ
+簡略化するため、すき間や重なりができず、許容度を変えた複数の簡略化も同じカバレッジから作れます。
+"""
+
+import numpy as np
+import shapely
+
+
+def build_coverage(geometries):
+    """
+    カテゴリごとのジオメトリを、境界線の交点をすべて頂点に持つ面の配列に変換
+
+    隣のカテゴリの頂点が自分の辺の途中にある（T字に接する）と共有境界として扱えないため、
+    全カテゴリの境界線を結合してノード化し、polygonize した面を元のカテゴリに振り分ける
+
+    Args:
+        geometries: {カテゴリ: Polygon / MultiPolygon}（カテゴリどうしは重ならないこと）
+
+    Returns:
+        (faces, keys): 面の配列と、各面のカテゴリの配列
+    """
+    names = list(geometries)
+    parts, index = shapely.get_parts(list(geometries.values()), return_index=True)
+    if len(parts) == 0:
+        return np.empty(0, dtype=object), np.empty(0, dtype=object)
+
+    lines = shapely.union_all(shapely.boundary(parts))
+    faces = shapely.get_parts(shapely.polygonize(shapely.get_parts(lines)))
+
+    # 面はどれか1つの部分に含まれる（穴やカテゴリの外側の面はどれにも含まれない）
+    points = shapely.point_on_surface(faces)
+    face_index, part_index = shapely.STRtree(parts).query(points, predicate='within')
+    keys = np.array(names, dtype=object)[index[part_index]]
+    return faces[face_index], keys
+
+
+def _drop_small_faces(faces, keys, min_area):
+    """
+    min_area 未満の面を除き、除いた面だけでできた穴を周りの面で埋める
+
+    カテゴリがなくならないよう、各カテゴリの最も大きい面は残す。小さい穴の中の面はすべて min_area 未満のため、
+    残す面を含まない穴を埋めても重なりはできない（湖の中の小島のように穴の外にすき間ができる場合は残る）
+
+    Returns:
+        (faces, keys)
+    """
+    areas = shapely.area(faces)
+    kept = areas >= min_area
+    for key in set(keys):
+        index = np.flatnonzero(keys == key)
+        kept[index[areas[index].argmax()]] = True
+    faces, keys = faces[kept], keys[kept]
+
+    # 面ごとの穴（外周に続く環）のうち、小さく、残す面を含まないものを探す
+    rings, owners = shapely.get_rings(faces, return_index=True)
+    interior = np.r_[False, owners[1:] == owners[:-1]]
+    holes, owners = shapely.polygons(rings[interior]), owners[interior]
+    small = shapely.area(holes) < min_area
+    occupied = shapely.STRtree(holes).query(shapely.point_on_surface(faces), predicate='within')[1]
+    small[occupied] = False
+    if not small.any():
+        return faces, keys
+
+    faces = faces.copy()
+    for face in np.unique(owners[small]):
+        remaining = holes[(owners == face) & ~small]
+        faces[face] = shapely.Polygon(shapely.get_exterior_ring(faces[face]),
+                                      [hole.exterior for hole in remaining])
+    return faces, keys
+
+
+def simplify_coverage(faces, keys, tolerance, min_area=0):
+    """
+    build_coverage の面を、共有境界を保ったまま簡略化してカテゴリごとにまとめる
+
+    coverage_simplify は面を消さない（小さな面も三角形として残る）ため、許容度を大きくしても
+    面の数で決まる大きさより小さくはならない。min_area を指定すると、それより小さい面を除いてから簡略化する
+    （_drop_small_faces）
+
+    Args:
+        faces, keys: build_coverage の戻り値
+        tolerance: 簡略化の許容度（0以下なら簡略化しない）
+        min_area: この面積（平方度）未満の面を除く
+
+    Returns:
+        {カテゴリ: MultiPolygon}（カテゴリの昇順。面がなくなったカテゴリは含まない）
+    """
+    if min_area > 0 and len(faces):
+        faces, keys = _drop_small_faces(faces, keys, min_area)
+
+    if tolerance > 0 and len(faces):
+        faces = shapely.coverage_simplify(faces, tolerance)
+        kept = ~shapely.is_empty(faces)
+        faces, keys = faces[kept], keys[kept]
+
+    merged = {}
+    for key in sorted(set(keys)):
+        merged[key] = shapely.multipolygons(shapely.get_parts(faces[keys == key]))
+    return merged
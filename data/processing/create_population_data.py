@@ -7,10 +7,14 @@
 3万人以上の全市区町村を網羅的に含む
 """
 
+import argparse
 import json
 import requests
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+
 # 3万人以上の市区町村データをインポート
 from fetch_city_population import CITY_POPULATION_30K_PLUS
 
@@ -100,41 +104,79 @@ def create_circle_geojson(data_dict, data_type):
     }
 
 
-def create_circle_polygon(center, size_factor, segments=32):
+# 3D表示用の円の基準半径（度）。人口100万人（size_factor 1.0）でこの半径になる
+BASE_RADIUS = 0.05
+
+# コンパクト形式の座標・半径の小数点以下の桁数（1e-5度で約1m）
+COMPACT_DIGITS = 5
+
+
+@lru_cache(maxsize=None)
+def unit_circle(segments=32):
+    """半径1の円の頂点（最初の点を最後に繰り返して閉じた (segments + 1, 2) の配列）"""
+    angles = 2 * np.pi * np.arange(segments) / segments
+    circle = np.column_stack([np.cos(angles), np.sin(angles)])
+    circle = np.vstack([circle, circle[:1]])
+    circle.flags.writeable = False
+    return circle
+
+
+def create_circle_polygons(centers, size_factors, segments=32, correct_latitude=False):
+    """
+    中心座標の配列から円形ポリゴンの外周をまとめて生成（3D表示用ドーム）
+
+    単位円を一度だけ計算し、サイズファクターで拡大して中心に移動する
+
+    Args:
+        centers: [経度, 緯度] の配列
+        size_factors: 人口に応じたサイズファクターの配列
+        segments: 円の分割数
+        correct_latitude: 経度方向の半径を 1/cos(緯度) 倍して、地図上で円に見えるようにする
+
+    Returns:
+        (中心の数, segments + 1, 2) の配列
+    """
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    radii = BASE_RADIUS * np.asarray(size_factors, dtype=float)
+    scale = np.column_stack([radii, radii])
+    if correct_latitude:
+        scale[:, 0] /= np.cos(np.radians(centers[:, 1]))
+    return centers[:, np.newaxis, :] + scale[:, np.newaxis, :] * unit_circle(segments)
+
+
+def population_size_factors(infos):
+    """人口に応じたサイズファクター（平方根を使って面積を調整）"""
+    populations = np.array([info["population"] for info in infos], dtype=float)
+    return (populations / 1000000) ** 0.5  # 100万人で1.0
+
+
+def create_circle_polygon(center, size_factor, segments=32, correct_latitude=False):
     """中心座標から円形ポリゴンを生成（3D表示用ドーム）"""
-    import math
-    lon, lat = center
-    # 人口に応じた半径（度数）
-    radius = 0.05 * size_factor  # 基準サイズ
+    return create_circle_polygons([center], [size_factor], segments, correct_latitude).tolist()
 
-    # 円形の頂点を生成
-    points = []
-    for i in range(segments):
-        angle = 2 * math.pi * i / segments
-        x = lon + radius * math.cos(angle)
-        y = lat + radius * math.sin(angle)
-        points.append([x, y])
 
-    # 最初の点を最後に追加して閉じる
-    points.append(points[0])
+def create_extrusion_geojson(data_dict, data_type, segments=32, correct_latitude=False):
+    """
+    3D表示用のPolygon GeoJSONを生成
 
-    return [points]
+    外周の座標は全ての円をまとめた配列のまま持たせ、リストへの変換は save_geojson で書き出すときに行う
+    """
+    infos = list(data_dict.values())
 
+    # 全ての円を一度に生成する（各フィーチャーの外周は (segments + 1, 2) の配列のビュー）
+    rings = create_circle_polygons(
+        [info["center"] for info in infos], population_size_factors(infos), segments, correct_latitude
+    )
 
-def create_extrusion_geojson(data_dict, data_type):
-    """3D表示用のPolygon GeoJSONを生成"""
     features = []
-
-    for name, info in data_dict.items():
+    for (name, info), ring in zip(data_dict.items(), rings):
         population = info["population"]
-        # 人口に応じたサイズファクター（平方根を使って面積を調整）
-        size_factor = (population / 1000000) ** 0.5  # 100万人で1.0
 
         feature = {
             "type": "Feature",
             "geometry": {
                 "type": "Polygon",
-                "coordinates": create_circle_polygon(info["center"], size_factor)
+                "coordinates": [ring]
             },
             "properties": {
                 "name": name,
@@ -153,38 +195,106 @@ def create_extrusion_geojson(data_dict, data_type):
     }
 
 
+def create_compact_geojson(data_dict, data_type):
+    """
+    3D表示用のコンパクトなPoint GeoJSONを生成
+
+    円のポリゴンの代わりに中心座標と、円の半径（度）・高さだけを持たせる。
+    円柱はクライアント側で radius と height から作る
+    """
+    infos = list(data_dict.values())
+    centers = np.round(np.array([info["center"] for info in infos], dtype=float).reshape(-1, 2),
+                       COMPACT_DIGITS).tolist()
+    radii = np.round(BASE_RADIUS * population_size_factors(infos), COMPACT_DIGITS).tolist()
+
+    features = []
+    for (name, info), center, radius in zip(data_dict.items(), centers, radii):
+        population = info["population"]
+
+        feature = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": center  # [経度, 緯度]
+            },
+            "properties": {
+                "name": name,
+                "population": population,
+                "type": data_type,
+                "prefecture": info.get("prefecture", name if data_type == "prefecture" else None),
+                # 円柱の半径（度）と高さ（メートル単位）
+                "radius": radius,
+                "height": min(population / 100, 150000)  # 最大15万メートル
+            }
+        }
+        features.append(feature)
+
+    return {
+        "type": "FeatureCollection",
+        "features": features
+    }
+
+
+def json_default(value):
+    """json.dump で NumPy の配列（create_extrusion_geojson の座標）をリストとして書き出す"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def save_geojson(geojson, output_path, compact=False):
+    """GeoJSONを保存（compact ならインデント・空白なし）"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        if compact:
+            json.dump(geojson, f, ensure_ascii=False, separators=(',', ':'), default=json_default)
+        else:
+            json.dump(geojson, f, ensure_ascii=False, indent=2, default=json_default)
+
+
 def main():
+    parser = argparse.ArgumentParser(description='人口データのGeoJSONを生成')
+    parser.add_argument('--format', choices=['compact', 'polygon'], default='compact',
+                        help='3D表示用データの形式。compact: 中心座標と半径・高さのみ（デフォルト）、'
+                             'polygon: 円形ポリゴン')
+    parser.add_argument('--segments', type=int, default=32,
+                        help='polygon形式の円の分割数（デフォルト: 32）')
+    parser.add_argument('--correct-latitude', action='store_true',
+                        help='polygon形式で経度方向の半径を緯度に応じて補正し、地図上で円に見えるようにする')
+    args = parser.parse_args()
+
     output_dir = Path(__file__).parent.parent / "geojson"
     output_dir.mkdir(exist_ok=True)
+    compact = args.format == 'compact'
+
+    def create_3d_geojson(data_dict, data_type):
+        if compact:
+            return create_compact_geojson(data_dict, data_type)
+        return create_extrusion_geojson(data_dict, data_type, args.segments, args.correct_latitude)
 
     print("🔄 人口データGeoJSON生成開始...")
 
     # 1. 都道府県の円表示用データ
     prefecture_circle = create_circle_geojson(PREFECTURE_POPULATION, "prefecture")
     output_path = output_dir / "population-prefecture-circle.json"
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(prefecture_circle, f, ensure_ascii=False, indent=2)
+    save_geojson(prefecture_circle, output_path)
     print(f"✓ {output_path.name} - {len(prefecture_circle['features'])}都道府県")
 
     # 2. 都道府県の3D表示用データ
-    prefecture_extrusion = create_extrusion_geojson(PREFECTURE_POPULATION, "prefecture")
+    prefecture_extrusion = create_3d_geojson(PREFECTURE_POPULATION, "prefecture")
     output_path = output_dir / "population-prefecture-3d.json"
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(prefecture_extrusion, f, ensure_ascii=False, indent=2)
+    save_geojson(prefecture_extrusion, output_path, compact)
     print(f"✓ {output_path.name} - {len(prefecture_extrusion['features'])}都道府県")
 
     # 3. 市区町村の円表示用データ
     city_circle = create_circle_geojson(CITY_POPULATION, "city")
     output_path = output_dir / "population-city-circle.json"
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(city_circle, f, ensure_ascii=False, indent=2)
+    save_geojson(city_circle, output_path)
     print(f"✓ {output_path.name} - {len(city_circle['features'])}市区町村")
 
     # 4. 市区町村の3D表示用データ
-    city_extrusion = create_extrusion_geojson(CITY_POPULATION, "city")
+    city_extrusion = create_3d_geojson(CITY_POPULATION, "city")
     output_path = output_dir / "population-city-3d.json"
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(city_extrusion, f, ensure_ascii=False, indent=2)
+    save_geojson(city_extrusion, output_path, compact)
     print(f"✓ {output_path.name} - {len(city_extrusion['features'])}市区町村")
 
     print("\n🎉 人口データGeoJSON生成完了！")
@@ -8,7 +8,13 @@ from pathlib import Path
 import zipfile
 import geopandas as gpd
 import json
+import argparse
+import shapely
 from shapely.geometry import mapping, box
+from size_budget import parse_budgets, measure_output, search_tolerance, report_budget
+
+# Natural Earth データURL（1:10m Land、land_mask.py の陸地データと同じ）
+NATURAL_EARTH_URL = "https://naturalearth.s3.amazonaws.com/10m_physical/ne_10m_land.zip"
 
 # Natural Earth データURL（1:50m Urban Areas）
 URBAN_URL = "https://naturalearth.s3.amazonaws.com/50m_cultural/ne_50m_urban_areas.zip"
@@ -64,9 +70,16 @@ def download_natural_earth(output_dir='../raw'):
 
     return shapefiles[0] if shapefiles else None
 
-def process_natural_earth_for_japan(input_shapefile, output_geojson):
+def process_natural_earth_for_japan(input_shapefile, output_geojson, simplify_tolerance=0.01, budget=None):
     """
     Natural Earthデータから日本周辺のデータを抽出してGeoJSONに変換
+
+    Args:
+        input_shapefile: 入力Shapefileのパス
+        output_geojson: 出力GeoJSONのパス
+        simplify_tolerance: ジオメトリ簡略化の許容度（度単位）
+        budget: 許容度の代わりに指定する予算（('bytes' / 'vertices', 上限)）。
+                切り取り済みのジオメトリから簡略化を繰り返し、予算に収まる最小の許容度を探す
     """
     print(f"\nShapefileを読み込み中: {input_shapefile}")
     gdf = gpd.read_file(input_shapefile)
@@ -90,40 +103,69 @@ def process_natural_earth_for_japan(input_shapefile, output_geojson):
     gdf_japan['geometry'] = gdf_japan['geometry'].intersection(japan_box)
 
     # 簡略化
-    print("ジオメトリを簡略化中...")
-    gdf_japan['geometry'] = gdf_japan['geometry'].simplify(0.01, preserve_topology=True)
+    geometries = gdf_japan.geometry.values
+    if budget is None:
+        print(f"ジオメトリを簡略化中（許容度: {simplify_tolerance}）...")
+        simplified = shapely.simplify(geometries, simplify_tolerance, preserve_topology=True)
+    else:
+        print("予算に収まる許容度を探索中...")
+        simplify_tolerance, simplified, value = search_tolerance(
+            lambda tolerance: shapely.simplify(geometries, tolerance, preserve_topology=True),
+            lambda simplified: measure_output(budget[0], simplified, lambda: land_feature_collection(simplified)),
+            budget[1]
+        )
+        report_budget(budget, simplify_tolerance, value)
+
+    geojson = land_feature_collection(simplified)
 
-    # typeカラムを追加（Natural Earthは陸地のみなので'grassland'とする）
-    gdf_japan['type'] = 'grassland'
+    # 保存
+    print(f"GeoJSONを保存中: {output_geojson}")
+    with open(output_geojson, 'w', encoding='utf-8') as f:
+        json.dump(geojson, f, ensure_ascii=False, indent=2)
+
+    file_size = Path(output_geojson).stat().st_size
+    print(f"完了！ファイルサイズ: {file_size / 1024:.2f} KB")
 
-    # GeoJSON作成
+def land_feature_collection(geometries):
+    """陸地のジオメトリの配列から保存するGeoJSONの辞書を作る（Natural Earthは陸地のみなので'grassland'とする）"""
     features = []
-    for idx, row in gdf_japan.iterrows():
-        if row['geometry'] and not row['geometry'].is_empty:
+    for geometry in geometries:
+        if geometry is not None and not geometry.is_empty:
             feature = {
                 "type": "Feature",
                 "properties": {
                     "type": "grassland",
                     "name": "陸地"
                 },
-                "geometry": mapping(row['geometry'])
+                "geometry": mapping(geometry)
             }
             features.append(feature)
 
-    geojson = {
+    return {
         "type": "FeatureCollection",
         "features": features
     }
 
-    # 保存
-    print(f"GeoJSONを保存中: {output_geojson}")
-    with open(output_geojson, 'w', encoding='utf-8') as f:
-        json.dump(geojson, f, ensure_ascii=False, indent=2)
+def main():
+    parser = argparse.ArgumentParser(description='Natural Earthの陸地データをダウンロードして日本周辺のGeoJSONに変換')
+    parser.add_argument('--output', default='../geojson/natural-earth-landcover.json',
+                        help='出力GeoJSONのパス（デフォルト: ../geojson/natural-earth-landcover.json）')
+    parser.add_argument('--simplify', type=float, default=0.01,
+                        help='ジオメトリ簡略化の許容度（デフォルト: 0.01）')
+    budget_group = parser.add_mutually_exclusive_group()
+    budget_group.add_argument('--max-size', metavar='SIZE',
+                              help='許容度の代わりに出力サイズの上限（"500KB" など）を指定し、収まる最小の許容度を探す')
+    budget_group.add_argument('--max-vertices', type=int, metavar='COUNT',
+                              help='許容度の代わりに出力の頂点数の上限を指定し、収まる最小の許容度を探す')
+    args = parser.parse_args()
 
-    file_size = Path(output_geojson).stat().st_size
-    print(f"完了！ファイルサイズ: {file_size / 1024:.2f} KB")
+    try:
+        budgets = parse_budgets([args.max_size] if args.max_size else None,
+                                [args.max_vertices] if args.max_vertices else None)
+    except ValueError as e:
+        parser.error(str(e))
+    budget = next(iter(budgets.values()), None)
 
-def main():
     print("=" * 60)
     print("Natural Earth 土地被覆データ処理")
     print("=" * 60)
@@ -134,10 +176,10 @@ def main():
 
         if shapefile:
             # 変換
-            output_geojson = Path('../geojson/natural-earth-landcover.json')
+            output_geojson = Path(args.output)
             output_geojson.parent.mkdir(exist_ok=True)
 
-            process_natural_earth_for_japan(shapefile, output_geojson)
+            process_natural_earth_for_japan(shapefile, output_geojson, args.simplify, budget)
 
             print("\n" + "=" * 60)
             print("処理完了！")
@@ -5,12 +5,27 @@
 
 import requests
 import json
-import mapbox_vector_tile
 from pathlib import Path
 from shapely.geometry import shape, mapping, MultiPolygon
-from shapely.ops import unary_union
+import shapely
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+from tile_cache import TileCache, DecodedTileCache
+from tile_merge import (QuadtreeUnion, quadtree_order, clip_geometries, dedupe_geometries, FeatureStitcher,
+                        union_geometries)
+from land_mask import load_land_mask, prune_tiles
+from tile_checkpoint import ExtractionCheckpoint
+from tile_sources import open_tile_source
+from tile_decoder import decode_tile
+from tile_scheduler import AdaptiveConcurrency, RETRY_STATUS, EMPTY_TILE_STATUS
+from cost_estimate import (sample_evenly, format_bytes, format_duration, print_plan,
+                           GEOS_BYTES_PER_VERTEX, PYTHON_BYTES_PER_VERTEX)
 import argparse
 import math
+import os
+import time
+import numpy as np
 
 def deg2num(lat_deg, lon_deg, zoom):
     """緯度経度からタイル座標を計算"""
@@ -28,226 +43,1122 @@ def num2deg(xtile, ytile, zoom):
     lat_deg = math.degrees(lat_rad)
     return lat_deg, lon_deg
 
-def fetch_vector_tile(z, x, y, url_template="https://tile.openstreetmap.jp/data/planet/{z}/{x}/{y}.pbf"):
-    """ベクタータイルをダウンロード"""
+def tile_range(bbox, zoom):
+    """バウンディングボックスを覆うタイル座標 (x, y) のリストを返す（x, yの昇順）"""
+    min_lon, min_lat, max_lon, max_lat = bbox
+
+    x_min, y_min = deg2num(max_lat, min_lon, zoom)  # 北西（左上）
+    x_max, y_max = deg2num(min_lat, max_lon, zoom)  # 南東（右下）
+
+    return [(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+
+def create_tile_session(pool_size=8):
+    """
+    タイル取得用のHTTPセッションを作成
+
+    Keep-Aliveで接続を再利用するため、ワーカー数分のコネクションをプールする
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def fetch_vector_tile(z, x, y, url_template="https://tile.openstreetmap.jp/data/planet/{z}/{x}/{y}.pbf",
+                      session=None, cache=None, controller=None):
+    """
+    ベクタータイルをダウンロード
+
+    cacheを指定した場合は有効期間内のキャッシュをそのまま使い、
+    期限切れならETag / Last-Modifiedで再検証する。
+    controller（AdaptiveConcurrency）を指定した場合は同時リクエスト数の制御に従い、
+    429 / 5xx / タイムアウトはバックオフしながら再試行する。
+    404 / 204（存在しないタイル）は空のタイル b'' を返す
+    """
     url = url_template.format(z=z, x=x, y=y)
+
+    cached = cache.get(url_template, z, x, y) if cache else None
+    headers = {}
+    if cached is not None:
+        cached_data, meta = cached
+        if cache.offline or cache.is_fresh(meta):
+            cache.record('hit')
+            return cached_data
+        headers = cache.revalidation_headers(meta)
+    elif cache is not None and cache.offline:
+        cache.record('miss')
+        print(f"キャッシュなし（オフライン）: {url}")
+        return None
+
     print(f"タイルをダウンロード中: {url}")
 
+    # 429 / 5xx / 接続エラー / タイムアウトは controller の指定があれば待ってから再試行する
+    response = None
+    error = None
+    attempts = controller.max_retries + 1 if controller else 1
+    for attempt in range(attempts):
+        started = controller.acquire() if controller else None
+        retry_after = None
+        try:
+            response = (session or requests).get(url, headers=headers, timeout=10)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if controller:
+                controller.release(started, throttled=True)
+            response, error = None, e
+        except Exception as e:
+            if controller:
+                controller.release(started)
+            response, error = None, e
+            break
+        else:
+            retriable = response.status_code in RETRY_STATUS
+            if controller:
+                controller.release(started, time.monotonic() - started, retriable)
+            if not retriable:
+                break
+            retry_after = response.headers.get('Retry-After')
+            error = f"{response.status_code} {response.reason}"
+            response = None
+
+        if attempt + 1 < attempts:
+            wait = controller.backoff(attempt, retry_after)
+            print(f"再試行 {attempt + 1}/{attempts - 1}（{wait:.1f}秒後）: {url} - {error}")
+            time.sleep(wait)
+
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.content
+        if response is None:
+            raise requests.RequestException(error)
+        if cached is not None and response.status_code == 304:
+            cache.refresh(url_template, z, x, y)
+            cache.record('revalidated')
+            return cached_data
+        if response.status_code in EMPTY_TILE_STATUS:
+            # 存在しないタイルは失敗ではなく空のタイル（MBTiles / PMTilesと同じ）としてキャッシュする
+            tile_data = b''
+        else:
+            response.raise_for_status()
+            tile_data = response.content
+        if cache is not None:
+            cache.put(url_template, z, x, y, tile_data,
+                      response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            cache.record('downloaded')
+        return tile_data
     except Exception as e:
         print(f"エラー: {url} - {e}")
+        if cached is not None:
+            # 再検証に失敗しても古いキャッシュがあればそれを使う
+            print(f"期限切れのキャッシュを使用: {url}")
+            return cached_data
         return None
 
-def tile_to_geojson(tile_data, x, y, z, layer_name="landuse", filters=None):
-    """ベクタータイルデータをGeoJSONに変換"""
-    if not tile_data:
-        return []
+def fetch_tiles(tiles, zoom, url_template="https://tile.openstreetmap.jp/data/planet/{z}/{x}/{y}.pbf",
+                workers=8, session=None, cache=None, source=None, controller=None):
+    """
+    複数のタイルを並列にダウンロードし、要求順に (x, y, tile_data) を返すジェネレータ
+
+    同時に保持する未処理タイルはスレッド数の2倍までに制限する
+
+    Args:
+        tiles: (x, y) のイテラブル
+        zoom: ズームレベル
+        url_template: ベクタータイルのURLテンプレート
+        workers: 同時ダウンロード数（1以下なら逐次取得）
+        session: 共有するrequests.Session（省略時は作成）
+        cache: TileCache（省略時はキャッシュしない）
+        source: ローカルアーカイブ（open_tile_sourceの戻り値、指定時はHTTPを使わない）
+        controller: AdaptiveConcurrency（指定時はスレッドを controller.maximum 本用意し、
+                    実際の同時リクエスト数は controller が調整する）
+    """
+    if source is not None:
+        yield from source.read_tiles(zoom, tiles)
+        return
+
+    threads = max(workers, controller.maximum) if controller and workers > 1 else workers
+
+    own_session = session is None
+    if own_session:
+        session = create_tile_session(max(threads, 1))
 
     try:
-        # PBFをデコード
-        decoded = mapbox_vector_tile.decode(tile_data)
+        if threads <= 1:
+            for x, y in tiles:
+                yield x, y, fetch_vector_tile(zoom, x, y, url_template, session, cache, controller)
+            return
 
-        if layer_name not in decoded:
-            return []
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            pending = deque()
+            for x, y in tiles:
+                future = executor.submit(fetch_vector_tile, zoom, x, y, url_template, session, cache, controller)
+                pending.append((x, y, future))
 
-        layer = decoded[layer_name]
-        features = []
+                if len(pending) >= threads * 2:
+                    px, py, done = pending.popleft()
+                    yield px, py, done.result()
 
-        # タイルの境界を計算
-        # num2deg returns (lat, lon)
-        lat_nw, lon_nw = num2deg(x, y, z)      # 左上（北西）
-        lat_se, lon_se = num2deg(x + 1, y + 1, z)  # 右下（南東）
-
-        lon_min, lon_max = lon_nw, lon_se
-        lat_min, lat_max = lat_se, lat_nw
-        extent = 4096  # ベクタータイルの座標系のサイズ
-
-
-        for feature in layer.get('features', []):
-            props = feature.get('properties', {})
-
-            # フィルタリング
-            if filters:
-                class_val = props.get('class', '')
-                if class_val not in filters:
-                    continue
-
-            geom = feature.get('geometry', {})
-            geom_type = geom.get('type', '')
-            coords = geom.get('coordinates', [])
-
-            # タイル座標を緯度経度に変換
-            def transform_coords(coord_list, depth=0):
-                if depth == 0 and geom_type == 'MultiPolygon':
-                    # MultiPolygon: list of polygons
-                    return [transform_coords(polygon, depth + 1) for polygon in coord_list]
-                elif depth == 1 and geom_type == 'MultiPolygon':
-                    # Each polygon: list of rings
-                    return [transform_coords(ring, depth + 1) for ring in coord_list]
-                elif depth == 0 and geom_type == 'Polygon':
-                    # Polygon: list of rings
-                    return [transform_coords(ring, depth + 1) for ring in coord_list]
-                elif depth >= 1 or geom_type == 'LineString':
-                    # Ring or LineString: list of coordinates
-                    result = []
-                    for coord in coord_list:
-                        x_local, y_local = coord[0], coord[1]
-                        lon = lon_min + (lon_max - lon_min) * x_local / extent
-                        # y座標補正: 実測データとの照合により+45.4ピクセル補正が必要
-                        lat = lat_min + (lat_max - lat_min) * (y_local + 45.4) / extent
-                        result.append([lon, lat])
-                    return result
-                return coord_list
-
-            transformed_coords = transform_coords(coords)
-
-            geojson_feature = {
-                "type": "Feature",
-                "properties": props,
-                "geometry": {
-                    "type": geom_type,
-                    "coordinates": transformed_coords
-                }
+            while pending:
+                px, py, done = pending.popleft()
+                yield px, py, done.result()
+    finally:
+        if own_session:
+            session.close()
+
+def track_failures(tile_stream, failed):
+    """ダウンロードに失敗したタイル（tile_dataがNone）をfailedに記録しながら中継する"""
+    for x, y, tile_data in tile_stream:
+        if tile_data is None:
+            failed.add((x, y))
+        yield x, y, tile_data
+
+# ジオメトリタイプごとの入れ子の深さ（座標列を1リングとして数える）
+# 0: 座標1点, 1: 座標列1本, 2: 座標列のリスト, 3: 座標列のリストのリスト
+GEOMETRY_DEPTH = {
+    'Point': 0,
+    'MultiPoint': 1,
+    'LineString': 1,
+    'MultiLineString': 2,
+    'Polygon': 2,
+    'MultiPolygon': 3,
+}
+
+def unflatten_geometry(geom_type, layout, coords, ring_offsets, ring_index):
+    """
+    座標配列とオフセット（tile_decoderの配列形式）から1つのジオメトリの座標を復元
+
+    Args:
+        coords: 変換済み座標のリスト（ndarray.tolist()の結果）
+        ring_index: このジオメトリの最初の座標列の番号
+
+    Returns:
+        (coordinates, 次のジオメトリの座標列番号)
+    """
+    def ring(i):
+        return coords[ring_offsets[i]:ring_offsets[i + 1]]
+
+    depth = GEOMETRY_DEPTH.get(geom_type)
+    if depth == 0:
+        return ring(ring_index)[0], ring_index + 1
+    if depth == 1:
+        return ring(ring_index), ring_index + 1
+    if depth == 2:
+        return [ring(i) for i in range(ring_index, ring_index + layout)], ring_index + layout
+    if depth == 3:
+        polygons = []
+        for n_rings in layout:
+            polygons.append([ring(i) for i in range(ring_index, ring_index + n_rings)])
+            ring_index += n_rings
+        return polygons, ring_index
+    return [], ring_index
+
+# タイル内のy座標の補正量（ピクセル）
+Y_OFFSET_PIXELS = 45.4
+
+def transform_tile_coords(points, x, y, z, extent=4096):
+    """
+    タイル内座標の配列を経度・緯度の配列に一括変換
+
+    Args:
+        points: タイル内座標の (N, 2) 配列
+        x, y, z: タイル座標
+        extent: ベクタータイルの座標系のサイズ
+
+    Returns:
+        [経度, 緯度] の (N, 2) 配列
+    """
+    # タイルの境界を計算
+    # num2deg returns (lat, lon)
+    lat_nw, lon_nw = num2deg(x, y, z)      # 左上（北西）
+    lat_se, lon_se = num2deg(x + 1, y + 1, z)  # 右下（南東）
+
+    lon_min, lon_max = lon_nw, lon_se
+    lat_min, lat_max = lat_se, lat_nw
+
+    lonlat = np.empty_like(points)
+    lonlat[:, 0] = lon_min + (lon_max - lon_min) * points[:, 0] / extent
+    # y座標補正: 実測データとの照合により+45.4ピクセル補正が必要
+    lonlat[:, 1] = lat_min + (lat_max - lat_min) * (points[:, 1] + Y_OFFSET_PIXELS) / extent
+    return lonlat
+
+def tile_clip_bounds(x, y, z, extent=4096):
+    """
+    タイルの切り取り範囲 (min_lon, min_lat, max_lon, max_lat)
+
+    transform_tile_coordsで変換したタイルの上端（y補正込み）を行ごとの境界とし、
+    南隣のタイルの上端までを範囲とする。隣接タイル同士の範囲は隙間なく接する
+    """
+    def top(row):
+        lat_top, _ = num2deg(x, row, z)
+        lat_bottom, _ = num2deg(x, row + 1, z)
+        return lat_top + (lat_top - lat_bottom) * Y_OFFSET_PIXELS / extent
+
+    _, lon_min = num2deg(x, y, z)
+    _, lon_max = num2deg(x + 1, y, z)
+    return lon_min, top(y + 1), lon_max, top(y)
+
+# 抽出できるプロダクト（レイヤーとclassの組み合わせ）
+# classes が None ならレイヤー内の全フィーチャー、merge が True ならポリゴンを1つに結合する
+# needs_sea が True なら海域のみのタイルにもフィーチャーがあるため、陸地マスクでタイルを除外しない
+PRODUCTS = {
+    'urban': {'layer': 'landuse', 'classes': ['residential', 'commercial', 'industrial'], 'merge': True},
+    'water': {'layer': 'water', 'classes': ['lake', 'river', 'ocean'], 'merge': True, 'needs_sea': True},
+    'forest': {'layer': 'landcover', 'classes': ['wood'], 'merge': True},
+    'grassland': {'layer': 'landcover', 'classes': ['grass', 'farmland', 'wetland'], 'merge': True},
+    'railway': {'layer': 'transportation', 'classes': ['rail', 'transit'], 'merge': False},
+    'road': {'layer': 'transportation', 'classes': ['motorway', 'trunk', 'primary'], 'merge': False},
+}
+
+def to_lonlat_arrays(arrays, x, y, z):
+    """
+    tile_decoderでデコードしたタイル内座標の配列を緯度経度に変換
+
+    レイヤー内の全頂点を1つの配列として一括変換し、リング構造はオフセット配列で保持する
+
+    Returns:
+        {'properties', 'ids', 'types', 'layouts', 'coords', 'ring_offsets'} の辞書
+        （該当フィーチャーがなければ None）
+    """
+    if arrays is None:
+        return None
+
+    return {
+        'properties': arrays['properties'],
+        'ids': arrays['ids'],
+        'types': arrays['types'],
+        'layouts': arrays['layouts'],
+        'coords': transform_tile_coords(arrays['coords'], x, y, z, arrays['extent']),
+        'ring_offsets': arrays['ring_offsets'],
+    }
+
+def tile_to_arrays(tile_data, x, y, z, layer_name="landuse", filters=None):
+    """ベクタータイルの1レイヤーを緯度経度の配列形式に変換（to_lonlat_arraysを参照）"""
+    if not tile_data:
+        return None
+
+    # 必要なレイヤーだけをデコード
+    decoded = decode_tile(tile_data, {layer_name: (layer_name, filters)})
+    return to_lonlat_arrays(decoded[layer_name], x, y, z)
+
+def tile_to_products(tile_data, x, y, z, products):
+    """
+    1回のデコードで複数プロダクトのフィーチャーを取り出す
+
+    必要なレイヤーだけをデコードし、classの絞り込みはジオメトリのデコード前に行う
+
+    Args:
+        products: {プロダクト名: PRODUCTSと同じ形式の定義}
+
+    Returns:
+        {プロダクト名: tile_to_arraysと同じ配列形式（該当なしは None）}
+    """
+    if not tile_data:
+        return {name: None for name in products}
+
+    decoded = decode_tile(
+        tile_data, {name: (spec['layer'], spec['classes']) for name, spec in products.items()}
+    )
+    return {name: to_lonlat_arrays(arrays, x, y, z) for name, arrays in decoded.items()}
+
+def arrays_to_features(arrays):
+    """tile_to_arraysの結果をGeoJSONフィーチャーのリストに変換"""
+    if arrays is None:
+        return []
+
+    coords = arrays['coords'].tolist()
+    ring_offsets = arrays['ring_offsets'].tolist()
+
+    features = []
+    ring_index = 0
+    for props, geom_type, layout in zip(arrays['properties'], arrays['types'], arrays['layouts']):
+        transformed_coords, ring_index = unflatten_geometry(
+            geom_type, layout, coords, ring_offsets, ring_index
+        )
+
+        features.append({
+            "type": "Feature",
+            "properties": props,
+            "geometry": {
+                "type": geom_type,
+                "coordinates": transformed_coords
             }
+        })
 
-            features.append(geojson_feature)
+    return features
 
-        return features
+def arrays_to_shapes(arrays):
+    """
+    tile_to_arraysの結果をshapelyジオメトリのリストに変換
 
+    ポリゴンは座標配列とオフセットから一括生成し、座標ごとのPythonオブジェクトを作らない
+    """
+    if arrays is None:
+        return []
+
+    if not all(t in ('Polygon', 'MultiPolygon') for t in arrays['types']):
+        return [shape(f['geometry']) for f in arrays_to_features(arrays)]
+
+    # リング → ポリゴン → フィーチャーの対応を作る
+    polygon_sizes = []
+    feature_sizes = []
+    for geom_type, layout in zip(arrays['types'], arrays['layouts']):
+        if geom_type == 'Polygon':
+            polygon_sizes.append(layout)
+            feature_sizes.append(1)
+        else:
+            polygon_sizes.extend(layout)
+            feature_sizes.append(len(layout))
+
+    ring_offsets = arrays['ring_offsets']
+    ring_ids = np.repeat(np.arange(len(ring_offsets) - 1), np.diff(ring_offsets))
+    polygon_ids = np.repeat(np.arange(len(polygon_sizes)), polygon_sizes)
+
+    try:
+        rings = shapely.linearrings(arrays['coords'], indices=ring_ids)
+        polygons = shapely.polygons(rings, indices=polygon_ids)
+    except Exception:
+        # 頂点数不足などの不正なリングがある場合はフィーチャーごとに変換
+        return [shape(f['geometry']) for f in arrays_to_features(arrays)]
+
+    shapes = []
+    start = 0
+    for geom_type, n_polygons in zip(arrays['types'], feature_sizes):
+        parts = polygons[start:start + n_polygons]
+        start += n_polygons
+        shapes.append(parts[0] if geom_type == 'Polygon' else MultiPolygon(list(parts)))
+
+    return shapes
+
+def tile_to_geojson(tile_data, x, y, z, layer_name="landuse", filters=None):
+    """ベクタータイルデータをGeoJSONに変換"""
+    try:
+        return arrays_to_features(tile_to_arrays(tile_data, x, y, z, layer_name, filters))
     except Exception as e:
         print(f"タイル変換エラー (x={x}, y={y}, z={z}): {e}")
         return []
 
-def extract_urban_areas(
+def _decode_tile_task(task):
+    """プロセスプールで実行するデコード処理（デコード・フィルタ・座標変換）"""
+    tile_data, x, y, z, products = task
+    try:
+        return tile_to_products(tile_data, x, y, z, products)
+    except Exception as e:
+        print(f"タイル変換エラー (x={x}, y={y}, z={z}): {e}")
+        return {name: None for name in products}
+
+def decode_tiles(tile_stream, zoom, products, processes=0):
+    """
+    ダウンロードされたタイルを順次デコードし、要求順に (x, y, product_arrays) を返すジェネレータ
+
+    processesが2以上ならプロセスプールでデコードする。デコード待ちの間も
+    tile_streamの取得側（fetch_tiles）はダウンロードを続けるため、通信とCPU処理が重なる。
+    結果は tile_to_products の配列形式で親プロセスに戻る。
+
+    Args:
+        tile_stream: (x, y, tile_data) のイテラブル（fetch_tilesの戻り値）
+        zoom: ズームレベル
+        products: {プロダクト名: PRODUCTSと同じ形式の定義}
+        processes: デコードに使うプロセス数（1以下なら現在のプロセスでデコード）
+    """
+    empty = {name: None for name in products}
+
+    if processes <= 1:
+        for x, y, tile_data in tile_stream:
+            yield x, y, _decode_tile_task((tile_data, x, y, zoom, products))
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = deque()
+        for x, y, tile_data in tile_stream:
+            future = None
+            if tile_data:
+                future = pool.submit(_decode_tile_task, (tile_data, x, y, zoom, products))
+            pending.append((x, y, future))
+
+            while len(pending) >= processes * 4:
+                px, py, done = pending.popleft()
+                yield px, py, done.result() if done else empty
+
+        while pending:
+            px, py, done = pending.popleft()
+            yield px, py, done.result() if done else empty
+
+def save_geojson(features, output_path):
+    """フィーチャーのリストをGeoJSONファイルとして保存"""
+    geojson = {
+        "type": "FeatureCollection",
+        "features": features
+    }
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"GeoJSONを保存中: {output_path}")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(geojson, f, ensure_ascii=False)
+
+    file_size = output_path.stat().st_size
+    print(f"完了！ファイルサイズ: {file_size / 1024 / 1024:.2f} MB")
+
+    return output_path
+
+def generalize_for_zoom(geometry, zoom, min_area_pixels=1.0):
+    """
+    結合済みの都市域を指定ズームレベル向けに汎化
+
+    そのズームの1ピクセル（256pxタイル換算）を許容度として簡略化し、
+    min_area_pixels ピクセルに満たない小さなポリゴンを除外する
+
+    Returns:
+        MultiPolygon（残るポリゴンがなければ None）
+    """
+    tolerance = 360.0 / (2 ** zoom * 256)
+    simplified = shapely.simplify(geometry, tolerance, preserve_topology=True)
+
+    parts = getattr(simplified, 'geoms', [simplified])
+    min_area = min_area_pixels * tolerance ** 2
+    polygons = [p for p in parts if p.geom_type == 'Polygon' and p.area >= min_area]
+    if not polygons:
+        return None
+    return MultiPolygon(polygons)
+
+def write_pyramid(merged, zoom, pyramid, product='urban'):
+    """
+    最も細かいズームで結合した結果から、粗いズームレベルのファイルを派生させて保存
+
+    細かいレベルから順に、直前のレベルの結果をさらに汎化する
+
+    Args:
+        merged: 結合済みのジオメトリ
+        zoom: 取得したタイルのズームレベル
+        pyramid: {ズームレベル: 出力パス}
+        product: プロダクト名（propertiesのtypeに使用）
+
+    Returns:
+        保存したパスのリスト
+    """
+    written = []
+    geometry = merged
+    for level in sorted(pyramid, reverse=True):
+        if level > zoom:
+            print(f"警告: ズーム {level} は取得ズーム {zoom} より細かいためスキップします")
+            continue
+
+        if level < zoom:
+            print(f"ズーム {level} 向けに汎化中...")
+            geometry = generalize_for_zoom(geometry, level)
+
+        features = []
+        if geometry is not None:
+            features.append({
+                "type": "Feature",
+                "properties": {
+                    "type": product,
+                    "source": f"OpenStreetMap zoom {level}" if level == zoom
+                              else f"OpenStreetMap zoom {level} (generalized from zoom {zoom})"
+                },
+                "geometry": mapping(geometry)
+            })
+        written.append(save_geojson(features, pyramid[level]))
+
+    return written
+
+def product_land_mask(products, land_mask):
+    """
+    プロダクトに使う陸地マスク
+
+    海域のみのタイルが必要なプロダクト（PRODUCTS の needs_sea）を含む場合は、陸地マスクを使わない
+    （None を返す）
+    """
+    sea_products = [name for name, spec in products.items() if spec.get('needs_sea')]
+    if land_mask is not None and sea_products:
+        print(f"{', '.join(sea_products)} は海域のタイルも必要なため、陸地マスクでタイルを除外しません")
+        return None
+    return land_mask
+
+def extract_products(
     bbox,  # [min_lon, min_lat, max_lon, max_lat]
-    zoom=7,
-    output_path='../geojson/urban-areas.json',
+    zoom,
+    outputs,
     url_template="https://tile.openstreetmap.jp/data/planet/{z}/{x}/{y}.pbf",
-    merge=True
+    merge=True,
+    workers=8,
+    cache=None,
+    decode_workers=0,
+    land_mask=None,
+    checkpoint_dir=None,
+    resume=False,
+    pyramid=None,
+    decoded_cache=None,
+    max_workers=None,
+    retries=5,
+    dedupe=True
 ):
     """
-    指定された範囲と解像度でベクタータイルから都市域を抽出
+    指定された範囲と解像度でベクタータイルから複数のプロダクトを同時に抽出
+
+    各タイルのダウンロードとデコードは1回だけ行い、レイヤーとclassの定義（PRODUCTS）に
+    従ってフィーチャーを各プロダクトに振り分ける
 
     Args:
         bbox: [min_lon, min_lat, max_lon, max_lat] 日本全体なら [122, 24, 154, 46]
         zoom: タイルのズームレベル（7-9推奨）
-        output_path: 出力GeoJSONファイル
-        url_template: ベクタータイルのURLテンプレート
-        merge: 同じクラスのポリゴンを結合するか
+        outputs: {プロダクト名: 出力GeoJSONファイル}（プロダクト名はPRODUCTSのキー）
+        url_template: ベクタータイルのURLテンプレート、またはMBTiles / PMTilesファイルのパス
+        merge: 結合対象のプロダクト（PRODUCTSのmergeがTrue）のポリゴンを結合するか
+        workers: 同時ダウンロード数の初期値（1なら逐次取得）
+        cache: TileCache（省略時は毎回ダウンロード）
+        decode_workers: デコードに使うプロセス数（1以下ならメインプロセスでデコード）
+        land_mask: 陸地ジオメトリ（指定すると陸地と重ならないタイルを取得しない。
+                   needs_sea のプロダクトを含む場合は使わない）
+        checkpoint_dir: チェックポイントの保存先（指定すると完了タイルごとに結果を保存）
+        resume: チェックポイントから再開するか
+        pyramid: {ズームレベル: 出力パス}（プロダクトが1つで結合する場合のみ。結合結果から各ズーム用のファイルも保存）
+        decoded_cache: DecodedTileCache（保存済みのタイルはダウンロードもデコードもしない）
+        max_workers: 同時ダウンロード数の上限（省略時は workers。429 / 5xx や応答時間の悪化に応じて
+                     1 から上限の間で自動調整する）
+        retries: 429 / 5xx / タイムアウト時の1タイルあたりの再試行回数
+        dedupe: 各フィーチャーをタイルの範囲で切り取り、重複を除いてから結合するか
+                （結合しないプロダクトはタイルごとの断片をフィーチャーIDでつなぎ直す）
+
+    Returns:
+        {プロダクト名: 保存したパス}
     """
-    min_lon, min_lat, max_lon, max_lat = bbox
+    products = {name: PRODUCTS[name] for name in outputs}
 
     # タイル範囲を計算
-    x_min, y_min = deg2num(max_lat, min_lon, zoom)  # 北西（左上）
-    x_max, y_max = deg2num(min_lat, max_lon, zoom)  # 南東（右下）
+    tiles = tile_range(bbox, zoom)
+    x_min, y_min = tiles[0]
+    x_max, y_max = tiles[-1]
 
     print(f"ズームレベル {zoom} でタイル範囲: x={x_min}-{x_max}, y={y_min}-{y_max}")
-    print(f"合計タイル数: {(x_max - x_min + 1) * (y_max - y_min + 1)}")
+    print(f"合計タイル数: {len(tiles)}")
+    print(f"プロダクト: {', '.join(products)}")
+
+    # 海域のみのタイルを除外
+    land_mask = product_land_mask(products, land_mask)
+    if land_mask is not None:
+        total = len(tiles)
+        tiles, pruned = prune_tiles(tiles, zoom, land_mask)
+        print(f"陸地マスクで除外: {pruned} タイル（{pruned / total * 100:.1f}%）、取得対象: {len(tiles)} タイル")
+    print(f"同時ダウンロード数: {workers}")
+    print(f"デコードプロセス数: {max(decode_workers, 1)}")
+
+    all_features = {name: [] for name in products}
+    feature_count = 0
+
+    # チェックポイント（完了済みタイルは保存結果を使い、ダウンロードしない）
+    checkpoint = None
+    if checkpoint_dir:
+        params = {
+            'bbox': list(bbox), 'zoom': zoom, 'url_template': url_template,
+            'products': products, 'merge': merge,
+        }
+        checkpoint = ExtractionCheckpoint(checkpoint_dir, params, tiles, resume)
+        if checkpoint.completed:
+            print(f"チェックポイントから再開: {len(checkpoint.completed)} / {len(tiles)} タイル完了済み")
+
+    # 結合する場合はタイルごとに結合し、四分木に沿って隣接タイルと結合していく
+    mergers = {}
+    if merge:
+        mergers = {name: QuadtreeUnion(tiles, zoom) for name, spec in products.items() if spec['merge']}
+        if mergers:
+            tiles = quadtree_order(tiles)
 
-    all_features = []
-    urban_filters = ['residential', 'commercial', 'industrial']
+    if checkpoint is not None:
+        pending_tiles = [tile for tile in tiles if not checkpoint.is_done(tile)]
+    else:
+        pending_tiles = tiles
 
-    # タイルを順次ダウンロード
-    for x in range(x_min, x_max + 1):
-        for y in range(y_min, y_max + 1):
-            tile_data = fetch_vector_tile(zoom, x, y, url_template)
-            features = tile_to_geojson(tile_data, x, y, zoom, "landuse", urban_filters)
-            all_features.extend(features)
+    # デコード済みキャッシュにあるタイルはダウンロードしない
+    fetch_list = pending_tiles
+    if decoded_cache is not None:
+        cached_tiles = {(x, y) for x, y in pending_tiles
+                        if decoded_cache.contains(url_template, zoom, x, y, products)}
+        fetch_list = [tile for tile in pending_tiles if tile not in cached_tiles]
+        print(f"デコード済みキャッシュを使用: {len(cached_tiles)} タイル")
 
-            if len(all_features) % 100 == 0 and len(all_features) > 0:
-                print(f"進行状況: {len(all_features)} フィーチャー抽出済み")
+    # ローカルアーカイブの場合はHTTPを使わずに直接読み込む
+    source = open_tile_source(url_template)
+    controller = None
+    if source is not None:
+        print(f"ローカルアーカイブから読み込み: {url_template}")
+    else:
+        controller = AdaptiveConcurrency(
+            initial=workers, maximum=max(max_workers or workers, workers), max_retries=retries
+        )
+
+    failed = set()
+
+    def fetch_and_decode(x, y):
+        """1タイルだけ取得してデコード（デコード済みキャッシュを読めなかった場合）"""
+        stream = fetch_tiles([(x, y)], zoom, url_template, 1, cache=cache, source=source, controller=controller)
+        return next(decode_tiles(track_failures(stream, failed), zoom, products))[2]
+
+    # タイルを並列ダウンロードしながらデコード（結果は要求順に処理）
+    downloads = track_failures(
+        fetch_tiles(fetch_list, zoom, url_template, workers, cache=cache, source=source, controller=controller),
+        failed
+    )
+    decoded = decode_tiles(downloads, zoom, products, decode_workers)
+    if decoded_cache is not None:
+        decoded = decoded_cache.replay(
+            url_template, zoom, pending_tiles, cached_tiles, products, decoded, failed, fetch_and_decode
+        )
+    if checkpoint is not None:
+        decoded = checkpoint.replay(tiles, decoded, failed)
+
+    # 結合しないプロダクトはタイルごとの断片をIDでつなぎ直す
+    stitchers = {}
+    if dedupe:
+        stitchers = {name: FeatureStitcher() for name in products if name not in mergers}
+
+    for x, y, product_arrays in decoded:
+        bounds = tile_clip_bounds(x, y, zoom) if dedupe else None
+        extracted = 0
+        for name, arrays in product_arrays.items():
+            try:
+                if name in mergers:
+                    geometries = arrays_to_shapes(arrays)
+                    extracted += len(geometries)
+                    if dedupe:
+                        geometries = dedupe_geometries(clip_geometries(geometries, bounds))
+                    mergers[name].add(x, y, geometries)
+                elif name in stitchers:
+                    if arrays is not None:
+                        geometries = clip_geometries(arrays_to_shapes(arrays), bounds)
+                        stitchers[name].add(arrays['properties'], arrays['ids'], geometries)
+                        extracted += len(geometries)
+                else:
+                    features = arrays_to_features(arrays)
+                    all_features[name].extend(features)
+                    extracted += len(features)
+            except Exception as e:
+                print(f"タイル変換エラー (x={x}, y={y}, z={zoom}, {name}): {e}")
+
+        feature_count += extracted
+        if extracted and feature_count % 100 < extracted:
+            print(f"進行状況: {feature_count} フィーチャー抽出済み")
 
-    print(f"合計 {len(all_features)} フィーチャーを抽出")
+    print(f"合計 {feature_count} フィーチャーを抽出")
+    if source is not None:
+        source.close()
+    else:
+        print(controller.summary())
+        if cache is not None:
+            print(cache.summary())
+    if decoded_cache is not None:
+        print(decoded_cache.summary())
+
+    # 取得できなかったタイルは出力に含まれないため一覧を表示する
+    if failed:
+        print(f"警告: {len(failed)} タイルを取得できませんでした（出力に含まれていません）")
+        for x, y in sorted(failed)[:20]:
+            print(f"  {zoom}/{x}/{y}")
+        if len(failed) > 20:
+            print(f"  ほか {len(failed) - 20} タイル")
+
+    for name, stitcher in stitchers.items():
+        all_features[name] = [
+            {"type": "Feature", "properties": props, "geometry": mapping(geometry)}
+            for props, geometry in stitcher.features()
+        ]
+        print(f"タイル境界の断片をつなぎ直した後: {name} {len(all_features[name])} フィーチャー")
 
     # ポリゴンを結合（オプション）
-    if merge and all_features:
-        print("ポリゴンを結合中...")
-        try:
-            geometries = []
-            for f in all_features:
-                try:
-                    geom = shape(f['geometry'])
-                    if geom.is_valid and not geom.is_empty:
-                        geometries.append(geom)
-                except Exception as e:
-                    continue
-
-            if geometries:
-                merged = unary_union(geometries)
-
-                # MultiPolygonまたはPolygonをGeoJSONに変換
-                if merged.geom_type == 'Polygon':
-                    merged = MultiPolygon([merged])
-
-                all_features = [{
-                    "type": "Feature",
-                    "properties": {
-                        "type": "urban",
-                        "source": f"OpenStreetMap zoom {zoom}"
-                    },
-                    "geometry": mapping(merged)
-                }]
-
-                print(f"結合後: {len(all_features)} フィーチャー")
-        except Exception as e:
-            print(f"結合エラー: {e}")
-            print("結合をスキップして元のフィーチャーを使用します")
+    merged = {}
+    for name, merger in mergers.items():
+        print(f"ポリゴンを結合中: {name}")
+        merged[name] = merger.result()
+        print(f"結合中に保持したジオメトリ数（最大）: {merger.peak_pending}")
+
+        if merged[name] is not None:
+            # MultiPolygonまたはPolygonをGeoJSONに変換
+            if merged[name].geom_type == 'Polygon':
+                merged[name] = MultiPolygon([merged[name]])
+
+            all_features[name] = [{
+                "type": "Feature",
+                "properties": {
+                    "type": name,
+                    "source": f"OpenStreetMap zoom {zoom}"
+                },
+                "geometry": mapping(merged[name])
+            }]
+
+        print(f"結合後: {len(all_features[name])} フィーチャー")
 
     # GeoJSONとして保存
-    geojson = {
-        "type": "FeatureCollection",
-        "features": all_features
+    saved = {}
+    for name, path in outputs.items():
+        saved[name] = save_geojson(all_features[name], path)
+
+    # 粗いズームレベル用のファイルを同じ結合結果から生成
+    if pyramid and len(merged) == 1:
+        name, geometry = next(iter(merged.items()))
+        if geometry is not None:
+            write_pyramid(geometry, zoom, pyramid, name)
+
+    if checkpoint is not None:
+        if failed:
+            # 失敗したタイルは完了扱いになっていないため、--resume で再取得できる
+            print("チェックポイントを残しました。--resume を付けて再実行すると取得できなかったタイルのみ再取得します")
+        else:
+            checkpoint.remove()
+
+    return saved
+
+def estimate_extraction(
+    bbox,
+    zoom,
+    outputs,
+    url_template="https://tile.openstreetmap.jp/data/planet/{z}/{x}/{y}.pbf",
+    merge=True,
+    workers=8,
+    cache=None,
+    decode_workers=0,
+    land_mask=None,
+    dedupe=True,
+    sample_size=16
+):
+    """
+    抽出を実行せずに、サンプルのタイルだけを処理して全体の規模を見積もる（ドライラン）
+
+    範囲全体から等間隔に選んだタイルを取得・デコード・結合し、タイル数に比例させて
+    ダウンロード量・処理時間・フィーチャー数・ピークメモリ・出力サイズを表示する。
+    取得したサンプルはキャッシュに保存されるため、本番の実行でも再利用される。
+
+    Args:
+        outputs: {プロダクト名: 出力GeoJSONファイル}（その他の引数は extract_products と同じ）
+        sample_size: 実際に処理するタイル数
+
+    Returns:
+        見積もり結果の辞書
+    """
+    products = {name: PRODUCTS[name] for name in outputs}
+
+    tiles = tile_range(bbox, zoom)
+    total_tiles = len(tiles)
+    pruned = 0
+    land_mask = product_land_mask(products, land_mask)
+    if land_mask is not None:
+        tiles, pruned = prune_tiles(tiles, zoom, land_mask)
+    if not tiles:
+        print("取得対象のタイルがありません")
+        return None
+
+    sample = sample_evenly(tiles, sample_size)
+    scale = len(tiles) / len(sample)
+    source = open_tile_source(url_template)
+    fetch_workers = min(workers, len(sample))
+
+    # サンプルの取得（キャッシュ済みのタイルはダウンロード時間に含まれない）
+    hits_before = cache.stats['hit'] if cache is not None else 0
+    started = time.perf_counter()
+    payloads = list(fetch_tiles(sample, zoom, url_template, fetch_workers, cache=cache, source=source))
+    fetch_seconds = time.perf_counter() - started
+    cached = (cache.stats['hit'] - hits_before) if cache is not None else 0
+    if source is not None:
+        source.close()
+
+    fetched = [data for _, _, data in payloads if data is not None]
+    payload_bytes = sum(len(data) for data in fetched)
+    empty = sum(1 for data in fetched if not data)
+
+    # サンプルのデコードと切り取り・結合（extract_products と同じ処理）
+    decode_seconds = 0.0
+    merge_seconds = 0.0
+    stats = {name: {'features': 0, 'vertices': 0, 'output_vertices': 0, 'output_bytes': 0, 'merged': False}
+             for name in products}
+    geometries = {name: [] for name in products}
+    features = {name: [] for name in products}
+    stitchers = {name: FeatureStitcher() for name in products} if dedupe else {}
+    for x, y, tile_data in payloads:
+        started = time.perf_counter()
+        product_arrays = _decode_tile_task((tile_data, x, y, zoom, products))
+        decode_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        bounds = tile_clip_bounds(x, y, zoom)
+        for name, arrays in product_arrays.items():
+            if arrays is None:
+                continue
+            stats[name]['features'] += len(arrays['types'])
+            stats[name]['vertices'] += len(arrays['coords'])
+
+            if merge and products[name]['merge']:
+                shapes = arrays_to_shapes(arrays)
+                if dedupe:
+                    shapes = dedupe_geometries(clip_geometries(shapes, bounds))
+                geometries[name].extend(shapes)
+            elif dedupe:
+                stitchers[name].add(arrays['properties'], arrays['ids'],
+                                    clip_geometries(arrays_to_shapes(arrays), bounds))
+            else:
+                features[name].extend(arrays_to_features(arrays))
+        merge_seconds += time.perf_counter() - started
+
+    for name in products:
+        merged = merge and products[name]['merge']
+        stats[name]['merged'] = merged
+        started = time.perf_counter()
+        if merged:
+            union = union_geometries(geometries[name])
+            features[name] = [] if union is None else [{
+                "type": "Feature",
+                "properties": {"type": name, "source": f"OpenStreetMap zoom {zoom}"},
+                "geometry": mapping(union)
+            }]
+        elif dedupe:
+            features[name] = [
+                {"type": "Feature", "properties": props, "geometry": mapping(geometry)}
+                for props, geometry in stitchers[name].features()
+            ]
+        merge_seconds += time.perf_counter() - started
+
+        stats[name]['output_vertices'] = int(sum(
+            shapely.get_num_coordinates(shape(f['geometry'])) for f in features[name]
+        ))
+        stats[name]['output_bytes'] = len(json.dumps(
+            {"type": "FeatureCollection", "features": features[name]}, ensure_ascii=False
+        ))
+
+    # 全体への換算
+    processes = max(decode_workers, 1)
+    download_seconds = fetch_seconds * scale * fetch_workers / max(workers, 1)
+    decode_total = decode_seconds * scale / processes
+    merge_total = merge_seconds * scale
+    total_seconds = max(download_seconds, decode_total) + merge_total
+
+    peak_bytes = 0
+    rows = [
+        ('タイル数', f"{len(tiles):,}（範囲全体 {total_tiles:,}、陸地マスクで除外 {pruned:,}）"),
+        ('サンプル', f"{len(sample)} タイル（取得失敗 {len(payloads) - len(fetched)}、キャッシュ済み {cached}）"),
+        ('ダウンロード量', f"約 {format_bytes(payload_bytes * scale)}"
+                         f"（平均 {format_bytes(payload_bytes / max(len(fetched), 1))}/タイル、"
+                         f"空タイル {empty / max(len(fetched), 1) * 100:.0f}%）"),
+        ('ダウンロード時間', f"約 {format_duration(download_seconds)}（同時 {workers}）"),
+        ('デコード時間', f"約 {format_duration(decode_total)}（{processes} プロセス）"),
+        ('切り取り・結合時間', f"約 {format_duration(merge_total)}"),
+    ]
+    for name, s in stats.items():
+        n_features = s['features'] * scale
+        vertices = s['vertices'] * scale
+        output_vertices = s['output_vertices'] * scale
+        output_bytes = s['output_bytes'] * scale
+        # 結合する場合は結合結果（shapely）、しない場合は全フィーチャー（GeoJSONのPythonオブジェクト）を
+        # 最後まで保持し、書き出し時にはさらにJSON文字列を作る
+        per_vertex = GEOS_BYTES_PER_VERTEX if s['merged'] else PYTHON_BYTES_PER_VERTEX
+        peak_bytes += output_vertices * per_vertex + output_bytes
+        rows.append((f"出力 {name}", f"フィーチャー 約 {n_features:,.0f}（頂点 約 {vertices:,.0f}） → "
+                                f"出力 頂点 約 {output_vertices:,.0f}、約 {format_bytes(output_bytes)}"))
+    rows.append(('ピークメモリ', f"約 {format_bytes(peak_bytes)}"))
+    rows.append(('所要時間', f"約 {format_duration(total_seconds)}"))
+
+    print_plan(f"実行計画（ドライラン: ズーム {zoom}、{len(sample)} / {len(tiles)} タイルを計測）", rows)
+    # サンプルのタイルは離れているため、タイルをまたぐ結合・つなぎ直しによる削減は見積もりに含まれない
+    print("※ 出力の頂点数・サイズは、隣接タイル間の結合による削減を含まない上限の目安です")
+
+    return {
+        'tiles': len(tiles),
+        'download_bytes': payload_bytes * scale,
+        'download_seconds': download_seconds,
+        'decode_seconds': decode_total,
+        'merge_seconds': merge_total,
+        'peak_bytes': peak_bytes,
+        'output_bytes': {name: s['output_bytes'] * scale for name, s in stats.items()},
+        'seconds': total_seconds,
     }
 
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+def extract_urban_areas(
+    bbox,  # [min_lon, min_lat, max_lon, max_lat]
+    zoom=7,
+    output_path='../geojson/urban-areas.json',
+    url_template="https://tile.openstreetmap.jp/data/planet/{z}/{x}/{y}.pbf",
+    merge=True,
+    **options
+):
+    """
+    指定された範囲と解像度でベクタータイルから都市域を抽出
 
-    print(f"GeoJSONを保存中: {output_path}")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(geojson, f, ensure_ascii=False)
+    Args:
+        bbox: [min_lon, min_lat, max_lon, max_lat] 日本全体なら [122, 24, 154, 46]
+        zoom: タイルのズームレベル（7-9推奨）
+        output_path: 出力GeoJSONファイル
+        url_template: ベクタータイルのURLテンプレート、またはMBTiles / PMTilesファイルのパス
+        merge: 同じクラスのポリゴンを結合するか
+        **options: extract_products のその他の引数（workers, cache, pyramid など）
+    """
+    saved = extract_products(bbox, zoom, {'urban': output_path}, url_template, merge, **options)
+    return saved['urban']
 
-    file_size = output_path.stat().st_size
-    print(f"完了！ファイルサイズ: {file_size / 1024 / 1024:.2f} MB")
+def product_output_path(output, product, multiple):
+    """
+    プロダクトごとの出力パスを決める
 
-    return output_path
+    複数プロダクトの場合、outputに {product} があれば置き換え、なければファイル名の末尾に付ける
+    """
+    if '{product}' in output:
+        return output.format(product=product)
+    if not multiple:
+        return output
+    path = Path(output)
+    return str(path.with_name(f"{path.stem}-{product}{path.suffix}"))
 
 def main():
-    parser = argparse.ArgumentParser(description='ベクタータイルから都市域を抽出')
+    parser = argparse.ArgumentParser(description='ベクタータイルから都市域などを抽出')
     parser.add_argument('--bbox', nargs=4, type=float,
                         default=[122, 24, 154, 46],
                         help='バウンディングボックス: min_lon min_lat max_lon max_lat')
     parser.add_argument('--zoom', type=int, default=7,
                         help='タイルのズームレベル（7-9推奨、デフォルト: 7）')
     parser.add_argument('--output', default='../geojson/urban-areas.json',
-                        help='出力GeoJSONファイル')
+                        help='出力GeoJSONファイル（複数プロダクトの場合は {product} を含めるか、ファイル名の末尾にプロダクト名を付加）')
+    parser.add_argument('--products', nargs='+', choices=list(PRODUCTS), default=['urban'],
+                        help='抽出するプロダクト（デフォルト: urban）')
     parser.add_argument('--no-merge', action='store_true',
                         help='ポリゴンを結合しない')
+    parser.add_argument('--no-dedupe', action='store_true',
+                        help='タイル境界での切り取りと重複除去を行わない（タイルごとの重複をそのまま出力・結合）')
     parser.add_argument('--url', default='https://tile.openstreetmap.jp/data/planet/{z}/{x}/{y}.pbf',
-                        help='ベクタータイルのURLテンプレート')
+                        help='ベクタータイルのURLテンプレート、またはMBTiles / PMTilesファイルのパス')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='同時ダウンロード数の初期値（デフォルト: 8、1で逐次取得）')
+    parser.add_argument('--max-workers', type=int, default=16,
+                        help='同時ダウンロード数の上限（デフォルト: 16、429 / 5xx や応答時間に応じて自動調整）')
+    parser.add_argument('--retries', type=int, default=5,
+                        help='429 / 5xx / タイムアウト時の再試行回数（デフォルト: 5）')
+    parser.add_argument('--decode-workers', type=int, default=os.cpu_count() or 1,
+                        help='デコードに使うプロセス数（デフォルト: CPUコア数、1でメインプロセスのみ）')
+    parser.add_argument('--land-mask', default=None,
+                        help='陸地データのパス（デフォルト: ../raw のNatural Earth陸地データ）')
+    parser.add_argument('--no-land-mask', action='store_true',
+                        help='海域のみのタイルも取得する（water など needs_sea のプロダクトを含む場合は常に取得する）')
+    parser.add_argument('--pyramid', nargs='+', metavar='ZOOM:PATH', default=None,
+                        help='結合結果から指定ズーム用のファイルも生成（例: 5:../../frontend/public/urban-areas-coarse.json）')
+    parser.add_argument('--resume', action='store_true',
+                        help='中断した抽出をチェックポイントから再開')
+    parser.add_argument('--checkpoint-dir', default=None,
+                        help='チェックポイントの保存先（デフォルト: 出力ファイル名.checkpoint）')
+    parser.add_argument('--no-checkpoint', action='store_true',
+                        help='チェックポイントを保存しない')
+    parser.add_argument('--cache-dir', default='../raw/tile_cache',
+                        help='タイルキャッシュのディレクトリ（デフォルト: ../raw/tile_cache）')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='タイルキャッシュを使用しない')
+    parser.add_argument('--cache-max-mb', type=float, default=2048,
+                        help='キャッシュの上限サイズ（MB、デフォルト: 2048）')
+    parser.add_argument('--cache-max-age', type=float, default=168,
+                        help='再検証せずにキャッシュを使う期間（時間、デフォルト: 168）')
+    parser.add_argument('--offline', action='store_true',
+                        help='ネットワークに接続せずキャッシュのみを使用')
+    parser.add_argument('--decoded-cache-dir', default='../raw/decoded_cache',
+                        help='デコード・座標変換済みタイルのキャッシュ（デフォルト: ../raw/decoded_cache）')
+    parser.add_argument('--no-decoded-cache', action='store_true',
+                        help='デコード済みキャッシュを使用しない')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='抽出せずに、一部のタイルだけを処理してダウンロード量・所要時間・メモリ・出力サイズを見積もる')
+    parser.add_argument('--sample-tiles', type=int, default=16,
+                        help='ドライランで実際に処理するタイル数（デフォルト: 16）')
 
     args = parser.parse_args()
 
+    pyramid = None
+    if args.pyramid:
+        pyramid = {}
+        for spec in args.pyramid:
+            level, sep, path = spec.partition(':')
+            if not sep or not level.isdigit():
+                parser.error(f"--pyramid は ZOOM:PATH の形式で指定してください: {spec}")
+            if int(level) > args.zoom:
+                parser.error(f"--pyramid のズーム {level} は --zoom {args.zoom} 以下にしてください")
+            pyramid[int(level)] = path
+        if args.no_merge:
+            parser.error("--pyramid は --no-merge と同時に指定できません")
+        if len(args.products) > 1 or not PRODUCTS[args.products[0]]['merge']:
+            parser.error("--pyramid は結合するプロダクトを1つだけ指定した場合に使用できます")
+
+    multiple = len(args.products) > 1
+    outputs = {name: product_output_path(args.output, name, multiple) for name in args.products}
+
     print("=" * 60)
-    print("ベクタータイルから都市域を抽出")
+    print("ベクタータイルから都市域などを抽出")
     print("=" * 60)
     print(f"範囲: {args.bbox}")
+    for name, path in outputs.items():
+        print(f"出力: {name} -> {path}")
     print(f"ズームレベル: {args.zoom}")
     print(f"結合: {'無効' if args.no_merge else '有効'}")
+    if pyramid:
+        print(f"ピラミッド: {', '.join(f'z{level}' for level in sorted(pyramid))}")
+    print(f"同時ダウンロード数: {args.workers}（上限 {max(args.max_workers, args.workers)}）")
+    print(f"デコードプロセス数: {args.decode_workers}")
+    print(f"キャッシュ: {'無効' if args.no_cache else args.cache_dir}{'（オフライン）' if args.offline else ''}")
+    print(f"デコード済みキャッシュ: {'無効' if args.no_decoded_cache else args.decoded_cache_dir}")
+    if args.dry_run:
+        print(f"ドライラン: {args.sample_tiles} タイルで見積もり（ファイルは出力しない）")
     print("=" * 60)
 
+    checkpoint_dir = None
+    if not args.no_checkpoint and not args.dry_run:
+        checkpoint_dir = args.checkpoint_dir or f"{next(iter(outputs.values()))}.checkpoint"
+
     try:
-        extract_urban_areas(
+        land_mask = None
+        if not args.no_land_mask:
+            land_mask = load_land_mask(args.bbox, args.land_mask)
+
+        cache = None
+        if not args.no_cache:
+            cache = TileCache(
+                args.cache_dir,
+                max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                max_age=args.cache_max_age * 3600,
+                offline=args.offline
+            )
+
+        if args.dry_run:
+            estimate_extraction(
+                bbox=args.bbox,
+                zoom=args.zoom,
+                outputs=outputs,
+                url_template=args.url,
+                merge=not args.no_merge,
+                workers=args.workers,
+                cache=cache,
+                decode_workers=args.decode_workers,
+                land_mask=land_mask,
+                dedupe=not args.no_dedupe,
+                sample_size=args.sample_tiles
+            )
+            return
+
+        decoded_cache = None
+        if not args.no_decoded_cache:
+            decoded_cache = DecodedTileCache(
+                args.decoded_cache_dir,
+                max_bytes=int(args.cache_max_mb * 1024 * 1024)
+            )
+
+        extract_products(
             bbox=args.bbox,
             zoom=args.zoom,
-            output_path=args.output,
+            outputs=outputs,
             url_template=args.url,
-            merge=not args.no_merge
+            merge=not args.no_merge,
+            workers=args.workers,
+            cache=cache,
+            decode_workers=args.decode_workers,
+            land_mask=land_mask,
+            checkpoint_dir=checkpoint_dir,
+            resume=args.resume,
+            pyramid=pyramid,
+            decoded_cache=decoded_cache,
+            max_workers=args.max_workers,
+            retries=args.retries,
+            dedupe=not args.no_dedupe
         )
     except KeyboardInterrupt:
         print("\n中断されました")
+        if checkpoint_dir:
+            print("--resume を付けて再実行すると途中から再開できます")
     except Exception as e:
         print(f"エラー: {e}")
         import traceback
@@ -5,1428 +5,85 @@
 座標データ: 国土数値情報 市町村役場データ（2014年度）
 出典: https://nlftp.mlit.go.jp/ksj/gml/datalist/KsjTmplt-P34.html
 更新日: 2026-01-19
+
+データは city_population.csv（1行1都市、市区町村名の順）に保存し、初めて使うときに読み込みます。
+CITY_POPULATION_30K_PLUS は従来どおり {市区町村名: {"population", "center", "prefecture"}} の辞書です。
 """
 
-CITY_POPULATION_30K_PLUS = {
-    "いすみ市": {
-        "population": 36000,
-        "center": [140.3851170, 35.2538870],
-        "prefecture": "千葉県"
-    },
-    "いわき市": {
-        "population": 326000,
-        "center": [140.8876870, 37.0504560],
-        "prefecture": "福島県"
-    },
-    "さいたま市": {
-        "population": 1328000,
-        "center": [139.6455020, 35.8615150],
-        "prefecture": "埼玉県"
-    },
-    "つくば市": {
-        "population": 248000,
-        "center": [140.0764732, 36.0835602],
-        "prefecture": "茨城県"
-    },
-    "ひたちなか市": {
-        "population": 156000,
-        "center": [140.5346760, 36.3966150],
-        "prefecture": "茨城県"
-    },
-    "ふじみ野市": {
-        "population": 114000,
-        "center": [139.5198200, 35.8793960],
-        "prefecture": "埼玉県"
-    },
-    "一宮市": {
-        "population": 380000,
-        "center": [136.8023440, 35.3040130],
-        "prefecture": "愛知県"
-    },
-    "一関市": {
-        "population": 115000,
-        "center": [141.1267590, 38.9347540],
-        "prefecture": "岩手県"
-    },
-    "三条市": {
-        "population": 95000,
-        "center": [138.9617000, 37.6367680],
-        "prefecture": "新潟県"
-    },
-    "三郷市": {
-        "population": 143000,
-        "center": [139.8722470, 35.8301320],
-        "prefecture": "埼玉県"
-    },
-    "三鷹市": {
-        "population": 191000,
-        "center": [139.5598830, 35.6833080],
-        "prefecture": "東京都"
-    },
-    "上尾市": {
-        "population": 226000,
-        "center": [139.5932030, 35.9774080],
-        "prefecture": "埼玉県"
-    },
-    "上田市": {
-        "population": 154000,
-        "center": [138.2490690, 36.4019420],
-        "prefecture": "長野県"
-    },
-    "上越市": {
-        "population": 187000,
-        "center": [138.2360390, 37.1478730],
-        "prefecture": "新潟県"
-    },
-    "下関市": {
-        "population": 254000,
-        "center": [130.9414590, 33.9578280],
-        "prefecture": "山口県"
-    },
-    "世田谷区": {
-        "population": 939000,
-        "center": [139.6532080, 35.6464810],
-        "prefecture": "東京都"
-    },
-    "中央区": {
-        "population": 172000,
-        "center": [139.7720030, 35.6705870],
-        "prefecture": "東京都"
-    },
-    "中野区": {
-        "population": 344000,
-        "center": [139.6637380, 35.7072680],
-        "prefecture": "東京都"
-    },
-    "丸亀市": {
-        "population": 110000,
-        "center": [133.7977160, 34.2894820],
-        "prefecture": "香川県"
-    },
-    "久喜市": {
-        "population": 152000,
-        "center": [139.6668380, 36.0620590],
-        "prefecture": "埼玉県"
-    },
-    "久留米市": {
-        "population": 304000,
-        "center": [130.5083710, 33.3192860],
-        "prefecture": "福岡県"
-    },
-    "京都市": {
-        "population": 1463000,
-        "center": [135.7681810, 35.0115740],
-        "prefecture": "京都府"
-    },
-    "今治市": {
-        "population": 154000,
-        "center": [132.9976580, 34.0660430],
-        "prefecture": "愛媛県"
-    },
-    "仙台市": {
-        "population": 1097000,
-        "center": [140.8696170, 38.2680080],
-        "prefecture": "宮城県"
-    },
-    "伊丹市": {
-        "population": 198000,
-        "center": [135.4009330, 34.7842950],
-        "prefecture": "兵庫県"
-    },
-    "伊勢崎市": {
-        "population": 213000,
-        "center": [139.1969600, 36.3113410],
-        "prefecture": "群馬県"
-    },
-    "伊東市": {
-        "population": 67000,
-        "center": [139.1020480, 34.9656800],
-        "prefecture": "静岡県"
-    },
-    "伊豆の国市": {
-        "population": 48000,
-        "center": [138.9288850, 35.0277130],
-        "prefecture": "静岡県"
-    },
-    "伊豆市": {
-        "population": 30000,
-        "center": [138.9467150, 34.9765910],
-        "prefecture": "静岡県"
-    },
-    "会津若松市": {
-        "population": 117000,
-        "center": [139.9297070, 37.4948420],
-        "prefecture": "福島県"
-    },
-    "佐世保市": {
-        "population": 244000,
-        "center": [129.7150901, 33.1799042],
-        "prefecture": "長崎県"
-    },
-    "佐倉市": {
-        "population": 172000,
-        "center": [140.2239720, 35.7234410],
-        "prefecture": "千葉県"
-    },
-    "佐賀市": {
-        "population": 232000,
-        "center": [130.3008350, 33.2635430],
-        "prefecture": "佐賀県"
-    },
-    "佐野市": {
-        "population": 116000,
-        "center": [139.5931340, 36.3086030],
-        "prefecture": "栃木県"
-    },
-    "倉敷市": {
-        "population": 478000,
-        "center": [133.7722810, 34.5846770],
-        "prefecture": "岡山県"
-    },
-    "八代市": {
-        "population": 122000,
-        "center": [130.6018880, 32.5074120],
-        "prefecture": "熊本県"
-    },
-    "八尾市": {
-        "population": 263000,
-        "center": [135.6009480, 34.6268840],
-        "prefecture": "大阪府"
-    },
-    "八戸市": {
-        "population": 221000,
-        "center": [141.4884040, 40.5122780],
-        "prefecture": "青森県"
-    },
-    "八潮市": {
-        "population": 93000,
-        "center": [139.8391750, 35.8225390],
-        "prefecture": "埼玉県"
-    },
-    "八王子市": {
-        "population": 577000,
-        "center": [139.3160750, 35.6665700],
-        "prefecture": "東京都"
-    },
-    "八街市": {
-        "population": 69000,
-        "center": [140.3179130, 35.6658590],
-        "prefecture": "千葉県"
-    },
-    "函館市": {
-        "population": 245000,
-        "center": [140.7291080, 41.7687120],
-        "prefecture": "北海道"
-    },
-    "刈谷市": {
-        "population": 153000,
-        "center": [137.0020600, 34.9888640],
-        "prefecture": "愛知県"
-    },
-    "前橋市": {
-        "population": 331000,
-        "center": [139.0634930, 36.3894130],
-        "prefecture": "群馬県"
-    },
-    "加古川市": {
-        "population": 260000,
-        "center": [134.8409000, 34.7566200],
-        "prefecture": "兵庫県"
-    },
-    "加須市": {
-        "population": 112000,
-        "center": [139.6017750, 36.1314380],
-        "prefecture": "埼玉県"
-    },
-    "北上市": {
-        "population": 92000,
-        "center": [141.1131570, 39.2868170],
-        "prefecture": "岩手県"
-    },
-    "北九州市": {
-        "population": 922000,
-        "center": [130.8751830, 33.8834080],
-        "prefecture": "福岡県"
-    },
-    "北区": {
-        "population": 358000,
-        "center": [139.7336570, 35.7528050],
-        "prefecture": "東京都"
-    },
-    "北広島市": {
-        "population": 59000,
-        "center": [141.5636250, 42.9856630],
-        "prefecture": "北海道"
-    },
-    "北本市": {
-        "population": 66000,
-        "center": [139.5302400, 36.0270260],
-        "prefecture": "埼玉県"
-    },
-    "北見市": {
-        "population": 114000,
-        "center": [143.8943840, 43.8078230],
-        "prefecture": "北海道"
-    },
-    "匝瑳市": {
-        "population": 35000,
-        "center": [140.5643560, 35.7079140],
-        "prefecture": "千葉県"
-    },
-    "千代田区": {
-        "population": 68000,
-        "center": [139.7536340, 35.6940030],
-        "prefecture": "東京都"
-    },
-    "千歳市": {
-        "population": 97000,
-        "center": [141.6511390, 42.8211240],
-        "prefecture": "北海道"
-    },
-    "千葉市": {
-        "population": 981000,
-        "center": [140.1063800, 35.6073310],
-        "prefecture": "千葉県"
-    },
-    "南房総市": {
-        "population": 36000,
-        "center": [139.8399970, 35.0431470],
-        "prefecture": "千葉県"
-    },
-    "印西市": {
-        "population": 107000,
-        "center": [140.1457650, 35.8323320],
-        "prefecture": "千葉県"
-    },
-    "厚木市": {
-        "population": 225000,
-        "center": [139.3624420, 35.4430490],
-        "prefecture": "神奈川県"
-    },
-    "古河市": {
-        "population": 139000,
-        "center": [139.7553710, 36.1782280],
-        "prefecture": "茨城県"
-    },
-    "台東区": {
-        "population": 211000,
-        "center": [139.7799840, 35.7126070],
-        "prefecture": "東京都"
-    },
-    "吉川市": {
-        "population": 73000,
-        "center": [139.8413280, 35.8911240],
-        "prefecture": "埼玉県"
-    },
-    "名古屋市": {
-        "population": 2332000,
-        "center": [136.9064210, 35.1814330],
-        "prefecture": "愛知県"
-    },
-    "君津市": {
-        "population": 83000,
-        "center": [139.9025610, 35.3304240],
-        "prefecture": "千葉県"
-    },
-    "吹田市": {
-        "population": 384000,
-        "center": [135.5167990, 34.7594050],
-        "prefecture": "大阪府"
-    },
-    "呉市": {
-        "population": 209000,
-        "center": [132.5658050, 34.2492540],
-        "prefecture": "広島県"
-    },
-    "和歌山市": {
-        "population": 355000,
-        "center": [135.1708080, 34.2305140],
-        "prefecture": "和歌山県"
-    },
-    "品川区": {
-        "population": 416000,
-        "center": [139.7302500, 35.6090660],
-        "prefecture": "東京都"
-    },
-    "唐津市": {
-        "population": 116000,
-        "center": [129.9679700, 33.4501030],
-        "prefecture": "佐賀県"
-    },
-    "四日市市": {
-        "population": 310000,
-        "center": [136.6244270, 34.9650920],
-        "prefecture": "三重県"
-    },
-    "国分寺市": {
-        "population": 127000,
-        "center": [139.4622520, 35.7109430],
-        "prefecture": "東京都"
-    },
-    "土浦市": {
-        "population": 143000,
-        "center": [140.1960570, 36.0718700],
-        "prefecture": "茨城県"
-    },
-    "坂戸市": {
-        "population": 101000,
-        "center": [139.4029830, 35.9572620],
-        "prefecture": "埼玉県"
-    },
-    "堺市": {
-        "population": 820000,
-        "center": [135.4830200, 34.5733540],
-        "prefecture": "大阪府"
-    },
-    "墨田区": {
-        "population": 283000,
-        "center": [139.8014970, 35.7107240],
-        "prefecture": "東京都"
-    },
-    "多摩市": {
-        "population": 148000,
-        "center": [139.4463660, 35.6369590],
-        "prefecture": "東京都"
-    },
-    "大仙市": {
-        "population": 78000,
-        "center": [140.4754480, 39.4530900],
-        "prefecture": "秋田県"
-    },
-    "大分市": {
-        "population": 478000,
-        "center": [131.6093770, 33.2395260],
-        "prefecture": "大分県"
-    },
-    "大和市": {
-        "population": 242000,
-        "center": [139.4579500, 35.4875150],
-        "prefecture": "神奈川県"
-    },
-    "大崎市": {
-        "population": 126000,
-        "center": [140.9555650, 38.5771320],
-        "prefecture": "宮城県"
-    },
-    "大津市": {
-        "population": 345000,
-        "center": [135.8546660, 35.0183570],
-        "prefecture": "滋賀県"
-    },
-    "大田区": {
-        "population": 738000,
-        "center": [139.7159870, 35.5612600],
-        "prefecture": "東京都"
-    },
-    "大網白里市": {
-        "population": 49000,
-        "center": [140.3209630, 35.5217080],
-        "prefecture": "千葉県"
-    },
-    "大阪市": {
-        "population": 2755000,
-        "center": [135.5020460, 34.6938910],
-        "prefecture": "大阪府"
-    },
-    "太田市": {
-        "population": 224000,
-        "center": [139.3753600, 36.2911270],
-        "prefecture": "群馬県"
-    },
-    "奈良市": {
-        "population": 354000,
-        "center": [135.8049950, 34.6851170],
-        "prefecture": "奈良県"
-    },
-    "奥州市": {
-        "population": 114000,
-        "center": [141.1391160, 39.1445060],
-        "prefecture": "岩手県"
-    },
-    "姫路市": {
-        "population": 526000,
-        "center": [134.6854580, 34.8154960],
-        "prefecture": "兵庫県"
-    },
-    "宇治市": {
-        "population": 179000,
-        "center": [135.7997800, 34.8844000],
-        "prefecture": "京都府"
-    },
-    "宇都宮市": {
-        "population": 519000,
-        "center": [139.8828070, 36.5551150],
-        "prefecture": "栃木県"
-    },
-    "安城市": {
-        "population": 189000,
-        "center": [137.0802970, 34.9586440],
-        "prefecture": "愛知県"
-    },
-    "宝塚市": {
-        "population": 225000,
-        "center": [135.3600980, 34.7998170],
-        "prefecture": "兵庫県"
-    },
-    "室蘭市": {
-        "population": 81000,
-        "center": [140.9737840, 42.3152040],
-        "prefecture": "北海道"
-    },
-    "宮崎市": {
-        "population": 401000,
-        "center": [131.4202440, 31.9076760],
-        "prefecture": "宮崎県"
-    },
-    "富士宮市": {
-        "population": 131000,
-        "center": [138.6216560, 35.2219830],
-        "prefecture": "静岡県"
-    },
-    "富士市": {
-        "population": 248000,
-        "center": [138.6763110, 35.1613860],
-        "prefecture": "静岡県"
-    },
-    "富士見市": {
-        "population": 112000,
-        "center": [139.5490740, 35.8567590],
-        "prefecture": "埼玉県"
-    },
-    "富山市": {
-        "population": 415000,
-        "center": [137.2134490, 36.6959820],
-        "prefecture": "富山県"
-    },
-    "富津市": {
-        "population": 43000,
-        "center": [139.8571130, 35.3041400],
-        "prefecture": "千葉県"
-    },
-    "富里市": {
-        "population": 50000,
-        "center": [140.3430710, 35.7268100],
-        "prefecture": "千葉県"
-    },
-    "寝屋川市": {
-        "population": 228000,
-        "center": [135.6280080, 34.7660790],
-        "prefecture": "大阪府"
-    },
-    "小山市": {
-        "population": 167000,
-        "center": [139.8001320, 36.3144770],
-        "prefecture": "栃木県"
-    },
-    "小平市": {
-        "population": 196000,
-        "center": [139.4774740, 35.7284960],
-        "prefecture": "東京都"
-    },
-    "小樽市": {
-        "population": 111000,
-        "center": [140.9946054, 43.1907527],
-        "prefecture": "北海道"
-    },
-    "小牧市": {
-        "population": 149000,
-        "center": [136.9119710, 35.2911410],
-        "prefecture": "愛知県"
-    },
-    "小田原市": {
-        "population": 188000,
-        "center": [139.1523550, 35.2646940],
-        "prefecture": "神奈川県"
-    },
-    "小金井市": {
-        "population": 124000,
-        "center": [139.5029890, 35.6994790],
-        "prefecture": "東京都"
-    },
-    "尼崎市": {
-        "population": 455000,
-        "center": [135.4063940, 34.7335540],
-        "prefecture": "兵庫県"
-    },
-    "山形市": {
-        "population": 245000,
-        "center": [140.3396050, 38.2554360],
-        "prefecture": "山形県"
-    },
-    "山武市": {
-        "population": 49000,
-        "center": [140.4135310, 35.6029920],
-        "prefecture": "千葉県"
-    },
-    "岐阜市": {
-        "population": 401000,
-        "center": [136.7606570, 35.4233010],
-        "prefecture": "岐阜県"
-    },
-    "岡山市": {
-        "population": 721000,
-        "center": [133.9195660, 34.6551070],
-        "prefecture": "岡山県"
-    },
-    "岡崎市": {
-        "population": 387000,
-        "center": [137.1729990, 34.9548090],
-        "prefecture": "愛知県"
-    },
-    "岸和田市": {
-        "population": 192000,
-        "center": [135.3708710, 34.4605970],
-        "prefecture": "大阪府"
-    },
-    "島田市": {
-        "population": 96000,
-        "center": [138.1760550, 34.8364170],
-        "prefecture": "静岡県"
-    },
-    "川口市": {
-        "population": 607000,
-        "center": [139.7241710, 35.8077410],
-        "prefecture": "埼玉県"
-    },
-    "川崎市": {
-        "population": 1538000,
-        "center": [139.7030120, 35.5308060],
-        "prefecture": "神奈川県"
-    },
-    "川西市": {
-        "population": 155000,
-        "center": [135.4172220, 34.8301320],
-        "prefecture": "兵庫県"
-    },
-    "川越市": {
-        "population": 353000,
-        "center": [139.4858400, 35.9251120],
-        "prefecture": "埼玉県"
-    },
-    "市原市": {
-        "population": 272000,
-        "center": [140.1155940, 35.4978970],
-        "prefecture": "千葉県"
-    },
-    "市川市": {
-        "population": 498000,
-        "center": [139.9310130, 35.7219140],
-        "prefecture": "千葉県"
-    },
-    "帯広市": {
-        "population": 165000,
-        "center": [143.1961950, 42.9240140],
-        "prefecture": "北海道"
-    },
-    "平塚市": {
-        "population": 257000,
-        "center": [139.3494120, 35.3355020],
-        "prefecture": "神奈川県"
-    },
-    "幸手市": {
-        "population": 51000,
-        "center": [139.7258050, 36.0780890],
-        "prefecture": "埼玉県"
-    },
-    "広島市": {
-        "population": 1201000,
-        "center": [132.4553370, 34.3852530],
-        "prefecture": "広島県"
-    },
-    "府中市": {
-        "population": 260000,
-        "center": [139.4776630, 35.6689210],
-        "prefecture": "東京都"
-    },
-    "延岡市": {
-        "population": 116000,
-        "center": [131.6648590, 32.5824010],
-        "prefecture": "宮崎県"
-    },
-    "弘前市": {
-        "population": 168000,
-        "center": [140.4640080, 40.6029650],
-        "prefecture": "青森県"
-    },
-    "御前崎市": {
-        "population": 32000,
-        "center": [138.1281170, 34.6379770],
-        "prefecture": "静岡県"
-    },
-    "御殿場市": {
-        "population": 88000,
-        "center": [138.9345060, 35.3086150],
-        "prefecture": "静岡県"
-    },
-    "徳島市": {
-        "population": 255000,
-        "center": [134.5547130, 34.0702340],
-        "prefecture": "徳島県"
-    },
-    "恵庭市": {
-        "population": 70000,
-        "center": [141.5777990, 42.8825920],
-        "prefecture": "北海道"
-    },
-    "成田市": {
-        "population": 132000,
-        "center": [140.3187810, 35.7766050],
-        "prefecture": "千葉県"
-    },
-    "我孫子市": {
-        "population": 131000,
-        "center": [140.0282250, 35.8641620],
-        "prefecture": "千葉県"
-    },
-    "所沢市": {
-        "population": 344000,
-        "center": [139.4686130, 35.7996720],
-        "prefecture": "埼玉県"
-    },
-    "掛川市": {
-        "population": 117000,
-        "center": [137.9984030, 34.7687170],
-        "prefecture": "静岡県"
-    },
-    "文京区": {
-        "population": 235000,
-        "center": [139.7524730, 35.7079760],
-        "prefecture": "東京都"
-    },
-    "新宿区": {
-        "population": 350000,
-        "center": [139.7034630, 35.6938900],
-        "prefecture": "東京都"
-    },
-    "新居浜市": {
-        "population": 116000,
-        "center": [133.2833790, 33.9603290],
-        "prefecture": "愛媛県"
-    },
-    "新潟市": {
-        "population": 779000,
-        "center": [139.0364020, 37.9161280],
-        "prefecture": "新潟県"
-    },
-    "日南市": {
-        "population": 48000,
-        "center": [131.3787310, 31.6019320],
-        "prefecture": "宮崎県"
-    },
-    "日立市": {
-        "population": 174000,
-        "center": [140.6515460, 36.5990160],
-        "prefecture": "茨城県"
-    },
-    "日野市": {
-        "population": 187000,
-        "center": [139.3949810, 35.6713470],
-        "prefecture": "東京都"
-    },
-    "日高市": {
-        "population": 55000,
-        "center": [139.3391400, 35.9077480],
-        "prefecture": "埼玉県"
-    },
-    "旭川市": {
-        "population": 324000,
-        "center": [142.3647980, 43.7707990],
-        "prefecture": "北海道"
-    },
-    "旭市": {
-        "population": 64000,
-        "center": [140.6465900, 35.7204540],
-        "prefecture": "千葉県"
-    },
-    "明石市": {
-        "population": 304000,
-        "center": [134.9971820, 34.6431090],
-        "prefecture": "兵庫県"
-    },
-    "春日井市": {
-        "population": 310000,
-        "center": [136.9722320, 35.2476640],
-        "prefecture": "愛知県"
-    },
-    "春日部市": {
-        "population": 232000,
-        "center": [139.7524090, 35.9753050],
-        "prefecture": "埼玉県"
-    },
-    "昭島市": {
-        "population": 113000,
-        "center": [139.3537730, 35.7057050],
-        "prefecture": "東京都"
-    },
-    "木更津市": {
-        "population": 136000,
-        "center": [139.9168840, 35.3759690],
-        "prefecture": "千葉県"
-    },
-    "本庄市": {
-        "population": 76000,
-        "center": [139.1906290, 36.2433290],
-        "prefecture": "埼玉県"
-    },
-    "札幌市": {
-        "population": 1974000,
-        "center": [141.3543740, 43.0619720],
-        "prefecture": "北海道"
-    },
-    "杉並区": {
-        "population": 589000,
-        "center": [139.6364140, 35.6995460],
-        "prefecture": "東京都"
-    },
-    "東久留米市": {
-        "population": 116000,
-        "center": [139.5296730, 35.7579920],
-        "prefecture": "東京都"
-    },
-    "東大和市": {
-        "population": 85000,
-        "center": [139.4265910, 35.7453280],
-        "prefecture": "東京都"
-    },
-    "東大阪市": {
-        "population": 487000,
-        "center": [135.6008980, 34.6793240],
-        "prefecture": "大阪府"
-    },
-    "東村山市": {
-        "population": 151000,
-        "center": [139.4684840, 35.7546240],
-        "prefecture": "東京都"
-    },
-    "東松山市": {
-        "population": 92000,
-        "center": [139.3999500, 36.0421620],
-        "prefecture": "埼玉県"
-    },
-    "東金市": {
-        "population": 59000,
-        "center": [140.3661150, 35.5599320],
-        "prefecture": "千葉県"
-    },
-    "松山市": {
-        "population": 509000,
-        "center": [132.7655560, 33.8391570],
-        "prefecture": "愛媛県"
-    },
-    "松戸市": {
-        "population": 498000,
-        "center": [139.9032260, 35.7876520],
-        "prefecture": "千葉県"
-    },
-    "松本市": {
-        "population": 239000,
-        "center": [137.9719920, 36.2380960],
-        "prefecture": "長野県"
-    },
-    "松江市": {
-        "population": 202000,
-        "center": [133.0485270, 35.4680390],
-        "prefecture": "島根県"
-    },
-    "松阪市": {
-        "population": 158000,
-        "center": [136.5275950, 34.5779740],
-        "prefecture": "三重県"
-    },
-    "板橋区": {
-        "population": 580000,
-        "center": [139.7092460, 35.7512450],
-        "prefecture": "東京都"
-    },
-    "枚方市": {
-        "population": 396000,
-        "center": [135.6506420, 34.8144650],
-        "prefecture": "大阪府"
-    },
-    "柏市": {
-        "population": 432000,
-        "center": [139.9761990, 35.8682950],
-        "prefecture": "千葉県"
-    },
-    "栃木市": {
-        "population": 158000,
-        "center": [139.7341111, 36.3824139],
-        "prefecture": "栃木県"
-    },
-    "桐生市": {
-        "population": 106000,
-        "center": [139.3306460, 36.4052100],
-        "prefecture": "群馬県"
-    },
-    "横浜市": {
-        "population": 3773000,
-        "center": [139.6379540, 35.4440350],
-        "prefecture": "神奈川県"
-    },
-    "横須賀市": {
-        "population": 381000,
-        "center": [139.6722840, 35.2812760],
-        "prefecture": "神奈川県"
-    },
-    "武蔵村山市": {
-        "population": 71000,
-        "center": [139.3874210, 35.7549060],
-        "prefecture": "東京都"
-    },
-    "武蔵野市": {
-        "population": 147000,
-        "center": [139.5659380, 35.7178370],
-        "prefecture": "東京都"
-    },
-    "水戸市": {
-        "population": 271000,
-        "center": [140.4712220, 36.3658610],
-        "prefecture": "茨城県"
-    },
-    "江別市": {
-        "population": 118000,
-        "center": [141.5361030, 43.1036660],
-        "prefecture": "北海道"
-    },
-    "江戸川区": {
-        "population": 697000,
-        "center": [139.8683120, 35.7066480],
-        "prefecture": "東京都"
-    },
-    "江東区": {
-        "population": 527000,
-        "center": [139.8173650, 35.6728590],
-        "prefecture": "東京都"
-    },
-    "沖縄市": {
-        "population": 143000,
-        "center": [127.8056940, 26.3343540],
-        "prefecture": "沖縄県"
-    },
-    "沼津市": {
-        "population": 189000,
-        "center": [138.8633370, 35.0957230],
-        "prefecture": "静岡県"
-    },
-    "津山市": {
-        "population": 99000,
-        "center": [134.0045430, 35.0691180],
-        "prefecture": "岡山県"
-    },
-    "津市": {
-        "population": 274000,
-        "center": [136.5054430, 34.7185630],
-        "prefecture": "三重県"
-    },
-    "流山市": {
-        "population": 204000,
-        "center": [139.9025860, 35.8562870],
-        "prefecture": "千葉県"
-    },
-    "浜松市": {
-        "population": 789000,
-        "center": [137.7261170, 34.7108650],
-        "prefecture": "静岡県"
-    },
-    "浦安市": {
-        "population": 171000,
-        "center": [139.9021870, 35.6539880],
-        "prefecture": "千葉県"
-    },
-    "浦添市": {
-        "population": 115000,
-        "center": [127.7218040, 26.2458160],
-        "prefecture": "沖縄県"
-    },
-    "深谷市": {
-        "population": 142000,
-        "center": [139.2814700, 36.1974660],
-        "prefecture": "埼玉県"
-    },
-    "清瀬市": {
-        "population": 75000,
-        "center": [139.5264220, 35.7857610],
-        "prefecture": "東京都"
-    },
-    "渋川市": {
-        "population": 74000,
-        "center": [139.0003940, 36.4894800],
-        "prefecture": "群馬県"
-    },
-    "渋谷区": {
-        "population": 239000,
-        "center": [139.6979480, 35.6639820],
-        "prefecture": "東京都"
-    },
-    "港区": {
-        "population": 261000,
-        "center": [139.7515990, 35.6580710],
-        "prefecture": "東京都"
-    },
-    "湖西市": {
-        "population": 59000,
-        "center": [137.5316170, 34.7184740],
-        "prefecture": "静岡県"
-    },
-    "焼津市": {
-        "population": 138000,
-        "center": [138.3232600, 34.8669060],
-        "prefecture": "静岡県"
-    },
-    "熊本市": {
-        "population": 738000,
-        "center": [130.7078970, 32.8030780],
-        "prefecture": "熊本県"
-    },
-    "熊谷市": {
-        "population": 195000,
-        "center": [139.3886640, 36.1473620],
-        "prefecture": "埼玉県"
-    },
-    "狛江市": {
-        "population": 84000,
-        "center": [139.5786960, 35.6348140],
-        "prefecture": "東京都"
-    },
-    "狭山市": {
-        "population": 147000,
-        "center": [139.4122270, 35.8529070],
-        "prefecture": "埼玉県"
-    },
-    "甲府市": {
-        "population": 188000,
-        "center": [138.5683386, 35.6620333],
-        "prefecture": "山梨県"
-    },
-    "町田市": {
-        "population": 429000,
-        "center": [139.4385270, 35.5465590],
-        "prefecture": "東京都"
-    },
-    "白井市": {
-        "population": 63000,
-        "center": [140.0563720, 35.7915030],
-        "prefecture": "千葉県"
-    },
-    "白岡市": {
-        "population": 52000,
-        "center": [139.6768610, 36.0190700],
-        "prefecture": "埼玉県"
-    },
-    "白河市": {
-        "population": 59000,
-        "center": [140.2109230, 37.1263790],
-        "prefecture": "福島県"
-    },
-    "盛岡市": {
-        "population": 286000,
-        "center": [141.1541830, 39.7017950],
-        "prefecture": "岩手県"
-    },
-    "目黒区": {
-        "population": 288000,
-        "center": [139.6981180, 35.6414100],
-        "prefecture": "東京都"
-    },
-    "相模原市": {
-        "population": 725000,
-        "center": [139.3732680, 35.5713760],
-        "prefecture": "神奈川県"
-    },
-    "石巻市": {
-        "population": 138000,
-        "center": [141.3029060, 38.4344570],
-        "prefecture": "宮城県"
-    },
-    "石狩市": {
-        "population": 58000,
-        "center": [141.3155140, 43.1713650],
-        "prefecture": "北海道"
-    },
-    "磐田市": {
-        "population": 167000,
-        "center": [137.8515110, 34.7178810],
-        "prefecture": "静岡県"
-    },
-    "神戸市": {
-        "population": 1518000,
-        "center": [135.1957280, 34.6894950],
-        "prefecture": "兵庫県"
-    },
-    "福井市": {
-        "population": 262000,
-        "center": [136.2194520, 36.0641200],
-        "prefecture": "福井県"
-    },
-    "福山市": {
-        "population": 463000,
-        "center": [133.3623400, 34.4859270],
-        "prefecture": "広島県"
-    },
-    "福岡市": {
-        "population": 1633000,
-        "center": [130.4017350, 33.5903130],
-        "prefecture": "福岡県"
-    },
-    "福島市": {
-        "population": 278000,
-        "center": [140.4732690, 37.7607590],
-        "prefecture": "福島県"
-    },
-    "秋田市": {
-        "population": 300000,
-        "center": [140.1025120, 39.7199290],
-        "prefecture": "秋田県"
-    },
-    "稲城市": {
-        "population": 93000,
-        "center": [139.5046030, 35.6379380],
-        "prefecture": "東京都"
-    },
-    "稲沢市": {
-        "population": 135000,
-        "center": [136.7802160, 35.2481350],
-        "prefecture": "愛知県"
-    },
-    "立川市": {
-        "population": 184000,
-        "center": [139.4078460, 35.7139810],
-        "prefecture": "東京都"
-    },
-    "筑西市": {
-        "population": 100000,
-        "center": [139.9830690, 36.3071150],
-        "prefecture": "茨城県"
-    },
-    "網走市": {
-        "population": 35000,
-        "center": [144.2734220, 44.0206310],
-        "prefecture": "北海道"
-    },
-    "練馬区": {
-        "population": 752000,
-        "center": [139.6517250, 35.7356000],
-        "prefecture": "東京都"
-    },
-    "羽生市": {
-        "population": 54000,
-        "center": [139.5485920, 36.1726670],
-        "prefecture": "埼玉県"
-    },
-    "習志野市": {
-        "population": 175000,
-        "center": [140.0243840, 35.6829320],
-        "prefecture": "千葉県"
-    },
-    "船橋市": {
-        "population": 644000,
-        "center": [139.9826210, 35.6947110],
-        "prefecture": "千葉県"
-    },
-    "花巻市": {
-        "population": 94000,
-        "center": [141.1168540, 39.3886090],
-        "prefecture": "岩手県"
-    },
-    "苫小牧市": {
-        "population": 170000,
-        "center": [141.6055030, 42.6340940],
-        "prefecture": "北海道"
-    },
-    "茂原市": {
-        "population": 88000,
-        "center": [140.2880500, 35.4285400],
-        "prefecture": "千葉県"
-    },
-    "茅ヶ崎市": {
-        "population": 244000,
-        "center": [139.4047020, 35.3338790],
-        "prefecture": "神奈川県"
-    },
-    "茨木市": {
-        "population": 283000,
-        "center": [135.5685030, 34.8161530],
-        "prefecture": "大阪府"
-    },
-    "草加市": {
-        "population": 249000,
-        "center": [139.8053270, 35.8253710],
-        "prefecture": "埼玉県"
-    },
-    "草津市": {
-        "population": 141000,
-        "center": [135.9599940, 35.0131230],
-        "prefecture": "滋賀県"
-    },
-    "荒川区": {
-        "population": 218000,
-        "center": [139.7833720, 35.7360830],
-        "prefecture": "東京都"
-    },
-    "菊川市": {
-        "population": 48000,
-        "center": [138.0845390, 34.7577210],
-        "prefecture": "静岡県"
-    },
-    "葛飾区": {
-        "population": 464000,
-        "center": [139.8472130, 35.7434300],
-        "prefecture": "東京都"
-    },
-    "蓮田市": {
-        "population": 62000,
-        "center": [139.6622000, 35.9945040],
-        "prefecture": "埼玉県"
-    },
-    "藤枝市": {
-        "population": 145000,
-        "center": [138.2575480, 34.8673490],
-        "prefecture": "静岡県"
-    },
-    "藤沢市": {
-        "population": 438000,
-        "center": [139.4911160, 35.3389400],
-        "prefecture": "神奈川県"
-    },
-    "袋井市": {
-        "population": 89000,
-        "center": [137.9246240, 34.7501600],
-        "prefecture": "静岡県"
-    },
-    "袖ケ浦市": {
-        "population": 65000,
-        "center": [139.9543530, 35.4299450],
-        "prefecture": "千葉県"
-    },
-    "裾野市": {
-        "population": 51000,
-        "center": [138.9067240, 35.1738910],
-        "prefecture": "静岡県"
-    },
-    "西宮市": {
-        "population": 487000,
-        "center": [135.3418300, 34.7376910],
-        "prefecture": "兵庫県"
-    },
-    "西尾市": {
-        "population": 170000,
-        "center": [137.0617410, 34.8620090],
-        "prefecture": "愛知県"
-    },
-    "西東京市": {
-        "population": 207000,
-        "center": [139.5381590, 35.7254990],
-        "prefecture": "東京都"
-    },
-    "調布市": {
-        "population": 238000,
-        "center": [139.5406830, 35.6506280],
-        "prefecture": "東京都"
-    },
-    "諫早市": {
-        "population": 136000,
-        "center": [130.0536010, 32.8442080],
-        "prefecture": "長崎県"
-    },
-    "豊中市": {
-        "population": 400000,
-        "center": [135.4698890, 34.7812390],
-        "prefecture": "大阪府"
-    },
-    "豊島区": {
-        "population": 294000,
-        "center": [139.7154690, 35.7324370],
-        "prefecture": "東京都"
-    },
-    "豊川市": {
-        "population": 184000,
-        "center": [137.3755780, 34.8267840],
-        "prefecture": "愛知県"
-    },
-    "豊橋市": {
-        "population": 374000,
-        "center": [137.3914690, 34.7691990],
-        "prefecture": "愛知県"
-    },
-    "豊田市": {
-        "population": 423000,
-        "center": [137.1562240, 35.0823450],
-        "prefecture": "愛知県"
-    },
-    "越谷市": {
-        "population": 345000,
-        "center": [139.7909430, 35.8910870],
-        "prefecture": "埼玉県"
-    },
-    "足立区": {
-        "population": 695000,
-        "center": [139.8045840, 35.7749450],
-        "prefecture": "東京都"
-    },
-    "那覇市": {
-        "population": 321000,
-        "center": [127.6792180, 26.2122950],
-        "prefecture": "沖縄県"
-    },
-    "郡山市": {
-        "population": 323000,
-        "center": [140.3596500, 37.4004550],
-        "prefecture": "福島県"
-    },
-    "都城市": {
-        "population": 162000,
-        "center": [131.0614970, 31.7195190],
-        "prefecture": "宮崎県"
-    },
-    "酒田市": {
-        "population": 100000,
-        "center": [139.8365130, 38.9143860],
-        "prefecture": "山形県"
-    },
-    "野田市": {
-        "population": 154000,
-        "center": [139.8748280, 35.9551060],
-        "prefecture": "千葉県"
-    },
-    "金沢市": {
-        "population": 466000,
-        "center": [136.6566330, 36.5610510],
-        "prefecture": "石川県"
-    },
-    "釧路市": {
-        "population": 163000,
-        "center": [144.3816700, 42.9848560],
-        "prefecture": "北海道"
-    },
-    "鈴鹿市": {
-        "population": 196000,
-        "center": [136.5841850, 34.8818660],
-        "prefecture": "三重県"
-    },
-    "銚子市": {
-        "population": 58000,
-        "center": [140.8267910, 35.7346670],
-        "prefecture": "千葉県"
-    },
-    "鎌倉市": {
-        "population": 172000,
-        "center": [139.5466900, 35.3192280],
-        "prefecture": "神奈川県"
-    },
-    "長岡市": {
-        "population": 265000,
-        "center": [138.8512240, 37.4465870],
-        "prefecture": "新潟県"
-    },
-    "長崎市": {
-        "population": 407000,
-        "center": [129.8779060, 32.7503110],
-        "prefecture": "長崎県"
-    },
-    "長野市": {
-        "population": 369000,
-        "center": [138.1942866, 36.6486310],
-        "prefecture": "長野県"
-    },
-    "霧島市": {
-        "population": 124000,
-        "center": [130.7631360, 31.7410150],
-        "prefecture": "鹿児島県"
-    },
-    "青梅市": {
-        "population": 132000,
-        "center": [139.2749940, 35.7881710],
-        "prefecture": "東京都"
-    },
-    "青森市": {
-        "population": 270000,
-        "center": [140.7473200, 40.8223580],
-        "prefecture": "青森県"
-    },
-    "静岡市": {
-        "population": 689000,
-        "center": [138.3823880, 34.9754730],
-        "prefecture": "静岡県"
-    },
-    "須賀川市": {
-        "population": 75000,
-        "center": [140.3542720, 37.2894410],
-        "prefecture": "福島県"
-    },
-    "館山市": {
-        "population": 46000,
-        "center": [139.8700850, 34.9966080],
-        "prefecture": "千葉県"
-    },
-    "館林市": {
-        "population": 75000,
-        "center": [139.5420570, 36.2448410],
-        "prefecture": "群馬県"
-    },
-    "香取市": {
-        "population": 73000,
-        "center": [140.4992480, 35.8977300],
-        "prefecture": "千葉県"
-    },
-    "高岡市": {
-        "population": 165000,
-        "center": [137.0257170, 36.7540990],
-        "prefecture": "富山県"
-    },
-    "高崎市": {
-        "population": 372000,
-        "center": [139.0033550, 36.3219500],
-        "prefecture": "群馬県"
-    },
-    "高松市": {
-        "population": 416000,
-        "center": [134.0465740, 34.3427910],
-        "prefecture": "香川県"
-    },
-    "高槻市": {
-        "population": 348000,
-        "center": [135.6172160, 34.8461000],
-        "prefecture": "大阪府"
-    },
-    "高知市": {
-        "population": 327000,
-        "center": [133.5311660, 33.5587880],
-        "prefecture": "高知県"
-    },
-    "鳥取市": {
-        "population": 186000,
-        "center": [134.2350910, 35.5011330],
-        "prefecture": "鳥取県"
-    },
-    "鴨川市": {
-        "population": 32000,
-        "center": [140.0988050, 35.1140170],
-        "prefecture": "千葉県"
-    },
-    "鴻巣市": {
-        "population": 117000,
-        "center": [139.5221720, 36.0657580],
-        "prefecture": "埼玉県"
-    },
-    "鶴ヶ島市": {
-        "population": 70000,
-        "center": [139.3931260, 35.9345230],
-        "prefecture": "埼玉県"
-    },
-    "鶴岡市": {
-        "population": 123000,
-        "center": [139.8267250, 38.7271830],
-        "prefecture": "山形県"
-    },
-    "鹿児島市": {
-        "population": 595000,
-        "center": [130.5573390, 31.5967890],
-        "prefecture": "鹿児島県"
-    },
-    "鹿沼市": {
-        "population": 94000,
-        "center": [139.7450980, 36.5671200],
-        "prefecture": "栃木県"
-    },
-}
+import csv
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from pathlib import Path
+
+CITY_POPULATION_CSV = Path(__file__).with_name('city_population.csv')
+CSV_FIELDS = ['name', 'prefecture', 'population', 'longitude', 'latitude']
+
+
+@lru_cache(maxsize=None)
+def load_city_population(path=CITY_POPULATION_CSV):
+    """
+    CSVから都市データを読み込む（同じファイルは一度だけ読み込む）
+
+    Returns:
+        {市区町村名: {"population", "center": [経度, 緯度], "prefecture"}}
+    """
+    cities = {}
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            cities[row['name']] = {
+                "population": int(row['population']),
+                "center": [float(row['longitude']), float(row['latitude'])],
+                "prefecture": row['prefecture']
+            }
+    return cities
+
+
+def write_city_population(cities, path=CITY_POPULATION_CSV):
+    """都市データをCSVに保存（市区町村名の順、座標は小数点以下7桁）"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(CSV_FIELDS)
+        for name in sorted(cities):
+            data = cities[name]
+            lon, lat = data['center']
+            writer.writerow([name, data['prefecture'], data['population'], f"{lon:.7f}", f"{lat:.7f}"])
+
+    load_city_population.cache_clear()
+    _city_index.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _city_index():
+    """都道府県ごとの市区町村名と、人口の昇順に並べた (人口, 市区町村名) の索引"""
+    by_prefecture = {}
+    for name, data in load_city_population().items():
+        by_prefecture.setdefault(data['prefecture'], []).append(name)
+    by_population = sorted((data['population'], name) for name, data in load_city_population().items())
+    return by_prefecture, [population for population, _ in by_population], [name for _, name in by_population]
+
+
+def get_city(name):
+    """市区町村名で都市データを取得（なければ None）"""
+    return load_city_population().get(name)
+
+
+def cities_in_prefecture(prefecture):
+    """都道府県内の都市データを {市区町村名: データ} で取得"""
+    cities = load_city_population()
+    return {name: cities[name] for name in _city_index()[0].get(prefecture, [])}
+
+
+def cities_by_population(min_population=None, max_population=None):
+    """人口が min_population 以上 max_population 以下の都市データを、人口の昇順に {市区町村名: データ} で取得"""
+    _, populations, names = _city_index()
+    start = 0 if min_population is None else bisect_left(populations, min_population)
+    stop = len(populations) if max_population is None else bisect_right(populations, max_population)
+    cities = load_city_population()
+    return {name: cities[name] for name in names[start:stop]}
+
 
+def __getattr__(name):
+    # CITY_POPULATION_30K_PLUS は参照されたときに初めてCSVを読み込む
+    if name == 'CITY_POPULATION_30K_PLUS':
+        return load_city_population()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
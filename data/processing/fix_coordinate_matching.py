@@ -7,6 +7,8 @@
 import pandas as pd
 import json
 
+from fetch_city_population import write_city_population
+
 def load_city_population():
     """既存の人口データを読み込み"""
     from fetch_city_population import CITY_POPULATION_30K_PLUS
@@ -132,35 +134,12 @@ def match_with_prefecture_awareness(city_pop, coords_by_pref, df_all):
 
 def save_final_output(updated_data):
     """最終的な更新ファイルを生成"""
-    output_path = 'fetch_city_population_FINAL.py'
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write('"""\n')
-        f.write('人口30,000人以上の都市データ\n')
-        f.write('\n')
-        f.write('人口データ: 2024年推計\n')
-        f.write('座標データ: 国土数値情報 市町村役場データ（2014年度）\n')
-        f.write('出典: https://nlftp.mlit.go.jp/ksj/gml/datalist/KsjTmplt-P34.html\n')
-        f.write('更新日: 2026-01-19\n')
-        f.write('"""\n\n')
-        f.write('CITY_POPULATION_30K_PLUS = {\n')
-
-        for city in sorted(updated_data.keys()):
-            data = updated_data[city]
-            pop = data['population']
-            lon, lat = data['center']
-            pref = data['prefecture']
-
-            f.write(f'    "{city}": {{\n')
-            f.write(f'        "population": {pop},\n')
-            f.write(f'        "center": [{lon:.7f}, {lat:.7f}],\n')
-            f.write(f'        "prefecture": "{pref}"\n')
-            f.write(f'    }},\n')
-
-        f.write('}\n')
+    output_path = 'city_population_FINAL.csv'
+
+    write_city_population(updated_data, output_path)
 
     print(f"\n✅ 最終ファイル生成: {output_path}")
-    print(f"   内容を確認後、fetch_city_population.pyと置き換えてください")
+    print("   内容を確認後、city_population.csvと置き換えてください")
 
 def main():
     print("\n🗾 座標修正処理（都道府県考慮版）\n")
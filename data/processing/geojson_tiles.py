@@ -0,0 +1,171 @@
+"""
+GeoJSONのタイル分割とマニフェストの作成
+
+全国分を1つのGeoJSONにすると、ブラウザは全体をダウンロードするまで描画できません。
+統合済みのジオメトリを1次メッシュの格子、または都道府県などの区域ごとに切り取って
+別々のファイルに保存し、各タイルの範囲・サイズ・頂点数をまとめたマニフェストを作ります。
+フロントエンドやバックエンドの /api/geojson/:dataset/tiles は、マニフェストから表示範囲内の
+タイルだけを選んで読み込めます。
+"""
+
+import json
+import math
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely.geometry import mapping
+
+# 1次メッシュの大きさ（度）
+MESH_LAT = 2 / 3
+MESH_LON = 1.0
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def mesh_tiles(bounds):
+    """
+    範囲と重なる1次メッシュを (メッシュコード, 矩形) のリストで返す
+
+    Args:
+        bounds: (min_lon, min_lat, max_lon, max_lat)
+    """
+    minx, miny, maxx, maxy = bounds
+    tiles = []
+    for row in range(math.floor(miny / MESH_LAT), math.ceil(maxy / MESH_LAT)):
+        for col in range(math.floor(minx / MESH_LON), math.ceil(maxx / MESH_LON)):
+            code = f"{row:02d}{col - 100:02d}"
+            tiles.append((code, shapely.box(col * MESH_LON, row * MESH_LAT,
+                                            (col + 1) * MESH_LON, (row + 1) * MESH_LAT)))
+    return tiles
+
+
+def load_region_tiles(path, key):
+    """
+    区域のポリゴン（都道府県界など）を読み込み、(区域ID, ジオメトリ) のリストで返す
+
+    同じIDのポリゴン（島など）は1つにまとめる
+
+    Args:
+        path: 区域のポリゴンのファイル（GeoJSON・Shapefileなど）
+        key: 区域IDのカラム名（国土数値情報の行政区域なら N03_001 など）
+    """
+    regions = gpd.read_file(path)
+    if key not in regions.columns:
+        raise ValueError(f"区域IDのカラムが見つかりません: {key}（利用可能なカラム: {list(regions.columns)}）")
+    if regions.crs is not None and regions.crs != "EPSG:4326":
+        regions = regions.to_crs("EPSG:4326")
+    regions = regions[[key, 'geometry']].dissolve(by=key, as_index=False)
+    return [(str(region), geometry) for region, geometry in zip(regions[key], regions.geometry)]
+
+
+def clip_to_tile(parts, tree, tile):
+    """
+    ポリゴンの配列のうちタイルと重なる部分を切り取る
+
+    Returns:
+        (切り取ったポリゴンの配列, 元の部分のインデックス)
+    """
+    candidates = tree.query(tile, predicate='intersects')
+    if len(candidates) == 0:
+        return np.empty(0, dtype=object), candidates
+
+    # タイルに完全に含まれる部分はそのまま、境界をまたぐ部分だけを切り取る
+    inside = shapely.covered_by(parts[candidates], tile)
+    clipped = parts[candidates].copy()
+    clipped[~inside] = shapely.intersection(parts[candidates[~inside]], tile)
+    polygons, index = shapely.get_parts(clipped, return_index=True)
+    polygonal = shapely.get_type_id(polygons) == shapely.GeometryType.POLYGON
+    polygonal &= ~shapely.is_empty(polygons)
+    return polygons[polygonal], candidates[index[polygonal]]
+
+
+def rounded_bounds(bounds, digits=6):
+    """範囲を小数点以下 digits 桁に外側へ丸める（丸めた範囲が元の範囲を含むように）"""
+    scale = 10 ** digits
+    minx, miny, maxx, maxy = bounds
+    return [math.floor(minx * scale) / scale, math.floor(miny * scale) / scale,
+            math.ceil(maxx * scale) / scale, math.ceil(maxy * scale) / scale]
+
+
+def iter_tile_collections(gdf, tiles):
+    """
+    GeoDataFrame をタイルごとに切り取る（重なる部分がないタイルは除く）
+
+    Args:
+        gdf: 切り取るGeoDataFrame（EPSG:4326、geometry以外のカラムはプロパティになる）
+        tiles: (タイルID, ジオメトリ) のリスト（mesh_tiles / load_region_tiles の戻り値）
+
+    Yields:
+        (タイルID, 切り取ったポリゴンの配列, タイルのFeatureCollectionの辞書)
+    """
+    properties = gdf.drop(columns=gdf.geometry.name).to_dict('records')
+    parts, owners = shapely.get_parts(gdf.geometry.values, return_index=True)
+    tree = shapely.STRtree(parts)
+
+    for tile_id, tile in tiles:
+        polygons, index = clip_to_tile(parts, tree, tile)
+        if len(polygons) == 0:
+            continue
+
+        # フィーチャーごとに切り取った部分をまとめる（元のフィーチャーの順）
+        feature_index = owners[index]
+        features = []
+        for feature in np.unique(feature_index):
+            geometry = shapely.multipolygons(polygons[feature_index == feature])
+            features.append({
+                "type": "Feature",
+                "properties": properties[feature],
+                "geometry": mapping(geometry)
+            })
+        yield tile_id, polygons, {"type": "FeatureCollection", "features": features}
+
+
+def write_tiles(gdf, tiles, output_dir):
+    """
+    GeoDataFrame をタイルごとに切り取ってGeoJSONとして保存し、マニフェストを作る
+
+    Args:
+        gdf: 保存するGeoDataFrame（EPSG:4326、geometry以外のカラムはプロパティになる）
+        tiles: (タイルID, ジオメトリ) のリスト（mesh_tiles / load_region_tiles の戻り値）
+        output_dir: 出力ディレクトリ（タイルは {タイルID}.json、マニフェストは manifest.json）
+
+    Returns:
+        マニフェストの辞書
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    entries = []
+    for tile_id, polygons, collection in iter_tile_collections(gdf, tiles):
+        path = output_dir / f"{tile_id}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(collection, f, ensure_ascii=False, indent=2)
+
+        entries.append({
+            "id": tile_id,
+            "path": path.name,
+            "bounds": rounded_bounds(shapely.total_bounds(polygons)),
+            "bytes": path.stat().st_size,
+            "vertices": int(shapely.get_num_coordinates(polygons).sum()),
+            "features": len(collection["features"]),
+        })
+
+    bounds = np.array([entry["bounds"] for entry in entries]).reshape(-1, 4)
+    manifest = {
+        "type": "TileManifest",
+        "bounds": [*bounds[:, :2].min(axis=0), *bounds[:, 2:].max(axis=0)] if entries else None,
+        "bytes": sum(entry["bytes"] for entry in entries),
+        "vertices": sum(entry["vertices"] for entry in entries),
+        "tiles": entries,
+    }
+    with open(output_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    return manifest
+
+
+def tile_output_dir(output_path):
+    """出力GeoJSONのパスから、タイルを保存するディレクトリを決める（拡張子を除いたパス）"""
+    return Path(output_path).with_suffix('')
@@ -0,0 +1,88 @@
+"""
+Natural Earthの陸地ポリゴンによるタイルの間引き
+
+タイル範囲のうち陸地と重ならない（海しかない）タイルを事前に除外します。
+"""
+
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+# 展開済みのShapefile、なければ同梱のZIPから読み込む
+LAND_SHAPEFILE = Path('../raw/natural_earth/ne_10m_land.shp')
+LAND_ZIP = Path('../raw/ne_land.zip')
+
+
+def load_land_mask(bbox, path=None):
+    """
+    バウンディングボックス内の陸地ポリゴンを読み込む
+
+    Args:
+        bbox: [min_lon, min_lat, max_lon, max_lat]
+        path: 陸地データのパス（省略時は ../raw のNatural Earthデータ）
+
+    Returns:
+        陸地のジオメトリ（見つからなければ None）
+    """
+    if path is None:
+        if LAND_SHAPEFILE.exists():
+            path = str(LAND_SHAPEFILE)
+        elif LAND_ZIP.exists():
+            path = f"zip://{LAND_ZIP}!ne_10m_land.shp"
+        else:
+            print(f"警告: 陸地データが見つかりません（{LAND_SHAPEFILE} / {LAND_ZIP}）")
+            return None
+
+    print(f"陸地データを読み込み中: {path}")
+    gdf = gpd.read_file(path, bbox=tuple(bbox))
+    if gdf.crs is not None and gdf.crs != "EPSG:4326":
+        gdf = gdf.to_crs("EPSG:4326")
+
+    if gdf.empty:
+        return None
+
+    land = shapely.union_all(gdf.geometry.values)
+    shapely.prepare(land)
+    return land
+
+
+def tile_boxes(tiles, zoom, margin=0.0):
+    """
+    タイル座標の配列から経緯度の矩形を一括生成
+
+    Args:
+        tiles: (x, y) のリスト
+        zoom: ズームレベル
+        margin: 矩形を広げる量（タイル幅に対する割合）
+    """
+    xy = np.asarray(tiles, dtype=np.float64).reshape(-1, 2)
+    n = 2.0 ** zoom
+
+    def lon(tx):
+        return tx / n * 360.0 - 180.0
+
+    def lat(ty):
+        return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * ty / n))))
+
+    x0, y0 = xy[:, 0] - margin, xy[:, 1] - margin
+    x1, y1 = xy[:, 0] + 1 + margin, xy[:, 1] + 1 + margin
+    return shapely.box(lon(x0), lat(y1), lon(x1), lat(y0))
+
+
+def prune_tiles(tiles, zoom, land, margin=0.1):
+    """
+    陸地と重ならないタイルを除外
+
+    タイルのバッファ領域や海岸線の精度を考慮し、タイルを margin だけ広げて判定する
+
+    Returns:
+        (残すタイルのリスト, 除外したタイル数)
+    """
+    if land is None or not tiles:
+        return list(tiles), 0
+
+    hits = shapely.intersects(land, tile_boxes(tiles, zoom, margin))
+    kept = [tile for tile, hit in zip(tiles, hits) if hit]
+    return kept, len(tiles) - len(kept)
@@ -0,0 +1,111 @@
+"""
+土地利用コードの分類表
+
+国土数値情報の土地利用分類コードを、フロントエンドのスタイルごとのカテゴリに
+まとめる表です。1回の読み込みで複数の分類（スキーム）を同時に作れるように、
+コードの種類ごとに表を引いてから配列のインデックスで全行に展開します。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 土地利用分類コード（国土数値情報）
+# 01: 田, 02: 畑, 03: 果樹園, 05: 森林, 06: 荒地
+# 07: 建物用地, 09: 幹線交通用地, 11: その他の用地
+# 14: 河川地及び湖沼, 15: 海浜, 16: 海水域
+#
+# {スキーム名: {カテゴリ: [コード]}}（表にないコードは出力しない）
+CLASSIFICATION_SCHEMES = {
+    # simple-landcover / gsi-landcover（建物用地や道路は除外）
+    'landcover': {
+        'forest': ['05'],
+        'grassland': ['01', '02', '03', '06'],
+        'water': ['14', '15', '16'],
+    },
+    # landuse1-style（建物用地は住宅・商業・工業を区別できないため residential にまとめる）
+    'landuse1': {
+        'farmland': ['01', '02', '03'],
+        'forest': ['05'],
+        'residential': ['07'],
+    },
+    # landuse2-style
+    'landuse2': {
+        'urban': ['07', '09'],
+        'agriculture': ['01', '02', '03', '06'],
+        'green': ['05'],
+    },
+    # landcover2-style
+    'landcover2': {
+        'water': ['14', '15', '16'],
+        'forest': ['05'],
+        'grass': ['06'],
+        'farmland': ['01', '02', '03'],
+    },
+}
+
+DEFAULT_SCHEME = 'landcover'
+
+# 土地利用細分メッシュ（L03-b の L03b_002）の4桁のコードと、上の表のコードの対応
+# 0100: 田, 0200: その他の農用地, 0500: 森林, 0600: 荒地, 0700: 建物用地, 0901: 道路, 0902: 鉄道,
+# 1000: その他の用地, 1100: 河川地及び湖沼, 1400: 海浜, 1500: 海水域, 1600: ゴルフ場
+MESH_CODE_ALIASES = {
+    '0100': '01',
+    '0200': '02',
+    '0500': '05',
+    '0600': '06',
+    '0700': '07',
+    '0901': '09',
+    '0902': '09',
+    '1000': '11',
+    '1100': '14',
+    '1400': '15',
+    '1500': '16',
+    '1600': '11',
+}
+
+
+def normalize_code(code):
+    """土地利用コードを表のキーの形式（2桁の文字列）にそろえる（L03-b の4桁のコードは対応するコードに変換）"""
+    code = str(code).strip()
+    if len(code) > 2 and code.isdigit():
+        return MESH_CODE_ALIASES.get(code.zfill(4), code)
+    return code.zfill(2)
+
+
+def scheme_categories(scheme):
+    """スキームのカテゴリ名（dissolve と同じ名前順、カテゴリ番号は1から）"""
+    return sorted(CLASSIFICATION_SCHEMES[scheme])
+
+
+def classify(codes, schemes):
+    """
+    土地利用コードの列を、各スキームのカテゴリ番号の配列に一度に変換
+
+    コードの種類は少ないため、種類ごとに表を引いてから全行に展開する
+
+    Args:
+        codes: 土地利用コードの配列（pandas.Seriesなど）
+        schemes: スキーム名のイテラブル
+
+    Returns:
+        {スキーム名: カテゴリ番号の配列（uint8、0は対象外。番号は scheme_categories の順で1から）}
+    """
+    inverse, uniques = pd.factorize(np.asarray(codes, dtype=object), use_na_sentinel=False)
+    keys = [normalize_code(code) for code in uniques]
+
+    result = {}
+    for scheme in schemes:
+        table = {
+            code: i + 1
+            for i, name in enumerate(scheme_categories(scheme))
+            for code in CLASSIFICATION_SCHEMES[scheme][name]
+        }
+        lookup = np.array([table.get(key, 0) for key in keys], dtype=np.uint8)
+        result[scheme] = lookup[inverse]
+    return result
+
+
+def category_names(ids, scheme):
+    """カテゴリ番号の配列をカテゴリ名の配列（対象外は None）に変換"""
+    names = np.array([None] + scheme_categories(scheme), dtype=object)
+    return names[ids]
@@ -0,0 +1,233 @@
+"""
+土地利用細分メッシュ（100mメッシュ）のラスター処理
+
+土地利用細分メッシュは緯度3秒 × 経度4.5秒の規則的な格子なので、各メッシュを
+ポリゴンとして結合する代わりに、カテゴリの配列に並べてから、カテゴリの境界になる
+格子の辺をたどってポリゴンを作ります。
+"""
+
+import numpy as np
+import shapely
+
+# 100mメッシュの大きさ（1度あたりのセル数）
+CELLS_PER_DEGREE_LAT = 1200  # 緯度3秒
+CELLS_PER_DEGREE_LON = 800   # 経度4.5秒
+LON_ORIGIN = 100             # メッシュコードの経度の基準（度）
+
+# 1次メッシュ（緯度40分 × 経度1度）あたりのセル数
+FIRST_MESH_CELLS = 800
+
+
+def mesh_code_to_indices(codes):
+    """
+    10桁の100mメッシュコードを格子の (行, 列) に変換
+
+    コードは 1次メッシュ（緯度2桁・経度2桁）、2次メッシュ（各1桁、0-7）、
+    3次メッシュ（各1桁、0-9）、100mメッシュ（各1桁、0-9）の順に並ぶ
+
+    Args:
+        codes: メッシュコードの配列（文字列または整数）
+
+    Returns:
+        (rows, cols): 南西端を (0, 0) とした緯度方向・経度方向のセル番号（int64）
+    """
+    codes = np.asarray(codes).astype(np.int64)
+    if len(codes) and (codes.min() < 10 ** 9 or codes.max() >= 10 ** 10):
+        raise ValueError("100mメッシュ（10桁）のメッシュコードではありません")
+
+    digits = [(codes // 10 ** i) % 10 for i in range(10)]
+    lat1 = codes // 10 ** 8
+    lon1 = (codes // 10 ** 6) % 100
+    rows = lat1 * FIRST_MESH_CELLS + digits[5] * 100 + digits[3] * 10 + digits[1]
+    cols = lon1 * FIRST_MESH_CELLS + digits[4] * 100 + digits[2] * 10 + digits[0]
+    return rows, cols
+
+
+def point_to_indices(lon, lat):
+    """経緯度（度）をその点を含むセルの (行, 列) に変換"""
+    rows = np.floor(np.asarray(lat) * CELLS_PER_DEGREE_LAT).astype(np.int64)
+    cols = np.floor((np.asarray(lon) - LON_ORIGIN) * CELLS_PER_DEGREE_LON).astype(np.int64)
+    return rows, cols
+
+
+def _runs(edges, breaks):
+    """
+    境界の単位辺を、分岐点で区切った連続区間 [start, end) に変換（各行ごと）
+
+    Args:
+        edges: 単位辺の有無（行ごとに左から右）
+        breaks: 区間を区切る頂点（edgesより1列多い）
+
+    Returns:
+        (行, 開始, 終了) のインデックス配列
+    """
+    prev = np.zeros_like(edges)
+    prev[:, 1:] = edges[:, :-1]
+    following = np.zeros_like(edges)
+    following[:, :-1] = edges[:, 1:]
+    rows, starts = np.nonzero(edges & (~prev | breaks[:, :-1]))
+    _, ends = np.nonzero(edges & (~following | breaks[:, 1:]))
+    return rows, starts, ends + 1
+
+
+def mask_to_polygons(mask):
+    """
+    真偽値の配列の True の領域をポリゴンに変換（座標はセル番号、頂点は格子点）
+
+    True と False の境界になる格子の辺を、曲がり角や交点で区切った直線にまとめ、
+    polygonize で面を作ってから True の面だけを残す
+
+    Returns:
+        ポリゴンの配列（斜めに接するものは別のポリゴン）
+    """
+    height, width = mask.shape
+    padded = np.zeros((height + 2, width + 2), dtype=bool)
+    padded[1:-1, 1:-1] = mask
+    horizontal = padded[:-1, 1:-1] != padded[1:, 1:-1]  # 行 i の下辺（y = i）、x = j から j + 1
+    vertical = padded[1:-1, :-1] != padded[1:-1, 1:]    # 列 j の左辺（x = j）、y = i から i + 1
+    if not horizontal.any():
+        return np.empty(0, dtype=object)
+
+    # 各格子点に縦・横の辺が接しているか（直線を区切る位置）
+    vertical_at = np.zeros((height + 1, width + 1), dtype=bool)
+    vertical_at[:-1] |= vertical
+    vertical_at[1:] |= vertical
+    horizontal_at = np.zeros((height + 1, width + 1), dtype=bool)
+    horizontal_at[:, :-1] |= horizontal
+    horizontal_at[:, 1:] |= horizontal
+
+    h_rows, h_starts, h_ends = _runs(horizontal, vertical_at)
+    v_cols, v_starts, v_ends = _runs(vertical.T, horizontal_at.T)
+    segments = np.concatenate([
+        np.column_stack([h_starts, h_rows, h_ends, h_rows]),
+        np.column_stack([v_cols, v_starts, v_cols, v_ends]),
+    ]).astype(float)
+
+    lines = shapely.linestrings(segments.reshape(-1, 2), indices=np.repeat(np.arange(len(segments)), 2))
+    faces = shapely.get_parts(shapely.polygonize(lines))
+
+    # 穴やFalseの領域も面になるため、面の内部の点がTrueのセルにあるものだけを残す
+    points = shapely.point_on_surface(faces)
+    inside = mask[np.floor(shapely.get_y(points)).astype(int), np.floor(shapely.get_x(points)).astype(int)]
+    return faces[inside]
+
+
+def to_lonlat(geometries, row0, col0):
+    """セル番号の座標を経緯度（度）に変換"""
+    return shapely.transform(geometries, lambda xy: np.column_stack([
+        LON_ORIGIN + (col0 + xy[:, 0]) / CELLS_PER_DEGREE_LON,
+        (row0 + xy[:, 1]) / CELLS_PER_DEGREE_LAT,
+    ]))
+
+
+def rasterize_cells(rows, cols, values, block=FIRST_MESH_CELLS):
+    """
+    セルを1次メッシュ単位の配列に並べ、順に (grid, row0, col0) を返すジェネレータ
+
+    全国を1つの配列にすると数億セルになるため、1次メッシュごとに分けてメモリを抑える。
+    同じセルが複数ある場合は後のものを使う
+
+    Args:
+        rows, cols: セル番号の配列
+        values: カテゴリ番号の配列（1以上、uint8に収まる値）
+        block: 1つの配列にまとめるセル数（縦横）
+    """
+    rows = np.asarray(rows)
+    cols = np.asarray(cols)
+    values = np.asarray(values, dtype=np.uint8)
+    if len(rows) == 0:
+        return
+
+    blocks = (rows // block).astype(np.int64) * (1 << 32) + cols // block
+    order = np.argsort(blocks, kind='stable')
+    bounds = np.flatnonzero(np.diff(blocks[order])) + 1
+
+    for chunk in np.split(order, bounds):
+        row0 = rows[chunk[0]] // block * block
+        col0 = cols[chunk[0]] // block * block
+        grid = np.zeros((block, block), dtype=np.uint8)
+        grid[rows[chunk] - row0, cols[chunk] - col0] = values[chunk]
+        yield grid, row0, col0
+
+
+def cells_to_polygons(rows, cols, values, categories, block=FIRST_MESH_CELLS):
+    """
+    セルをカテゴリごとに結合したジオメトリに変換
+
+    1次メッシュごとにポリゴンを作り、ブロックの境界に接するものだけを最後に結合する
+    （格子点の座標はセル番号から計算するため、隣のブロックと辺が完全に一致する）
+
+    Args:
+        rows, cols: セル番号の配列
+        values: カテゴリ番号の配列（categories以外の値は無視）
+        categories: 出力するカテゴリ番号のイテラブル
+
+    Returns:
+        {カテゴリ番号: 結合したMultiPolygon（経緯度、メッシュの測地系）}
+    """
+    inner = {category: [] for category in categories}
+    edge = {category: [] for category in categories}
+    for grid, row0, col0 in rasterize_cells(rows, cols, values, block):
+        for category in inner:
+            polygons = mask_to_polygons(grid == category)
+            if len(polygons) == 0:
+                continue
+            bounds = shapely.bounds(polygons)
+            on_edge = (bounds[:, :2] == 0).any(axis=1) | (bounds[:, 2:] == block).any(axis=1)
+            inner[category].append(to_lonlat(polygons[~on_edge], row0, col0))
+            edge[category].append(to_lonlat(polygons[on_edge], row0, col0))
+
+    merged = {}
+    for category in inner:
+        if not inner[category]:
+            continue
+        parts = [np.concatenate(inner[category])]
+        seams = np.concatenate(edge[category])
+        if len(seams):
+            parts.append(shapely.get_parts(shapely.union_all(seams)))
+        merged[category] = shapely.multipolygons(np.concatenate(parts))
+    return merged
+
+
+def connected_components(count, left, right):
+    """
+    辺 (left[i], right[i]) でつながった頂点のまとまりごとの番号（まとまり内の最小の頂点番号）を返す
+    """
+    labels = np.arange(count)
+    while True:
+        low = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, low)
+        np.minimum.at(updated, right, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def union_touching(parts, groups=None, executor=None):
+    """
+    ポリゴンの配列のうち、他と接したり重なったりしているものだけを結合してMultiPolygonにする
+
+    接しているポリゴンのまとまりごとに結合するため、executor を指定するとまとまりを並列に結合できる
+
+    Args:
+        parts: ポリゴンの配列
+        groups: 各ポリゴンのグループ番号（指定すると、同じグループどうしは結合済みとみなし、
+                異なるグループと接するものだけを結合する）
+        executor: concurrent.futures の Executor（省略時は現在のプロセスで結合）
+    """
+    left, right = shapely.STRtree(parts).query(parts, predicate='intersects')
+    pairs = left != right if groups is None else groups[left] != groups[right]
+    if pairs.any():
+        left, right = left[pairs], right[pairs]
+        indices = np.unique(left)
+        labels = connected_components(len(parts), left, right)[indices]
+        order = np.argsort(labels, kind='stable')
+        components = np.split(parts[indices[order]], np.flatnonzero(np.diff(labels[order])) + 1)
+
+        mapper = executor.map if executor is not None else map
+        merged = [shapely.get_parts(geometry) for geometry in mapper(shapely.union_all, components)]
+        parts = np.concatenate([np.delete(parts, indices)] + merged)
+    return shapely.multipolygons(parts)
+
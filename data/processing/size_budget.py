@@ -0,0 +1,124 @@
+"""
+出力サイズの予算に合わせた簡略化の許容度の探索
+
+許容度を試しながら手で調整する代わりに、GeoJSONのバイト数または頂点数の上限を指定すると、
+準備済みのジオメトリ（読み込み・統合済み）を繰り返し簡略化して、上限に収まる最小の許容度を探します。
+"""
+
+import json
+import math
+import os
+import re
+
+import shapely
+
+from cost_estimate import format_bytes
+
+# 探索する許容度の範囲（度）と、探索を打ち切る許容度の比
+MIN_TOLERANCE = 1e-6
+MAX_TOLERANCE = 1.0
+TOLERANCE_PRECISION = 1.05
+
+SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+class BudgetError(ValueError):
+    """最大の許容度でも予算に収まらない"""
+
+
+def parse_size(text):
+    """"2MB"・"500KB"・"1500000" のようなサイズの指定をバイト数に変換"""
+    match = re.fullmatch(r'\s*([0-9.]+)\s*([KMG]?B?)\s*', str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"サイズの指定が正しくありません: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_budgets(sizes=None, vertices=None):
+    """
+    コマンドラインの --max-size / --max-vertices を予算の辞書に変換
+
+    Returns:
+        {ラベル（出力ファイル名に使う）: (種類 'bytes' / 'vertices', 上限)}
+    """
+    budgets = {}
+    for text in sizes or []:
+        budgets[str(text).replace(' ', '')] = ('bytes', parse_size(text))
+    for count in vertices or []:
+        budgets[f"{count}v"] = ('vertices', int(count))
+    return budgets
+
+
+def format_budget(budget):
+    """予算を表示用の文字列に変換"""
+    kind, limit = budget
+    return format_bytes(limit) if kind == 'bytes' else f"{limit:,} 頂点"
+
+
+def geojson_bytes(geojson):
+    """json.dump(ensure_ascii=False, indent=2) でテキストとして保存したときのファイルサイズ"""
+    text = json.dumps(geojson, ensure_ascii=False, indent=2)
+    # Windowsではテキストモードの改行が2バイトになる
+    newline_bytes = text.count('\n') * (len(os.linesep) - 1)
+    return len(text.encode('utf-8')) + newline_bytes
+
+
+def measure_output(kind, geometries, to_geojson):
+    """
+    予算の種類に応じて出力の大きさを測る
+
+    Args:
+        kind: 'bytes'（GeoJSONのファイルサイズ）または 'vertices'（頂点数）
+        geometries: 出力するジオメトリの配列
+        to_geojson: 出力するGeoJSONの辞書を返す関数（'bytes' のときだけ呼ぶ）
+    """
+    if kind == 'vertices':
+        return int(shapely.get_num_coordinates(geometries).sum())
+    return geojson_bytes(to_geojson())
+
+
+def search_tolerance(simplify, measure, limit, low=MIN_TOLERANCE, high=MAX_TOLERANCE):
+    """
+    measure(simplify(許容度)) が limit 以下になる最小の許容度を探す
+
+    許容度を大きくするほど出力は小さくなるため、low と high の間を対数で二分探索する。
+    simplify は準備済みのジオメトリから毎回簡略化する関数で、入力の読み直しや統合はしない
+
+    Returns:
+        (許容度, simplify の結果, 計測値)。high でも limit を超える場合は high の結果
+    """
+    result = simplify(high)
+    best = (high, result, measure(result))
+    if best[2] > limit:
+        return best
+
+    result = simplify(low)
+    value = measure(result)
+    if value <= limit:
+        return low, result, value
+
+    while high / low > TOLERANCE_PRECISION:
+        middle = math.sqrt(low * high)
+        result = simplify(middle)
+        value = measure(result)
+        if value <= limit:
+            high = middle
+            best = (middle, result, value)
+        else:
+            low = middle
+    return best
+
+
+def report_budget(budget, tolerance, value):
+    """
+    探索結果（許容度と達成したサイズ）を表示
+
+    予算に収まらない（search_tolerance が high の結果を返した）場合は、予算を超えたファイルを
+    出力しないよう BudgetError を送出する。メッセージの大きさがその簡略化で出力できる最小の大きさ
+    """
+    kind, limit = budget
+    achieved = format_budget((kind, value))
+    if value > limit:
+        raise BudgetError(f"許容度 {tolerance:g} でも {achieved} で、予算 {format_budget(budget)} に収まりません"
+                          f"（予算を {achieved} 以上にしてください）")
+    print(f"許容度 {tolerance:.3g}: {achieved}（予算 {format_budget(budget)}）")
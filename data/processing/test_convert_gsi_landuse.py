@@ -0,0 +1,104 @@
+"""
+convert_gsi_landuse のテスト
+
+土地利用細分メッシュ（L03-b）と同じカラム（L03b_001: 100mメッシュコード、L03b_002: 4桁の土地利用コード）の
+小さなShapefileを作って変換する
+"""
+
+import json
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from convert_gsi_landuse import convert_landuse_raster, find_code_column, save_landuse_lods
+from geojson_tiles import mesh_tiles
+from landuse_mesh import mesh_code_to_indices
+from size_budget import BudgetError
+
+# 3 × 3 セル（1次メッシュ 5339、2次メッシュ 45、3次メッシュ 00 の中の100mメッシュ）の土地利用コード
+L03B_CODES = [
+    ['0500', '0500', '0100'],
+    ['0500', '0700', '0100'],
+    ['1100', '1100', '0901'],
+]
+
+
+def write_l03b_mesh(path):
+    codes = [f"53394500{row}{col}" for row in range(3) for col in range(3)]
+    rows, cols = mesh_code_to_indices(codes)
+    gdf = gpd.GeoDataFrame(
+        {'L03b_001': codes, 'L03b_002': [code for line in L03B_CODES for code in line]},
+        geometry=shapely.box(100 + cols / 800, rows / 1200, 100 + (cols + 1) / 800, (rows + 1) / 1200),
+        crs="EPSG:6668",
+    )
+    gdf.to_file(path)
+    return gdf
+
+
+def test_find_code_column_prefers_l03b_landuse_code():
+    assert find_code_column(['L03b_001', 'L03b_002']) == 'L03b_002'
+
+
+def test_convert_landuse_raster_l03b_mesh(tmp_path):
+    write_l03b_mesh(tmp_path / 'L03-b.shp')
+    output_path = tmp_path / 'gsi-landcover.json'
+
+    convert_landuse_raster(str(tmp_path / 'L03-b.shp'), {'landcover': {0.0: str(output_path)}})
+
+    with open(output_path, encoding='utf-8') as f:
+        features = json.load(f)['features']
+    cell_area = 1 / 800 * 1 / 1200
+    areas = {feature['properties']['type']: shapely.geometry.shape(feature['geometry']).area for feature in features}
+
+    # 建物用地（0700）と道路（0901）は landcover の対象外
+    assert set(areas) == {'forest', 'grassland', 'water'}
+    assert np.isclose(areas['forest'], 3 * cell_area)
+    assert np.isclose(areas['grassland'], 2 * cell_area)
+    assert np.isclose(areas['water'], 2 * cell_area)
+
+
+def scattered_landuse():
+    """大きな森林の中に、大きさの違う小さな水面が点在する統合済みのジオメトリ"""
+    sizes = 0.0005 * np.arange(1, 65)
+    ponds = [shapely.box(140 + i / 10, 36 + j / 10, 140 + i / 10 + size, 36 + j / 10 + size)
+             for (i, j), size in zip(np.ndindex(8, 8), sizes)]
+    ponds.append(shapely.box(140.14, 36.14, 140.19, 36.19))
+    water = shapely.union_all(ponds)
+    return {'forest': shapely.box(140, 36, 141, 37).difference(water), 'water': water}
+
+
+def test_save_landuse_lods_drops_small_faces_to_meet_budget(tmp_path):
+    output_path = tmp_path / 'gsi-landcover.json'
+
+    save_landuse_lods(scattered_landuse(), "EPSG:4326", {('vertices', 100): str(output_path)})
+
+    with open(output_path, encoding='utf-8') as f:
+        geometries = {feature['properties']['type']: shapely.geometry.shape(feature['geometry'])
+                      for feature in json.load(f)['features']}
+    assert shapely.get_num_coordinates(list(geometries.values())).sum() <= 100
+    # 小さな水面は除かれても、最も大きい水面は残り、除いた水面の部分は森林で埋まる
+    assert set(geometries) == {'forest', 'water'}
+    assert geometries['water'].intersects(shapely.Point(140.165, 36.165))
+    assert geometries['forest'].intersects(shapely.Point(140.1001, 36.1001))
+
+
+def test_save_landuse_lods_fails_when_budget_is_unreachable(tmp_path):
+    output_path = tmp_path / 'gsi-landcover.json'
+
+    with pytest.raises(BudgetError):
+        save_landuse_lods(scattered_landuse(), "EPSG:4326", {('bytes', 100): str(output_path)})
+    assert not output_path.exists()
+
+
+def test_save_landuse_lods_measures_largest_tile(tmp_path):
+    output_path = tmp_path / 'gsi-landcover.json'
+
+    manifest = save_landuse_lods(scattered_landuse(), "EPSG:4326", {('vertices', 200): str(output_path)},
+                                 mesh_tiles)[('vertices', 200)]
+
+    # 予算は全タイルの合計ではなく、タイルごとの上限
+    assert len(manifest['tiles']) > 1
+    assert max(tile['vertices'] for tile in manifest['tiles']) <= 200
+    assert manifest['vertices'] > 200
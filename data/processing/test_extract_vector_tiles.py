@@ -0,0 +1,180 @@
+"""
+extract_vector_tiles のテスト
+
+タイルサーバーの代わりにローカルの http.server を立て、パスごとに決めた応答（ステータス・本文・遅延）を返す
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import mapbox_vector_tile
+import pytest
+import shapely
+
+from extract_vector_tiles import extract_products, fetch_tiles, fetch_vector_tile, num2deg
+from tile_cache import TileCache
+from tile_scheduler import AdaptiveConcurrency
+
+ZOOM = 8
+
+
+class _TileHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            responses = server.routes.get(self.path, [(404, b'', 0.0)])
+            # 最後の応答はその後のリクエストにも繰り返し返す
+            status, body, delay = responses.pop(0) if len(responses) > 1 else responses[0]
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(delay)
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def tile_server():
+    """
+    ローカルのタイルサーバー
+
+    server.routes に {パス: [(ステータス, 本文, 遅延秒), ...]} を設定する（設定のないパスは 404）。
+    server.url_template がURLテンプレート、server.requests が受けたリクエストのパスの一覧
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _TileHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.routes = {}
+    server.requests = []
+    server.active = 0
+    server.peak = 0
+    server.url_template = f"http://127.0.0.1:{server.server_address[1]}/{{z}}/{{x}}/{{y}}.pbf"
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def tile_path(x, y, z=ZOOM):
+    return f"/{z}/{x}/{y}.pbf"
+
+
+def encode_tile(layer, cls):
+    """タイル全体を覆うポリゴンを1つだけ持つベクタータイル"""
+    return mapbox_vector_tile.encode([{
+        'name': layer,
+        'features': [{'geometry': 'POLYGON ((0 0, 4096 0, 4096 4096, 0 4096, 0 0))',
+                      'properties': {'class': cls}}],
+    }])
+
+
+def tile_box(x, y, z=ZOOM):
+    north, west = num2deg(x, y, z)
+    south, east = num2deg(x + 1, y + 1, z)
+    return shapely.box(west, south, east, north)
+
+
+def test_water_keeps_sea_only_tiles_with_land_mask(tile_server, tmp_path):
+    # 西のタイルは陸地を含み、東のタイルは海だけ（どちらも ocean のポリゴンを持つ）
+    coast, sea = (227, 100), (228, 100)
+    for x, y in (coast, sea):
+        tile_server.routes[tile_path(x, y)] = [(200, encode_tile('water', 'ocean'), 0.0)]
+    land = tile_box(*coast).centroid.buffer(0.1)
+    bbox = shapely.union(tile_box(*coast), tile_box(*sea)).buffer(-0.01).bounds
+    output_path = tmp_path / 'water.json'
+
+    extract_products(bbox, ZOOM, {'water': str(output_path)}, url_template=tile_server.url_template,
+                     workers=2, land_mask=land)
+
+    assert tile_path(*sea) in tile_server.requests
+    with open(output_path, encoding='utf-8') as f:
+        features = json.load(f)['features']
+    water = shapely.union_all([shapely.geometry.shape(feature['geometry']) for feature in features])
+    assert water.contains(tile_box(*sea).centroid)
+
+
+def fast_controller(**kwargs):
+    """再試行の待ち時間を短くした AdaptiveConcurrency"""
+    return AdaptiveConcurrency(backoff_base=0.01, backoff_max=0.05, **kwargs)
+
+
+def test_throttled_tile_is_retried_until_delivered(tile_server):
+    payload = encode_tile('landuse', 'residential')
+    tile_server.routes[tile_path(1, 2)] = [(429, b'', 0.0), (503, b'', 0.0), (200, payload, 0.0)]
+    controller = fast_controller(initial=2, maximum=2, max_retries=3)
+
+    delivered = list(fetch_tiles([(1, 2)], ZOOM, tile_server.url_template, workers=2, controller=controller))
+
+    assert delivered == [(1, 2, payload)]
+    assert tile_server.requests == [tile_path(1, 2)] * 3
+    assert controller.stats['retried'] == 2
+    assert controller.stats['throttled'] == 2
+
+
+def test_concurrency_shrinks_under_throttling(tile_server):
+    tiles = [(x, 0) for x in range(16)]
+    for x, y in tiles:
+        tile_server.routes[tile_path(x, y)] = [(503, b'', 0.02), (200, b'tile', 0.02)]
+    controller = fast_controller(initial=8, maximum=8, max_retries=3)
+
+    delivered = list(fetch_tiles(tiles, ZOOM, tile_server.url_template, workers=8, controller=controller))
+
+    assert [data for _, _, data in delivered] == [b'tile'] * len(tiles)
+    assert controller.stats['lowest'] < 8
+    assert tile_server.peak <= 8
+
+
+@pytest.mark.parametrize('status', [404, 204])
+def test_missing_tile_is_cached_as_empty(tile_server, tmp_path, status):
+    tile_server.routes[tile_path(3, 4)] = [(status, b'', 0.0)]
+    cache = TileCache(tmp_path / 'tile_cache')
+
+    assert fetch_vector_tile(ZOOM, 3, 4, tile_server.url_template, cache=cache) == b''
+    assert cache.get(tile_server.url_template, ZOOM, 3, 4)[0] == b''
+
+    # 2回目はキャッシュから返し、サーバーには問い合わせない
+    assert fetch_vector_tile(ZOOM, 3, 4, tile_server.url_template, cache=cache) == b''
+    assert tile_server.requests == [tile_path(3, 4)]
+
+
+def test_failing_tiles_are_reported(tile_server, tmp_path, capsys):
+    good, bad = (227, 100), (228, 100)
+    tile_server.routes[tile_path(*good)] = [(200, encode_tile('landuse', 'residential'), 0.0)]
+    tile_server.routes[tile_path(*bad)] = [(503, b'', 0.0)]
+    bbox = shapely.union(tile_box(*good), tile_box(*bad)).buffer(-0.01).bounds
+
+    extract_products(bbox, ZOOM, {'urban': str(tmp_path / 'urban.json')}, url_template=tile_server.url_template,
+                     workers=2, retries=1)
+
+    output = capsys.readouterr().out
+    assert tile_server.requests.count(tile_path(*bad)) == 2
+    assert "警告: 1 タイルを取得できませんでした" in output
+    assert f"  {ZOOM}/{bad[0]}/{bad[1]}" in output
+    assert f"  {ZOOM}/{good[0]}/{good[1]}" not in output
+
+
+def test_fetch_tiles_yields_in_request_order(tile_server):
+    # 後のタイルほど早く応答し、並列に取得すると完了順は要求順の逆になる
+    tiles = [(x, y) for x in range(4) for y in range(3)]
+    payloads = {}
+    for i, (x, y) in enumerate(tiles):
+        payloads[(x, y)] = encode_tile('landuse', f"class-{x}-{y}") + bytes(range(256)) * (i + 1)
+        tile_server.routes[tile_path(x, y)] = [(200, payloads[(x, y)], 0.01 * (len(tiles) - i))]
+
+    delivered = list(fetch_tiles(tiles, ZOOM, tile_server.url_template, workers=4))
+
+    assert [(x, y) for x, y, _ in delivered] == tiles
+    assert all(data == payloads[(x, y)] for x, y, data in delivered)
+    assert tile_server.peak > 1
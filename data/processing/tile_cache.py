@@ -0,0 +1,311 @@
+"""
+ベクタータイルのローカルキャッシュ
+
+(url_template, z, x, y) のハッシュをキーとしてタイルをディスクに保存し、
+ETag / Last-Modified による再検証とサイズ上限付きのLRU削除を行います。
+デコード・座標変換済みの結果も (取得元, z, x, y, レイヤー, class) ごとに保存できます。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from tile_checkpoint import save_tile_arrays, load_tile_arrays
+
+
+class _DiskLRU:
+    """
+    サイズ上限付きのディスクキャッシュの共通処理
+
+    上限を超えたら最終アクセスが古いエントリから削除する。
+    最終アクセス時刻はファイルのmtimeに記録し、次回実行時もLRU順を復元する。
+    """
+
+    # サイズと最終アクセス時刻を読み込むファイルのパターン（ファイル名の拡張子を除いた部分がキー）
+    SCAN_PATTERNS = ()
+    # エントリを構成するファイルの拡張子（{キャッシュディレクトリ}/{キーの先頭2文字}/{キー}{拡張子}）
+    FILE_SUFFIXES = ()
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.stats = {'evicted': 0}
+
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> [サイズ, 最終アクセス時刻]
+        self._total_bytes = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._scan()
+
+    def _paths(self, key):
+        """エントリを構成するファイルのパス（FILE_SUFFIXES の順）"""
+        base = self.cache_dir / key[:2] / key
+        return tuple(base.with_suffix(suffix) for suffix in self.FILE_SUFFIXES)
+
+    def _scan(self):
+        """既存のキャッシュファイルからサイズと最終アクセス時刻を読み込む"""
+        for pattern in self.SCAN_PATTERNS:
+            for data_path in self.cache_dir.glob(pattern):
+                stat = data_path.stat()
+                self._entries[data_path.stem] = [stat.st_size, stat.st_mtime]
+                self._total_bytes += stat.st_size
+
+    def _add(self, key, size):
+        """保存したエントリを登録し、上限を超えた分を削除"""
+        with self._lock:
+            old = self._entries.get(key)
+            if old:
+                self._total_bytes -= old[0]
+            self._entries[key] = [size, time.time()]
+            self._total_bytes += size
+            self._evict()
+
+    def _touch(self, key, data_path):
+        now = time.time()
+        with self._lock:
+            if key in self._entries:
+                self._entries[key][1] = now
+        try:
+            # 次回実行時もLRU順を復元できるようにmtimeへ記録
+            os.utime(data_path, (now, now))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """上限サイズを超えている間、最終アクセスが古いエントリから削除（ロック取得済みで呼ぶ）"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        for key, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            del self._entries[key]
+            self._total_bytes -= size
+            self.stats['evicted'] += 1
+
+    def record(self, name):
+        """統計カウンタを加算"""
+        with self._lock:
+            self.stats[name] += 1
+
+
+class TileCache(_DiskLRU):
+    """
+    ディスク上のタイルキャッシュ
+
+    Args:
+        cache_dir: キャッシュディレクトリ
+        max_bytes: キャッシュ全体の上限サイズ（超えたら最終アクセスが古い順に削除）
+        max_age: 再検証せずに使う有効期間（秒）
+        offline: Trueならネットワークに一切アクセスせずキャッシュのみを使う
+    """
+
+    SCAN_PATTERNS = ('*/*.pbf',)
+    FILE_SUFFIXES = ('.pbf', '.json')
+
+    def __init__(self, cache_dir='../raw/tile_cache', max_bytes=2 * 1024 ** 3,
+                 max_age=7 * 24 * 3600, offline=False):
+        super().__init__(cache_dir, max_bytes)
+        self.max_age = max_age
+        self.offline = offline
+        self.stats = {'hit': 0, 'revalidated': 0, 'downloaded': 0, 'miss': 0, 'evicted': 0}
+
+    @staticmethod
+    def key(url_template, z, x, y):
+        """キャッシュキー（SHA-256）を計算"""
+        raw = f"{url_template}\n{z}/{x}/{y}".encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(self, url_template, z, x, y):
+        """
+        キャッシュを参照
+
+        Returns:
+            (tile_data, meta) または None
+        """
+        key = self.key(url_template, z, x, y)
+        data_path, meta_path = self._paths(key)
+
+        with self._lock:
+            if key not in self._entries:
+                return None
+
+        try:
+            data = data_path.read_bytes()
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+        self._touch(key, data_path)
+        return data, meta
+
+    def is_fresh(self, meta):
+        """有効期間内であれば再検証なしで使用できる"""
+        return time.time() - meta.get('fetched_at', 0) < self.max_age
+
+    @staticmethod
+    def revalidation_headers(meta):
+        """条件付きリクエスト用のヘッダーを作成"""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def put(self, url_template, z, x, y, tile_data, etag=None, last_modified=None):
+        """タイルを保存し、上限を超えた分を削除"""
+        key = self.key(url_template, z, x, y)
+        data_path, meta_path = self._paths(key)
+        data_path.parent.mkdir(exist_ok=True)
+
+        meta = {
+            'url_template': url_template,
+            'z': z, 'x': x, 'y': y,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+        }
+
+        # 書き込み途中のファイルを読まないよう一時ファイル経由で置き換える
+        tmp_suffix = f".{threading.get_ident()}.tmp"
+        tmp_data = data_path.with_suffix(tmp_suffix)
+        tmp_meta = meta_path.with_suffix(tmp_suffix + 'm')
+        tmp_data.write_bytes(tile_data)
+        tmp_meta.write_text(json.dumps(meta), encoding='utf-8')
+        os.replace(tmp_meta, meta_path)
+        os.replace(tmp_data, data_path)
+
+        self._add(key, len(tile_data))
+
+    def refresh(self, url_template, z, x, y):
+        """304 Not Modified を受けたエントリの取得時刻を更新"""
+        key = self.key(url_template, z, x, y)
+        _, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        meta['fetched_at'] = time.time()
+        meta_path.write_text(json.dumps(meta), encoding='utf-8')
+
+    def summary(self):
+        """キャッシュ利用状況の文字列"""
+        s = self.stats
+        return (f"キャッシュ: ヒット {s['hit']} / 再検証 {s['revalidated']} / "
+                f"ダウンロード {s['downloaded']} / 未取得 {s['miss']} / 削除 {s['evicted']} "
+                f"(合計 {self._total_bytes / 1024 / 1024:.1f} MB)")
+
+
+class DecodedTileCache(_DiskLRU):
+    """
+    デコード・座標変換済みタイルのキャッシュ
+
+    (取得元, z, x, y, レイヤー, class) ごとに緯度経度の配列を .npz で保存する。
+    該当フィーチャーがなかった結果は空のファイル（.none）で記録する。
+    結合の条件や出力形式を変えて再実行する場合に、ダウンロードとデコードを省略できる。
+    元のタイルの更新は検知しないため、最新のタイルで作り直す場合はディレクトリを削除する。
+
+    Args:
+        cache_dir: キャッシュディレクトリ
+        max_bytes: キャッシュ全体の上限サイズ（超えたら最終アクセスが古い順に削除）
+    """
+
+    # 座標変換など保存内容の形式を変えたら上げる（古いエントリは使われなくなる）
+    FORMAT_VERSION = 2
+    SCAN_PATTERNS = ('*/*.npz', '*/*.none')
+    FILE_SUFFIXES = ('.npz', '.none')
+
+    def __init__(self, cache_dir='../raw/decoded_cache', max_bytes=2 * 1024 ** 3):
+        super().__init__(cache_dir, max_bytes)
+        self.stats = {'hit': 0, 'stored': 0, 'evicted': 0}
+
+    @classmethod
+    def key(cls, source, z, x, y, spec):
+        """キャッシュキー（SHA-256）を計算（specはPRODUCTSと同じ形式の定義）"""
+        classes = sorted(spec['classes']) if spec['classes'] else None
+        raw = json.dumps([cls.FORMAT_VERSION, source, z, x, y, spec['layer'], classes])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def contains(self, source, z, x, y, products):
+        """タイルの全プロダクトの結果が保存されているか"""
+        with self._lock:
+            return all(self.key(source, z, x, y, spec) in self._entries for spec in products.values())
+
+    def get(self, source, z, x, y, products):
+        """
+        保存済みの結果を読み込む
+
+        Returns:
+            {プロダクト名: 配列形式（該当なしは None）}（読み込めなければ None）
+        """
+        result = {}
+        for name, spec in products.items():
+            key = self.key(source, z, x, y, spec)
+            data_path, none_path = self._paths(key)
+            try:
+                if none_path.exists():
+                    result[name] = None
+                    self._touch(key, none_path)
+                else:
+                    result[name] = load_tile_arrays(data_path)
+                    self._touch(key, data_path)
+            except (OSError, ValueError, KeyError):
+                return None
+
+        self.record('hit')
+        return result
+
+    def put(self, source, z, x, y, products, product_arrays):
+        """タイルの結果（{プロダクト名: 配列形式}）を保存"""
+        for name, spec in products.items():
+            key = self.key(source, z, x, y, spec)
+            data_path, none_path = self._paths(key)
+            data_path.parent.mkdir(exist_ok=True)
+
+            arrays = product_arrays.get(name)
+            if arrays is None:
+                none_path.touch()
+                self._add(key, 0)
+            else:
+                save_tile_arrays(data_path, arrays)
+                self._add(key, data_path.stat().st_size)
+
+        self.record('stored')
+
+    def replay(self, source, zoom, tiles, cached, products, decoded_stream, failed, fallback):
+        """
+        要求順に (x, y, product_arrays) を返す
+
+        cachedに含まれるタイルは保存結果を読み込み、それ以外は decoded_stream（cached以外の
+        タイルを同じ順序で処理したもの）から受け取って保存する。ダウンロードに失敗したタイル
+        （failedに含まれるもの）は保存しない。
+        実行中に上限を超えて削除されるなどして読み込めなかったタイルは fallback(x, y) で取得し直す。
+        """
+        for x, y in tiles:
+            if (x, y) in cached:
+                product_arrays = self.get(source, zoom, x, y, products)
+                if product_arrays is None:
+                    product_arrays = fallback(x, y)
+                yield x, y, product_arrays
+                continue
+
+            dx, dy, product_arrays = next(decoded_stream)
+            if (dx, dy) not in failed:
+                self.put(source, zoom, dx, dy, products, product_arrays)
+            yield dx, dy, product_arrays
+
+    def summary(self):
+        """キャッシュ利用状況の文字列"""
+        s = self.stats
+        return (f"デコード済みキャッシュ: ヒット {s['hit']} / 保存 {s['stored']} / 削除 {s['evicted']} "
+                f"(合計 {self._total_bytes / 1024 / 1024:.1f} MB)")
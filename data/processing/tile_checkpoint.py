@@ -0,0 +1,146 @@
+"""
+タイル抽出のチェックポイント
+
+完了したタイルごとにデコード結果をファイルに保存し、マニフェストに記録します。
+中断後は完了済みタイルを保存結果から読み直すことで、途中から再開できます。
+"""
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+def save_tile_arrays(path, arrays):
+    """tile_to_arraysの結果を .npz に保存"""
+    meta = {
+        'properties': arrays['properties'],
+        'ids': arrays['ids'],
+        'types': arrays['types'],
+        'layouts': arrays['layouts'],
+    }
+    tmp_path = Path(path).with_suffix('.tmp.npz')
+    np.savez(
+        tmp_path,
+        coords=arrays['coords'],
+        ring_offsets=arrays['ring_offsets'],
+        meta=np.array(json.dumps(meta, ensure_ascii=False)),
+    )
+    tmp_path.replace(path)
+
+
+def load_tile_arrays(path):
+    """save_tile_arraysで保存した結果を読み込む"""
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        return {
+            'properties': meta['properties'],
+            'ids': meta.get('ids', [None] * len(meta['types'])),
+            'types': meta['types'],
+            'layouts': meta['layouts'],
+            'coords': data['coords'],
+            'ring_offsets': data['ring_offsets'],
+        }
+
+
+class ExtractionCheckpoint:
+    """
+    抽出処理のチェックポイント
+
+    マニフェスト（JSON Lines）の1行目に抽出条件、2行目以降に完了タイルと保存先を追記する。
+    抽出条件が異なるチェックポイントからは再開しない。
+
+    Args:
+        checkpoint_dir: チェックポイントのディレクトリ
+        params: 抽出条件（bbox、ズーム、URLなど。JSONに変換できる値）
+        tiles: 処理予定のタイル (x, y) のリスト
+        resume: Trueなら既存のチェックポイントから再開、Falseなら作り直す
+    """
+
+    def __init__(self, checkpoint_dir, params, tiles, resume=False):
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.manifest_path = self.checkpoint_dir / MANIFEST_NAME
+        self.completed = {}  # (x, y) -> {プロダクト名: 保存ファイル名（フィーチャーなしは None）}
+
+        tile_digest = hashlib.sha1(json.dumps(list(map(list, tiles))).encode('utf-8')).hexdigest()
+        self.header = {'params': params, 'tiles': len(tiles), 'tile_digest': tile_digest}
+
+        if resume and self.manifest_path.exists():
+            self._load()
+        else:
+            if self.checkpoint_dir.exists():
+                shutil.rmtree(self.checkpoint_dir)
+            (self.checkpoint_dir / 'tiles').mkdir(parents=True)
+            self._append(self.header)
+
+    def _load(self):
+        with open(self.manifest_path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+        header = json.loads(lines[0])
+        if header != json.loads(json.dumps(self.header)):
+            raise ValueError(
+                f"チェックポイントの抽出条件が一致しません: {self.manifest_path}\n"
+                f"  保存済み: {header}\n  今回: {self.header}"
+            )
+
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 書き込み途中で中断された最終行は無視する
+                continue
+            self.completed[tuple(entry['tile'])] = entry['paths']
+
+    def _append(self, entry):
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+
+    def is_done(self, tile):
+        return tuple(tile) in self.completed
+
+    def record(self, x, y, product_arrays):
+        """完了したタイルの結果（{プロダクト名: arrays}）を保存してマニフェストに追記"""
+        paths = {}
+        for name, arrays in product_arrays.items():
+            path = None
+            if arrays is not None:
+                path = f"tiles/{x}_{y}_{name}.npz"
+                save_tile_arrays(self.checkpoint_dir / path, arrays)
+            paths[name] = path
+        self._append({'tile': [x, y], 'paths': paths})
+        self.completed[(x, y)] = paths
+
+    def load(self, x, y):
+        """保存済みのタイルの結果を {プロダクト名: arrays} として読み込む"""
+        return {
+            name: load_tile_arrays(self.checkpoint_dir / path) if path else None
+            for name, path in self.completed[(x, y)].items()
+        }
+
+    def replay(self, tiles, decoded_stream, failed):
+        """
+        計画順に (x, y, product_arrays) を返す
+
+        完了済みタイルは保存結果を読み込み、それ以外は decoded_stream（未完了タイルのみを
+        同じ順序で処理したもの）から受け取って記録する。ダウンロードに失敗したタイル
+        （failedに含まれるもの）は完了扱いにしないため、再開時に再取得される。
+        """
+        for x, y in tiles:
+            if self.is_done((x, y)):
+                yield x, y, self.load(x, y)
+                continue
+
+            dx, dy, product_arrays = next(decoded_stream)
+            if (dx, dy) not in failed:
+                self.record(dx, dy, product_arrays)
+            yield dx, dy, product_arrays
+
+    def remove(self):
+        """正常終了後にチェックポイントを削除"""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
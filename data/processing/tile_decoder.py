@@ -0,0 +1,393 @@
+"""
+レイヤーを選択してベクタータイル（PBF）をデコード
+
+mapbox_vector_tile.decode はタイル内の全レイヤー・全ジオメトリをPythonのリストに
+展開してからclassで絞り込むため、必要なのが1レイヤーの一部でもタイル全体の
+デコード時間がかかります。ここではタイルのバイト列からレイヤー名だけを読んで
+不要なレイヤーを読み飛ばし、classの絞り込みをジオメトリのデコード前に行います。
+ジオメトリのコマンド列は配列のまま座標に展開します。
+
+出力は mapbox_vector_tile.decode（y座標は反転）と同じ座標・構造で、
+extract_vector_tiles の配列形式（座標は変換前のタイル内座標）です。
+"""
+
+import hashlib
+from collections import OrderedDict
+from itertools import chain
+
+import numpy as np
+from mapbox_vector_tile.Mapbox import vector_tile_pb2
+
+# ジオメトリタイプ（vector_tile.proto の GeomType）
+POINT = 1
+LINESTRING = 2
+POLYGON = 3
+
+CMD_MOVE_TO = 1
+CMD_LINE_TO = 2
+CMD_CLOSE_PATH = 7
+
+# 属性値の型（mapbox_vector_tile と同じ優先順で判定する）
+VALUE_FIELDS = ('bool_value', 'double_value', 'float_value', 'int_value',
+                'sint_value', 'string_value', 'uint_value')
+
+# 同一内容のタイル（空タイルや海だけのタイルなど）のデコード結果を使い回す件数。
+# 同じ内容になるのは小さなタイルに限られるため、大きなタイルは記憶しない
+MEMO_MAX_ENTRIES = 1024
+MEMO_MAX_PAYLOAD = 32 * 1024
+
+_memo = OrderedDict()
+
+
+def _read_varint(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip_field(buf, pos, wire_type):
+    """値を読まずにフィールドを読み飛ばし、次の位置を返す"""
+    if wire_type == 0:
+        _, pos = _read_varint(buf, pos)
+        return pos
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 2:
+        length, pos = _read_varint(buf, pos)
+        return pos + length
+    if wire_type == 5:
+        return pos + 4
+    raise ValueError(f"未対応のワイヤータイプです: {wire_type}")
+
+
+def _layer_name(buf, start, end):
+    """レイヤーのバイト列からname（フィールド1）だけを読む"""
+    pos = start
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        field, wire_type = key >> 3, key & 7
+        if field == 1 and wire_type == 2:
+            length, pos = _read_varint(buf, pos)
+            return bytes(buf[pos:pos + length]).decode('utf-8')
+        pos = _skip_field(buf, pos, wire_type)
+    return None
+
+
+def scan_layers(tile_data, names):
+    """
+    タイルから指定したレイヤーのバイト列だけを取り出す
+
+    Returns:
+        {レイヤー名: レイヤーのバイト列}（同名のレイヤーが複数あれば後のものを使う）
+    """
+    buf = memoryview(tile_data)
+    layers = {}
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        field, wire_type = key >> 3, key & 7
+        if field == 3 and wire_type == 2:
+            length, pos = _read_varint(buf, pos)
+            name = _layer_name(buf, pos, pos + length)
+            if name in names:
+                layers[name] = bytes(buf[pos:pos + length])
+            pos += length
+        else:
+            pos = _skip_field(buf, pos, wire_type)
+    return layers
+
+
+def _parse_value(value):
+    for candidate in VALUE_FIELDS:
+        if value.HasField(candidate):
+            return getattr(value, candidate)
+    raise ValueError(f"{value} is an unknown value")
+
+
+def _select_features(layer, filters):
+    """classで絞り込んだフィーチャーと属性、IDを返す（ジオメトリはまだデコードしない）"""
+    keys = list(layer.keys)
+    values = layer.values
+    parsed = {}
+
+    def value_of(index):
+        if index not in parsed:
+            parsed[index] = _parse_value(values[index])
+        return parsed[index]
+
+    class_key = keys.index('class') if 'class' in keys else None
+
+    features = []
+    properties = []
+    ids = []
+    for feature in layer.features:
+        if feature.type not in (POINT, LINESTRING, POLYGON):
+            continue
+        tags = feature.tags
+
+        if filters:
+            class_val = ''
+            if class_key is not None:
+                for i in range(0, len(tags) - 1, 2):
+                    if tags[i] == class_key:
+                        class_val = value_of(tags[i + 1])
+            if class_val not in filters:
+                continue
+
+        props = {}
+        for i in range(0, len(tags) - 1, 2):
+            props[keys[tags[i]]] = value_of(tags[i + 1])
+        features.append(feature)
+        properties.append(props)
+        ids.append(feature.id if feature.HasField('id') else None)
+
+    return features, properties, ids
+
+
+def _walk_commands(commands, start, end, ftype, runs, parts, pair_cursor):
+    """
+    1フィーチャーのコマンド列を走査し、座標の並びと座標列の区切りを記録
+
+    mapbox_vector_tile と同じく、ClosePath または MoveTo で座標列を区切る
+    （ポリゴンでは区切った座標列を閉じる対象にする）
+
+    Returns:
+        (最後に区切られていない座標列の (開始, 点数), 次の座標番号)
+    """
+    cur_start, cur_len = pair_cursor, 0
+    i = start
+    while i < end:
+        header = commands[i]
+        cmd, count = header & 7, header >> 3
+        i += 1
+
+        if cmd == CMD_CLOSE_PATH:
+            parts.append((cur_start, cur_len, ftype == POLYGON))
+            cur_start, cur_len = pair_cursor, 0
+        elif cmd in (CMD_MOVE_TO, CMD_LINE_TO):
+            if cur_len and cmd == CMD_MOVE_TO and ftype != POINT:
+                parts.append((cur_start, cur_len, ftype == POLYGON))
+                cur_start, cur_len = pair_cursor, 0
+            if i + 2 * count > end:
+                raise ValueError("ジオメトリのコマンド列が途中で終わっています")
+            runs.append((i, count))
+            pair_cursor += count
+            cur_len += count
+            i += 2 * count
+
+    return (cur_start, cur_len), pair_cursor
+
+
+def _gather_rings(starts, lengths, close=None):
+    """
+    座標列ごとの (開始, 点数) から座標の取り出し順を作る
+
+    closeがTrueの座標列は末尾に始点を加える
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    out_lengths = lengths if close is None else lengths + close
+
+    offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(out_lengths, out=offsets[1:])
+    gather = np.repeat(starts - offsets[:-1], out_lengths) + np.arange(offsets[-1])
+    if close is not None and close.any():
+        gather[offsets[1:][close] - 1] = starts[close]
+    return gather, offsets
+
+
+def decode_geometries(features, extent):
+    """
+    フィーチャーのジオメトリをまとめてデコード
+
+    Returns:
+        (types, layouts, points, ring_offsets)
+        points はタイル内座標（y座標は extent - y に反転）の (N, 2) 配列
+    """
+    lengths = [len(feature.geometry) for feature in features]
+    commands = np.fromiter(
+        chain.from_iterable(feature.geometry for feature in features),
+        dtype=np.int64, count=sum(lengths)
+    )
+    command_list = commands.tolist()
+
+    # コマンドの走査（ヘッダーのみをPythonで読み、座標は配列で展開する）
+    runs = []
+    feature_parts = []
+    feature_pairs = [0]
+    pos = 0
+    pair_cursor = 0
+    for feature, length in zip(features, lengths):
+        parts = []
+        tail, pair_cursor = _walk_commands(
+            command_list, pos, pos + length, feature.type, runs, parts, pair_cursor
+        )
+        feature_parts.append((parts, tail))
+        feature_pairs.append(pair_cursor)
+        pos += length
+
+    # 差分座標をジグザグ復号し、フィーチャーごとに累積
+    run_starts = np.array([start for start, _ in runs], dtype=np.int64)
+    run_counts = np.array([count for _, count in runs], dtype=np.int64)
+    run_offsets = np.zeros(len(runs) + 1, dtype=np.int64)
+    np.cumsum(run_counts, out=run_offsets[1:])
+    x_pos = np.repeat(run_starts - 2 * run_offsets[:-1], run_counts) + 2 * np.arange(run_offsets[-1])
+
+    deltas = np.stack([commands[x_pos], commands[x_pos + 1]], axis=1)
+    deltas = (deltas >> 1) ^ -(deltas & 1)
+    cursor = np.cumsum(deltas, axis=0)
+
+    feature_pairs = np.array(feature_pairs, dtype=np.int64)
+    feature_start = feature_pairs[:-1]
+    base = np.zeros((len(features), 2), dtype=np.int64)
+    nonzero = feature_start > 0
+    base[nonzero] = cursor[feature_start[nonzero] - 1]
+    pairs = cursor - np.repeat(base, np.diff(feature_pairs), axis=0)
+    pairs[:, 1] = extent - pairs[:, 1]
+
+    # タイプごとの規則で座標列を決める
+    ring_starts, ring_lengths, ring_close = [], [], []
+    ring_features = []
+    for index, (feature, (parts, tail)) in enumerate(zip(features, feature_parts)):
+        tail_ring = (tail[0], tail[1], False)
+        if feature.type == POINT or (feature.type == LINESTRING and not parts):
+            rings = [tail_ring]
+        else:
+            rings = parts + [tail_ring] if tail[1] else parts
+
+        for start, count, close in rings:
+            ring_starts.append(start)
+            ring_lengths.append(count)
+            ring_close.append(close)
+            ring_features.append(index)
+
+    # ポリゴンの座標列は始点と終点が異なれば閉じる
+    ring_starts = np.array(ring_starts, dtype=np.int64)
+    ring_lengths = np.array(ring_lengths, dtype=np.int64)
+    ring_close = np.array(ring_close, dtype=bool) & (ring_lengths > 0)
+    if ring_close.any():
+        last = ring_starts + ring_lengths - 1
+        ring_close &= np.any(pairs[ring_starts] != pairs[np.maximum(last, 0)], axis=1)
+
+    gather, offsets = _gather_rings(ring_starts, ring_lengths, ring_close)
+    coords = pairs[gather]
+
+    # 座標列の面積の符号（ポリゴンの外周・穴の判定用）
+    cross = np.zeros(len(coords), dtype=np.int64)
+    if len(coords) > 1:
+        cross[:-1] = coords[:-1, 0] * coords[1:, 1] - coords[1:, 0] * coords[:-1, 1]
+        cross[offsets[1:][offsets[1:] > 0] - 1] = 0
+    sums = np.concatenate(([0], np.cumsum(cross)))
+    signs = np.sign(sums[offsets[1:]] - sums[offsets[:-1]]).tolist()
+
+    types = []
+    layouts = []
+    keep = np.ones(len(ring_starts), dtype=bool)
+    ring_index = 0
+    ring_features = np.array(ring_features, dtype=np.int64)
+    rings_per_feature = np.bincount(ring_features, minlength=len(features)).tolist()
+    for feature, n_rings in zip(features, rings_per_feature):
+        ring_ids = range(ring_index, ring_index + n_rings)
+        ring_index += n_rings
+
+        if feature.type == POINT:
+            n_points = int(offsets[ring_ids[0] + 1] - offsets[ring_ids[0]])
+            types.append('Point' if n_points == 1 else 'MultiPoint')
+            layouts.append(1)
+        elif feature.type == LINESTRING:
+            types.append('LineString' if n_rings == 1 else 'MultiLineString')
+            layouts.append(1 if n_rings == 1 else n_rings)
+        else:
+            # 最初の座標列と同じ向きなら外周、逆向きなら穴（面積0の座標列は除外）
+            polygons = []
+            winding = 0
+            for ring_id in ring_ids:
+                sign = signs[ring_id]
+                if sign == 0:
+                    keep[ring_id] = False
+                    continue
+                if winding == 0:
+                    winding = sign
+                if sign == winding:
+                    polygons.append(1)
+                else:
+                    polygons[-1] += 1
+
+            if len(polygons) == 1:
+                types.append('Polygon')
+                layouts.append(polygons[0])
+            else:
+                types.append('MultiPolygon')
+                layouts.append(polygons)
+
+    if not keep.all():
+        gather, offsets = _gather_rings(offsets[:-1][keep], np.diff(offsets)[keep])
+        coords = coords[gather]
+
+    return types, layouts, coords.astype(np.float64), offsets
+
+
+def decode_layer(layer_data, filters=None):
+    """
+    1レイヤーのバイト列をデコード
+
+    Returns:
+        {'properties', 'ids', 'types', 'layouts', 'coords', 'ring_offsets', 'extent'} の辞書
+        （coordsはタイル内座標、idsはフィーチャーID（なければ None）。該当フィーチャーがなければ None）
+    """
+    layer = vector_tile_pb2.tile.layer.FromString(layer_data)
+    features, properties, ids = _select_features(layer, filters)
+    if not features:
+        return None
+
+    types, layouts, coords, ring_offsets = decode_geometries(features, layer.extent)
+    return {
+        'properties': properties,
+        'ids': ids,
+        'types': types,
+        'layouts': layouts,
+        'coords': coords,
+        'ring_offsets': ring_offsets,
+        'extent': layer.extent,
+    }
+
+
+def decode_tile(tile_data, requests):
+    """
+    必要なレイヤーだけをデコードし、classで絞り込んだ結果を返す
+
+    同じ内容の小さなタイルはハッシュで判定し、以前のデコード結果を使い回す
+
+    Args:
+        tile_data: PBFのバイト列
+        requests: {名前: (レイヤー名, classのリストまたはNone)}
+
+    Returns:
+        {名前: decode_layerの結果（該当なしは None）}
+    """
+    memo_key = None
+    if len(tile_data) <= MEMO_MAX_PAYLOAD:
+        signature = repr(sorted((name, layer, tuple(classes or ())) for name, (layer, classes) in requests.items()))
+        memo_key = hashlib.blake2b(tile_data, digest_size=16, person=b'mvt').hexdigest() + signature
+        cached = _memo.get(memo_key)
+        if cached is not None:
+            _memo.move_to_end(memo_key)
+            return dict(cached)
+
+    layers = scan_layers(tile_data, {layer for layer, _ in requests.values()})
+    result = {}
+    for name, (layer, classes) in requests.items():
+        result[name] = decode_layer(layers[layer], classes) if layer in layers else None
+
+    if memo_key is not None:
+        _memo[memo_key] = result
+        if len(_memo) > MEMO_MAX_ENTRIES:
+            _memo.popitem(last=False)
+    return dict(result)
@@ -0,0 +1,263 @@
+"""
+タイル単位のジオメトリ結合
+
+タイルごとにポリゴンを結合し、四分木を下から順に隣接タイル同士を結合していきます。
+全フィーチャーを一度に unary_union するのに比べ、保持するジオメトリが
+処理中の部分木の分だけで済みます。
+
+タイル境界をまたぐフィーチャーは隣接タイルにも（バッファ領域を含めて）重複して入っているため、
+結合の前に各タイルの範囲で切り取り、完全に同じジオメトリを除きます。
+"""
+
+import hashlib
+
+import numpy as np
+import shapely
+from shapely.errors import GEOSException
+from shapely.ops import unary_union
+
+
+def morton_key(tile):
+    """タイル座標 (x, y) をZ順序（四分木の走査順）のキーに変換"""
+    x, y = tile
+    key = 0
+    bit = 0
+    while x or y:
+        key |= ((x & 1) << (2 * bit)) | ((y & 1) << (2 * bit + 1))
+        x >>= 1
+        y >>= 1
+        bit += 1
+    return key
+
+
+def quadtree_order(tiles):
+    """タイルを四分木の走査順（兄弟タイルが連続する順）に並べ替える"""
+    return sorted(tiles, key=morton_key)
+
+
+def clip_geometries(geometries, bounds):
+    """
+    ジオメトリをタイルの範囲 (min_lon, min_lat, max_lon, max_lat) で切り取る
+
+    範囲外になったジオメトリは None にし、境界に接しているだけで次元が下がった部分（ポリゴンの辺など）は除く。
+    無効なジオメトリは切り取れないためそのまま返す
+
+    Returns:
+        入力と同じ順序・長さのリスト
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    if len(geometries) == 0:
+        return []
+
+    # 範囲内に収まるジオメトリは切り取らない
+    min_x, min_y, max_x, max_y = bounds
+    extents = shapely.bounds(geometries)
+    inside = ((extents[:, 0] >= min_x) & (extents[:, 1] >= min_y)
+              & (extents[:, 2] <= max_x) & (extents[:, 3] <= max_y))
+
+    clipped = geometries.copy()
+    targets = ~inside & shapely.is_valid(geometries)
+    if targets.any():
+        # 矩形での切り取りは高速だが結果が無効になる場合があるため、その分だけ交差を計算し直す
+        cut = shapely.clip_by_rect(geometries[targets], *bounds)
+        invalid = ~shapely.is_valid(cut)
+        if invalid.any():
+            cut[invalid] = shapely.intersection(geometries[targets][invalid], shapely.box(*bounds))
+        clipped[targets] = cut
+
+    # 空になったものは None、次元が下がった部分（境界に接するだけのポリゴンの辺など）は除く
+    clipped[shapely.is_empty(clipped)] = None
+    mixed = targets & (
+        (shapely.get_dimensions(clipped) != shapely.get_dimensions(geometries))
+        | (shapely.get_type_id(clipped) == shapely.GeometryType.GEOMETRYCOLLECTION)
+    )
+    for i in np.flatnonzero(mixed & (clipped != None)):  # noqa: E711
+        dimension = shapely.get_dimensions(geometries[i])
+        parts = [part for part in getattr(clipped[i], 'geoms', [clipped[i]])
+                 if shapely.get_dimensions(part) == dimension]
+        clipped[i] = union_geometries(parts)
+
+    return list(clipped)
+
+
+def geometry_digests(geometries):
+    """正規化したWKBのハッシュのリスト（始点や向きだけが異なる同一ジオメトリも同じ値）"""
+    wkbs = shapely.to_wkb(shapely.normalize(np.asarray(geometries, dtype=object)))
+    return [hashlib.blake2b(wkb, digest_size=16).digest() for wkb in wkbs]
+
+
+def dedupe_geometries(geometries):
+    """完全に同じジオメトリ（WKBのハッシュが一致するもの）と None を除く"""
+    geometries = [g for g in geometries if g is not None]
+    if len(geometries) < 2:
+        return geometries
+
+    seen = set()
+    unique = []
+    for geometry, digest in zip(geometries, geometry_digests(geometries)):
+        if digest not in seen:
+            seen.add(digest)
+            unique.append(geometry)
+    return unique
+
+
+def union_geometries(geometries):
+    """
+    ジオメトリを結合（空なら None）
+
+    トポロジーエラーが出た場合は buffer(0) で修復してから再試行する
+    """
+    geometries = [g for g in geometries if g is not None and not g.is_empty]
+    if not geometries:
+        return None
+    if len(geometries) == 1:
+        return geometries[0]
+
+    try:
+        return unary_union(geometries)
+    except GEOSException:
+        return unary_union([g.buffer(0) for g in geometries])
+
+
+class QuadtreeUnion:
+    """
+    四分木に沿った段階的なポリゴン結合
+
+    add() でタイルごとのジオメトリを渡すと、そのタイルを結合した結果を親ノードに積み、
+    親ノードの子がすべて揃った時点で結合してさらに上へ送る。
+    タイルを quadtree_order() の順に渡せば、保持されるのは各レベルで高々3つの兄弟ノードのみ。
+
+    Args:
+        tiles: 処理予定のタイル座標 (x, y) のリスト
+        zoom: タイルのズームレベル
+    """
+
+    def __init__(self, tiles, zoom):
+        self.zoom = zoom
+        self._expected = {}  # ノード -> 結果を待つ子ノードの数
+        self._pending = {}   # ノード -> 揃った子ノードの結合結果
+        self._received = {}  # ノード -> 受け取った子ノードの数
+        self._result = None
+        self._pending_count = 0
+        self.peak_pending = 0  # 同時に保持したジオメトリ数の最大値
+
+        # 全タイルが1つのノードに収まるレベル（根）まで子ノード数を数える
+        level_nodes = {(zoom, x, y) for x, y in tiles}
+        while len(level_nodes) > 1:
+            parents = set()
+            for level, x, y in level_nodes:
+                parent = (level - 1, x // 2, y // 2)
+                self._expected[parent] = self._expected.get(parent, 0) + 1
+                parents.add(parent)
+            level_nodes = parents
+
+        self.root = next(iter(level_nodes)) if level_nodes else None
+
+    def add(self, x, y, geometries):
+        """
+        1タイル分のジオメトリを追加（フィーチャーがないタイルも空リストで渡す）
+
+        無効なジオメトリと空のジオメトリは除外する
+        """
+        valid = [g for g in geometries if g is not None and shapely.is_valid(g) and not g.is_empty]
+        self._push((self.zoom, x, y), union_geometries(valid))
+
+    def _push(self, node, geometry):
+        while node != self.root:
+            level, x, y = node
+            parent = (level - 1, x // 2, y // 2)
+
+            children = self._pending.setdefault(parent, [])
+            if geometry is not None:
+                children.append(geometry)
+                self._pending_count += 1
+                self.peak_pending = max(self.peak_pending, self._pending_count)
+            self._received[parent] = self._received.get(parent, 0) + 1
+
+            if self._received[parent] < self._expected[parent]:
+                return
+
+            # 子ノードが揃ったので結合して上のレベルへ
+            children = self._pending.pop(parent)
+            self._pending_count -= len(children)
+            del self._received[parent]
+            geometry = union_geometries(children)
+            node = parent
+
+        self._result = geometry
+
+    def result(self):
+        """
+        結合結果を返す（ジオメトリがなければ None）
+
+        add() されなかったタイルがあっても、受け取った分だけで結合を完了する
+        """
+        while self._pending:
+            # 最も深いノードから順に、揃っていなくても結合して上へ送る
+            node = max(self._pending, key=lambda n: n[0])
+            children = self._pending.pop(node)
+            self._pending_count -= len(children)
+            self._received.pop(node, None)
+            geometry = union_geometries(children)
+
+            if node == self.root:
+                self._result = geometry
+                continue
+
+            level, x, y = node
+            parent = (level - 1, x // 2, y // 2)
+            siblings = self._pending.setdefault(parent, [])
+            if geometry is not None:
+                siblings.append(geometry)
+                self._pending_count += 1
+
+        return self._result
+
+
+class FeatureStitcher:
+    """
+    タイルごとに切り取ったフィーチャーの断片をIDでつなぎ直す（結合しない出力用）
+
+    同じIDの断片はすべてのタイルを受け取った後に結合し（線はつながる部分を1本にする）、
+    IDのないフィーチャーは完全に同じジオメトリを除いてそのまま出力する
+    """
+
+    def __init__(self):
+        self._fragments = {}  # ID -> (最初の断片の属性, 断片のリスト)
+        self._order = []      # 出力順（IDまたはIDなしフィーチャー）
+        self._seen = set()    # IDのないフィーチャーのジオメトリのハッシュ
+
+    def add(self, properties, ids, geometries):
+        """1タイル分のフィーチャー（属性、ID、切り取り済みのジオメトリ）を追加"""
+        for props, feature_id, geometry in zip(properties, ids, geometries):
+            if geometry is None or geometry.is_empty:
+                continue
+
+            if feature_id is None:
+                digest = geometry_digests([geometry])[0]
+                if digest not in self._seen:
+                    self._seen.add(digest)
+                    self._order.append((props, geometry))
+                continue
+
+            if feature_id not in self._fragments:
+                self._fragments[feature_id] = (props, [])
+                self._order.append(feature_id)
+            self._fragments[feature_id][1].append(geometry)
+
+    def features(self):
+        """(属性, ジオメトリ) のリスト"""
+        result = []
+        for entry in self._order:
+            if isinstance(entry, tuple):
+                result.append(entry)
+                continue
+
+            props, fragments = self._fragments[entry]
+            fragments = dedupe_geometries(fragments)
+            geometry = union_geometries(fragments)
+            if geometry is not None and geometry.geom_type == 'MultiLineString':
+                geometry = shapely.line_merge(geometry)
+            if geometry is not None and not geometry.is_empty:
+                result.append((props, geometry))
+        return result
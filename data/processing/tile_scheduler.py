@@ -0,0 +1,132 @@
+"""
+タイルサーバーへの同時リクエスト数の自動調整
+
+公開タイルサーバーは負荷が高いと 429 / 5xx を返すため、応答時間とエラーから
+同時リクエスト数をAIMD方式（成功で少しずつ増やし、スロットリングで半減）で調整し、
+失敗したリクエストはジッター付きの指数バックオフで再試行します。
+"""
+
+import random
+import threading
+import time
+
+# 再試行するHTTPステータス（スロットリング・一時的なサーバーエラー）
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# 存在しないタイル（海上・データの範囲外）として空のタイルを返すHTTPステータス
+EMPTY_TILE_STATUS = {204, 404}
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD方式の同時リクエスト数制御
+
+    - 成功: 上限を 1 / 上限 ずつ増やす（概ね1往復で+1）。ただし応答時間の平滑値が
+      これまでの最小値の latency_factor 倍（かつ latency_margin 秒以上の増加）を超えている間は、同じ量だけ減らす
+    - 429 / 5xx / タイムアウト: 上限に decrease を掛ける。減らした後に送信したリクエストの
+      結果が返るまでは、同時に失敗したリクエストで重ねて減らさない
+    - Retry-After があればその時刻まで新しいリクエストを送らない
+
+    Args:
+        initial: 同時リクエスト数の初期値
+        minimum, maximum: 同時リクエスト数の範囲
+        decrease: スロットリング時に上限へ掛ける係数
+        latency_factor: 応答時間の悪化とみなす倍率
+        latency_margin: 応答時間の悪化とみなす最小の増加量（秒、ごく短い応答時間の揺らぎを無視する）
+        max_retries: 1タイルあたりの再試行回数
+        backoff_base, backoff_max: 再試行の待ち時間の基準と上限（秒）
+    """
+
+    def __init__(self, initial=8, minimum=1, maximum=16, decrease=0.5, latency_factor=2.0,
+                 latency_margin=0.05, max_retries=5, backoff_base=0.5, backoff_max=30.0):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_margin = latency_margin
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {'ok': 0, 'throttled': 0, 'retried': 0, 'lowest': self.limit, 'highest': self.limit}
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._latency = None       # 応答時間の平滑値
+        self._base_latency = None  # 応答時間の平滑値の最小値
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+
+    def acquire(self):
+        """送信枠が空くまで待ち、送信時刻を返す"""
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self._in_flight < int(self.limit):
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self._in_flight += 1
+            return time.monotonic()
+
+    def release(self, started, latency=None, throttled=False):
+        """
+        リクエストの結果を反映して送信枠を返す
+
+        Args:
+            started: acquire() の戻り値
+            latency: 応答時間（秒、エラー時は None）
+            throttled: 429 / 5xx / タイムアウトなど、負荷を下げるべき結果か
+        """
+        with self._cond:
+            self._in_flight -= 1
+
+            if throttled:
+                self.stats['throttled'] += 1
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = time.monotonic()
+            else:
+                self.stats['ok'] += 1
+                if latency is not None:
+                    self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                    if self._base_latency is None or self._latency < self._base_latency:
+                        self._base_latency = self._latency
+
+                step = 1.0 / self.limit
+                if self._latency is not None and self._latency > max(
+                        self._base_latency * self.latency_factor, self._base_latency + self.latency_margin):
+                    self.limit = max(self.minimum, self.limit - step)
+                else:
+                    self.limit = min(self.maximum, self.limit + step)
+
+            self.stats['lowest'] = min(self.stats['lowest'], self.limit)
+            self.stats['highest'] = max(self.stats['highest'], self.limit)
+            self._cond.notify_all()
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        再試行までの待ち時間（秒）
+
+        指数バックオフの範囲から一様に選ぶ（full jitter）。Retry-After があればそれ以上待ち、
+        その間は他のリクエストも送らない
+        """
+        wait = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = min(float(retry_after), self.backoff_max)
+            except ValueError:
+                delay = 0.0
+            if delay > 0:
+                with self._cond:
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                wait = max(wait, delay)
+
+        with self._cond:
+            self.stats['retried'] += 1
+        return wait
+
+    def summary(self):
+        """制御状況の文字列"""
+        s = self.stats
+        return (f"同時リクエスト数: 最終 {int(self.limit)}（範囲 {int(s['lowest'])}-{int(s['highest'])}） / "
+                f"成功 {s['ok']} / スロットリング・エラー {s['throttled']} / 再試行 {s['retried']}")
@@ -0,0 +1,241 @@
+"""
+ローカルのタイルアーカイブ（MBTiles / PMTiles）からベクタータイルを読み込む
+
+MBTilesはSQLiteへのまとめ問い合わせ、PMTilesはメモリマップしたファイルから
+ディレクトリを辿ってタイルを取り出します。
+"""
+
+import gzip
+import mmap
+import sqlite3
+import struct
+import threading
+from pathlib import Path
+
+# SQLiteのパラメータ数上限を超えないよう、1回の問い合わせで読むタイル数
+MBTILES_BATCH_SIZE = 256
+
+
+def _decompress(data):
+    """gzip圧縮されたタイルを展開（非圧縮ならそのまま）"""
+    if data[:2] == b'\x1f\x8b':
+        return gzip.decompress(data)
+    return data
+
+
+class MBTilesSource:
+    """
+    MBTiles（SQLite）アーカイブ
+
+    MBTilesの行番号はTMS（南が0）なので、XYZのyを反転して問い合わせる
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        uri = f"{self.path.resolve().as_uri()}?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def get_tile(self, z, x, y):
+        """1タイルを取得（存在しなければ空のバイト列）"""
+        tms_y = (1 << z) - 1 - y
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, tms_y)
+            ).fetchone()
+        return _decompress(row[0]) if row else b''
+
+    def read_tiles(self, z, tiles):
+        """タイルをまとめて問い合わせ、要求順に (x, y, tile_data) を返す"""
+        tiles = list(tiles)
+        for start in range(0, len(tiles), MBTILES_BATCH_SIZE):
+            batch = tiles[start:start + MBTILES_BATCH_SIZE]
+            values = ','.join(['(?, ?)'] * len(batch))
+            params = []
+            for x, y in batch:
+                params.extend((x, (1 << z) - 1 - y))
+            params.append(z)
+
+            with self._lock:
+                rows = self._conn.execute(
+                    f"WITH wanted(col, row) AS (VALUES {values}) "
+                    "SELECT t.tile_column, t.tile_row, t.tile_data FROM tiles t "
+                    "JOIN wanted w ON t.tile_column = w.col AND t.tile_row = w.row "
+                    "WHERE t.zoom_level = ?",
+                    params
+                ).fetchall()
+
+            found = {(col, (1 << z) - 1 - row): data for col, row, data in rows}
+            for x, y in batch:
+                data = found.get((x, y))
+                yield x, y, _decompress(data) if data else b''
+
+    def close(self):
+        self._conn.close()
+
+
+def zxy_to_tileid(z, x, y):
+    """PMTilesのタイルID（ズームごとのヒルベルト曲線順）を計算"""
+    acc = ((1 << (2 * z)) - 1) // 3
+    n = 1 << z
+    d = 0
+    s = n >> 1
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = n - 1 - x
+                y = n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return acc + d
+
+
+def _read_varint(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+class PMTilesSource:
+    """
+    PMTiles v3 アーカイブ
+
+    ファイル全体をメモリマップし、ルート／リーフディレクトリを辿ってタイルの位置を求める。
+    展開済みのディレクトリはキャッシュする。
+    """
+
+    HEADER_SIZE = 127
+    COMPRESSION_NONE = 1
+    COMPRESSION_GZIP = 2
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._dir_cache = {}
+        self._lock = threading.Lock()
+
+        header = self._mm[:self.HEADER_SIZE]
+        if header[:7] != b'PMTiles' or header[7] != 3:
+            raise ValueError(f"PMTiles v3 ではありません: {self.path}")
+
+        (self.root_offset, self.root_length, _, _, self.leaf_offset, _,
+         self.data_offset, _, _, _, _) = struct.unpack_from('<11Q', header, 8)
+        self.internal_compression = header[97]
+        self.tile_compression = header[98]
+
+    def _decompress(self, data, compression):
+        if compression == self.COMPRESSION_GZIP:
+            return gzip.decompress(data)
+        if compression in (self.COMPRESSION_NONE, 0):
+            return data
+        raise ValueError(f"未対応の圧縮形式です（{compression}）: {self.path}")
+
+    def _directory(self, offset, length):
+        """ディレクトリを展開して (tile_ids, run_lengths, offsets, lengths) を返す"""
+        key = (offset, length)
+        with self._lock:
+            cached = self._dir_cache.get(key)
+        if cached is not None:
+            return cached
+
+        buf = self._decompress(self._mm[offset:offset + length], self.internal_compression)
+        n, pos = _read_varint(buf, 0)
+
+        tile_ids = [0] * n
+        last_id = 0
+        for i in range(n):
+            delta, pos = _read_varint(buf, pos)
+            last_id += delta
+            tile_ids[i] = last_id
+
+        run_lengths = [0] * n
+        for i in range(n):
+            run_lengths[i], pos = _read_varint(buf, pos)
+
+        lengths = [0] * n
+        for i in range(n):
+            lengths[i], pos = _read_varint(buf, pos)
+
+        offsets = [0] * n
+        for i in range(n):
+            value, pos = _read_varint(buf, pos)
+            if value == 0 and i > 0:
+                offsets[i] = offsets[i - 1] + lengths[i - 1]
+            else:
+                offsets[i] = value - 1
+
+        directory = (tile_ids, run_lengths, offsets, lengths)
+        with self._lock:
+            self._dir_cache[key] = directory
+        return directory
+
+    def get_tile(self, z, x, y):
+        """1タイルを取得（存在しなければ空のバイト列）"""
+        tile_id = zxy_to_tileid(z, x, y)
+        dir_offset, dir_length = self.root_offset, self.root_length
+
+        for _ in range(4):  # ルート + リーフは最大3段
+            tile_ids, run_lengths, offsets, lengths = self._directory(dir_offset, dir_length)
+
+            # tile_id 以下で最大のエントリを二分探索
+            lo, hi = 0, len(tile_ids) - 1
+            found = -1
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                if tile_ids[mid] <= tile_id:
+                    found = mid
+                    lo = mid + 1
+                else:
+                    hi = mid - 1
+            if found < 0:
+                return b''
+
+            if run_lengths[found] == 0:
+                # リーフディレクトリへ
+                dir_offset = self.leaf_offset + offsets[found]
+                dir_length = lengths[found]
+                continue
+
+            if tile_id - tile_ids[found] >= run_lengths[found]:
+                return b''
+
+            start = self.data_offset + offsets[found]
+            data = self._mm[start:start + lengths[found]]
+            return self._decompress(data, self.tile_compression)
+
+        return b''
+
+    def read_tiles(self, z, tiles):
+        """要求順に (x, y, tile_data) を返す"""
+        for x, y in tiles:
+            yield x, y, self.get_tile(z, x, y)
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+def open_tile_source(location):
+    """
+    タイルの取得元がローカルアーカイブならソースを開く
+
+    Returns:
+        MBTilesSource / PMTilesSource（URLテンプレートの場合は None）
+    """
+    suffix = Path(str(location)).suffix.lower()
+    if suffix == '.mbtiles':
+        return MBTilesSource(location)
+    if suffix == '.pmtiles':
+        return PMTilesSource(location)
+    return None